@@ -0,0 +1,109 @@
+# backend/auth.py
+from collections import namedtuple
+from functools import wraps
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.db import db
+from backend.cache import TTLCache
+from backend.models import User, Role, Customer, Professional, roles_users
+
+# Everything the resources need to know about the caller, resolved once per user and cached
+Identity = namedtuple('Identity', ['user_id', 'active', 'roles', 'customer_id', 'professional_id'])
+
+identity_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+def init_app(app):
+    identity_cache.configure(
+        maxsize=app.config.get('IDENTITY_CACHE_SIZE', 10000),
+        ttl=app.config.get('IDENTITY_CACHE_TTL', 60)
+    )
+
+
+def load_identity(user_id):
+    # Roles and profile ids come back from a single query; one row per role
+    rows = db.session.query(User.id, User.active, Role.name, Customer.id, Professional.id)\
+        .outerjoin(roles_users, roles_users.c.user_id == User.id)\
+        .outerjoin(Role, Role.id == roles_users.c.role_id)\
+        .outerjoin(Customer, Customer.user_id == User.id)\
+        .outerjoin(Professional, Professional.user_id == User.id)\
+        .filter(User.id == user_id)\
+        .all()
+    if not rows:
+        return None
+
+    _, active, _, customer_id, professional_id = rows[0]
+    roles = frozenset(row[2] for row in rows if row[2])
+    return Identity(int(user_id), bool(active), roles, customer_id, professional_id)
+
+
+def get_identity(user_id):
+    user_id = int(user_id)
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        identity = load_identity(user_id)
+        if identity is not None:
+            identity_cache.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(*user_ids):
+    for user_id in user_ids:
+        identity_cache.delete(int(user_id))
+
+
+def current_identity():
+    # Identity resolved by role_required for the current request
+    return g.get('auth_identity')
+
+
+def role_required(*roles, locations=None):
+    """Require a valid JWT whose user is active and holds at least one of ``roles``.
+
+    ``locations`` overrides where the token is looked for, e.g. ['headers', 'query_string'].
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request(locations=locations)
+            identity = get_identity(get_jwt_identity())
+            if not identity or not identity.active or not identity.roles.intersection(roles):
+                return {"error": "Unauthorized access."}, 403
+            g.auth_identity = identity
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+### ------------------------------- cache invalidation -----------------------------###
+
+def _affected_user_id(obj):
+    if isinstance(obj, User):
+        return obj.id
+    if isinstance(obj, (Customer, Professional)):
+        return obj.user_id
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    # Remember whose identity changed; the cache is only cleared once the transaction commits
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        user_id = _affected_user_id(obj)
+        if user_id is not None:
+            changed.add(user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if changed:
+        invalidate_identity(*changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,71 @@
+# backend/bulk.py
+from sqlalchemy import update, or_
+from backend.db import db
+from backend.models import Professional
+from backend.auth import invalidate_identity
+from backend.cache import response_cache
+from backend.dispatch import dispatcher
+
+MAX_BULK_IDS = 5000
+
+
+def parse_ids(values):
+    if not isinstance(values, list) or not values:
+        raise ValueError("ids must be a non-empty list.")
+    try:
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        raise ValueError("ids must be integers.")
+    if len(ids) > MAX_BULK_IDS:
+        raise ValueError("At most {} ids can be updated at once.".format(MAX_BULK_IDS))
+    return ids
+
+
+def parse_values(data, settable):
+    """Validate the ``set`` object of a bulk request against ``settable`` (field -> converter)."""
+    if not isinstance(data, dict) or not data:
+        raise ValueError("set must name at least one field.")
+    values = {}
+    for field, value in data.items():
+        if field not in settable:
+            raise ValueError("Field '{}' cannot be bulk updated.".format(field))
+        column, converter = settable[field]
+        values[column.key] = value if isinstance(value, bool) else converter(str(value))
+    return values
+
+
+def bulk_update(model, values, ids=None, filters=None):
+    """Apply ``values`` to the rows of ``model`` selected by ``ids`` and/or ``filters``.
+
+    Runs as one UPDATE ... RETURNING; rows that already hold the values are not
+    touched. Returns (updated [(id, user_id)], unchanged ids, missing ids); the
+    last two are only computed for an id list. The caller commits.
+    """
+    conditions = list(filters or [])
+    if ids is not None:
+        conditions.append(model.id.in_(ids))
+    changed = or_(*[getattr(model, field).is_distinct_from(value) for field, value in values.items()])
+
+    updated = db.session.execute(
+        update(model).where(*conditions).where(changed).values(**values).returning(model.id, model.user_id),
+        execution_options={"synchronize_session": False}
+    ).all()
+
+    unchanged = missing = []
+    if ids is not None:
+        updated_ids = {row_id for row_id, _ in updated}
+        existing = {row_id for row_id, in db.session.query(model.id).filter(model.id.in_(ids))}
+        unchanged = [row_id for row_id in ids if row_id in existing and row_id not in updated_ids]
+        missing = [row_id for row_id in ids if row_id not in existing]
+    return [tuple(row) for row in updated], unchanged, missing
+
+
+def refresh_after_bulk_update(model, updated):
+    # Core UPDATEs skip the session hooks that normally keep these caches in step
+    if not updated:
+        return
+    table = model.__tablename__
+    response_cache.invalidate_tags([table] + ['{}:{}'.format(table, row_id) for row_id, _ in updated])
+    invalidate_identity(*[user_id for _, user_id in updated])
+    if model is Professional:
+        dispatcher.mark_stale([row_id for row_id, _ in updated])
@@ -0,0 +1,272 @@
+# backend/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def incr(self, key, delta=1):
+        # Adjust a cached number in place, keeping its expiry; missing keys are left missing
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                self._data[key] = (expires_at, value + delta)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+### ------------------------------- response cache -----------------------------###
+
+class LocalCacheBackend:
+    """In-process backend: a TTLCache for entries plus a tag -> keys index for invalidation."""
+
+    def __init__(self, maxsize=10000, default_timeout=30):
+        self._entries = TTLCache(maxsize=maxsize, ttl=default_timeout)
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, timeout, tags):
+        self._entries.set(key, value, ttl=timeout)
+        with self._lock:
+            for tag in tags:
+                keys = self._tags.setdefault(tag, set())
+                keys.add(key)
+                # Drop keys that already expired or were evicted so tag sets stay bounded
+                if len(keys) > self._entries.maxsize:
+                    keys.intersection_update(k for k in list(keys) if self._entries.get(k) is not None)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.pop(tag, set())
+        for key in keys:
+            self._entries.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._tags.clear()
+        self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Shared backend; entries are JSON strings and each tag is a Redis set of keys."""
+
+    def __init__(self, client, prefix='mad2:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, timeout, tags):
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, timeout, json.dumps(value))
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            pipe.sadd(tag_key, self.prefix + key)
+            pipe.expire(tag_key, timeout)
+        pipe.execute()
+
+    def invalidate_tags(self, tags):
+        tag_keys = [self.prefix + 'tag:' + tag for tag in tags]
+        pipe = self.client.pipeline()
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        members = pipe.execute()
+
+        keys = set(tag_keys)
+        for entry_keys in members:
+            keys.update(entry_keys)
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """Caches successful resource responses, keyed by route, query args and caller role."""
+
+    def __init__(self):
+        self.backend = LocalCacheBackend()
+        self.default_timeout = 30
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, backend=None):
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 30)
+        if backend is None:
+            backend = self._backend_from_config(app)
+        self.backend = backend
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _backend_from_config(self, app):
+        if app.config.get('CACHE_TYPE') == 'RedisCache':
+            try:
+                import redis
+
+                client = redis.Redis(
+                    host=app.config.get('CACHE_REDIS_HOST', 'localhost'),
+                    port=app.config.get('CACHE_REDIS_PORT', 6379),
+                    db=app.config.get('CACHE_REDIS_DB', 0),
+                    socket_connect_timeout=1
+                )
+                client.ping()
+                return RedisCacheBackend(client)
+            except Exception as e:
+                app.logger.warning("Redis cache unavailable (%s); using the in-process cache.", e)
+        return LocalCacheBackend(
+            maxsize=app.config.get('CACHE_LOCAL_MAXSIZE', 10000),
+            default_timeout=self.default_timeout
+        )
+
+    def _key(self):
+        identity = g.get('auth_identity')
+        roles = ','.join(sorted(identity.roles)) if identity else '*'
+        args = '&'.join('{}={}'.format(k, v) for k, v in sorted(request.args.items(multi=True)))
+        return '{}?{}|{}'.format(request.path, args, roles)
+
+    def cached(self, tags, timeout=None):
+        """Cache a resource method's 200 responses under ``tags``.
+
+        ``tags`` is a list of tag names or a callable receiving the view kwargs,
+        e.g. ``lambda service_id: ['service:{}'.format(service_id)]``.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = self._key()
+                try:
+                    entry = self.backend.get(key)
+                except Exception:
+                    entry = None
+                if entry is not None:
+                    self._count(hit=True)
+                    return entry[0], entry[1]
+
+                self._count(hit=False)
+                response = fn(*args, **kwargs)
+                if isinstance(response, tuple) and len(response) == 2 and response[1] == 200:
+                    entry_tags = tags(**kwargs) if callable(tags) else tags
+                    try:
+                        self.backend.set(key, [response[0], response[1]], timeout or self.default_timeout, entry_tags)
+                    except Exception:
+                        pass
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate_tags(self, tags):
+        if tags:
+            try:
+                self.backend.invalidate_tags(set(tags))
+            except Exception:
+                pass
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None
+        }
+
+
+response_cache = ResponseCache()
+
+
+def _row_tags(obj):
+    # A change to a row invalidates its table's collection entries and the entry for that row
+    table = getattr(obj, '__tablename__', None)
+    if not table:
+        return ()
+    row_id = getattr(obj, 'id', None)
+    return (table, '{}:{}'.format(table, row_id)) if row_id is not None else (table,)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags.update(_row_tags(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_cache_tags(session):
+    response_cache.invalidate_tags(session.info.pop('cache_tags', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_cache_tags(session):
+    session.info.pop('cache_tags', None)
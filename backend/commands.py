@@ -0,0 +1,114 @@
+# backend/commands.py
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the database tables or apply pending migrations."""
+    from backend.db import upgrade_database
+
+    try:
+        upgrade_database()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo("Database is up to date.")
+
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    """Create the user roles and the default admin account."""
+    from backend.seed import seed_data, ADMIN_EMAIL, ADMIN_PASSWORD
+
+    if seed_data():
+        click.echo(f"Admin user created: {ADMIN_EMAIL} / {ADMIN_PASSWORD}")
+    click.echo("Database seeding complete.")
+
+
+@click.command('rebuild-rating-stats')
+@with_appcontext
+def rebuild_rating_stats_command():
+    """Recompute professional rating statistics from all customer reviews."""
+    from backend.ratings import rebuild_rating_stats
+
+    count = rebuild_rating_stats()
+    click.echo(f"Rebuilt rating stats for {count} professionals.")
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Repopulate the full-text search index for services, professionals and customers."""
+    from backend.search import rebuild_search_index
+
+    count = rebuild_search_index()
+    click.echo(f"Indexed {count} documents.")
+
+
+@click.command('migrate-professional-services')
+@with_appcontext
+def migrate_professional_services_command():
+    """Link professionals to the services named in available_services; migration 0006 does this on upgrade."""
+    from backend.matching import migrate_available_services
+
+    created, unmatched = migrate_available_services()
+    click.echo(f"Linked {created} professional services.")
+    if unmatched:
+        click.echo("No service found for: {}".format(', '.join(unmatched)))
+
+
+@click.command('dispatch-pending')
+@click.option('--limit', default=None, type=int, help='Maximum number of requests to assign.')
+@with_appcontext
+def dispatch_pending_command(limit):
+    """Assign pending service requests to professionals."""
+    from backend.dispatch import dispatcher
+
+    result = dispatcher.dispatch(limit=limit)
+    click.echo("Assigned {} requests, {} left unassigned.".format(len(result["assigned"]), len(result["unassigned"])))
+
+
+@click.command('process-documents')
+@with_appcontext
+def process_documents_command():
+    """Queue processing for uploaded documents that are still pending."""
+    from backend.models import ProfessionalDocument
+    from backend.tasks import enqueue, process_professional_document
+
+    document_ids = [document_id for document_id, in ProfessionalDocument.query
+                    .filter_by(status='pending').with_entities(ProfessionalDocument.id)]
+    for document_id in document_ids:
+        enqueue(process_professional_document, document_id)
+    click.echo(f"Queued {len(document_ids)} documents.")
+
+
+@click.command('purge-uploads')
+@click.option('--hours', default=24, type=int, help='Age after which unfinished uploads are removed.')
+@with_appcontext
+def purge_uploads_command(hours):
+    """Delete resumable document uploads that were never finished."""
+    import datetime as dt
+    from backend.db import db
+    from backend.models import DocumentUpload
+    from backend.storage import document_store
+
+    cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(hours=hours)
+    uploads = DocumentUpload.query.filter(DocumentUpload.completed_at == None, DocumentUpload.created_at < cutoff).all()
+    for upload in uploads:
+        document_store.discard(upload.id)
+        db.session.delete(upload)
+    db.session.commit()
+    click.echo(f"Removed {len(uploads)} unfinished uploads.")
+
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(rebuild_rating_stats_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(migrate_professional_services_command)
+    app.cli.add_command(dispatch_pending_command)
+    app.cli.add_command(process_documents_command)
+    app.cli.add_command(purge_uploads_command)
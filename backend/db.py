@@ -1,5 +1,87 @@
 # backend/db.py
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from backend.routing import RoutingSession
 
-# Initialize the db object
-db = SQLAlchemy()
\ No newline at end of file
+# Initialize the db object; sessions route read-only resources to the replica bind when one is configured
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# Alembic migrations in migrations/ (flask db upgrade); batch mode lets SQLite alter tables
+migrate = Migrate(render_as_batch=True)
+
+# Schema that db.create_all() produced before migrations were introduced
+BASELINE_REVISION = '0001_initial_schema'
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA name = value`` for each of ``pragmas`` on every new connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute('PRAGMA {} = {}'.format(name, value))
+        finally:
+            cursor.close()
+
+
+def init_engine_options(app):
+    # Pooled connections are opened lazily, so the pragmas reach every one of them
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
+
+
+def normalize_service_names():
+    """Lower-case service names, as uq_service_name and the service lookups expect.
+
+    Raises ValueError, changing nothing, when names differ only in case or
+    surrounding spaces; those services have to be renamed or merged by hand.
+    """
+    duplicates = db.session.execute(text(
+        "SELECT lower(trim(name)) FROM service GROUP BY lower(trim(name)) HAVING count(*) > 1 ORDER BY 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise ValueError("Service names must be unique ignoring case; rename or merge the services named {} "
+                         "and run init-db again.".format(', '.join(repr(name) for name in duplicates)))
+    db.session.execute(text("UPDATE service SET name = lower(trim(name)) WHERE name != lower(trim(name))"))
+    db.session.commit()
+
+
+def upgrade_database():
+    """Apply pending migrations to the primary database.
+
+    Databases created with db.create_all() have no alembic_version table;
+    they get any tables and indexes they are missing and are stamped at the
+    baseline, so only the later migrations run. Service names are lower-cased
+    first so uq_service_name can be built, and tables derived from existing
+    rows, the search index and rating stats, are filled before the stamp.
+    """
+    from flask_migrate import stamp, upgrade
+    from backend.ratings import rebuild_rating_stats
+    from backend.search import rebuild_search_index
+
+    inspector = inspect(db.engine)
+    tables = inspector.get_table_names()
+    if 'user' in tables and 'alembic_version' not in tables:
+        if 'service' in tables:
+            normalize_service_names()
+        db.create_all()
+        # create_all() skips tables that exist, so indexes added to the models since are created here.
+        # Indexes on columns a later migration adds are left to that migration.
+        for table in db.metadata.sorted_tables:
+            if table.name in tables:
+                columns = {column['name'] for column in inspector.get_columns(table.name)}
+                for index in table.indexes:
+                    if {column.name for column in index.columns} <= columns:
+                        index.create(db.engine, checkfirst=True)
+        # Baseline tables create_all() just made are empty; triggers and ORM events only cover rows written from now on
+        if 'search_index' in inspect(db.engine).get_table_names():
+            rebuild_search_index()
+        rebuild_rating_stats()
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
@@ -0,0 +1,305 @@
+# backend/dispatch.py
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import event, func, update, bindparam
+from sqlalchemy.orm import Session
+from backend.db import db
+from backend.events import event_broker, booking_event
+from backend.models import (Professional, ProfessionalRatingStats, ServiceRequest, Customer, CustomerReview, professional_services,
+                            service_request_rejections)
+
+# Status of a booking nobody has been assigned to yet, and statuses that count towards a professional's load
+PENDING_STATUS = 'requested'
+ASSIGNED_STATUS = 'assigned'
+ACCEPTED_STATUS = 'accepted'
+IN_PROGRESS_STATUS = 'in_progress'
+COMPLETED_STATUS = 'completed'
+OPEN_STATUSES = (ASSIGNED_STATUS, ACCEPTED_STATUS, IN_PROGRESS_STATUS)
+
+# Used for ranking professionals who have no reviews yet
+DEFAULT_RATING = 3.0
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class DispatchIndex:
+    """In-memory lookup tables of approved professionals.
+
+    ``by_service`` maps a service id and ``by_prefix`` maps every pincode prefix
+    ('5', '56', ..., '560001') to professional ids, so candidates near a customer
+    are a set intersection rather than a query.
+    """
+
+    def __init__(self):
+        self.professionals = {}  # id -> {"pincode", "services", "rating", "load"}
+        self.by_service = defaultdict(set)
+        self.by_prefix = defaultdict(set)
+
+    def add(self, professional_id, pincode, service_ids, rating, load):
+        self.remove(professional_id)
+        pincode = pincode or ''
+        self.professionals[professional_id] = {
+            "pincode": pincode,
+            "services": set(service_ids),
+            "rating": rating if rating is not None else DEFAULT_RATING,
+            "load": load
+        }
+        for service_id in service_ids:
+            self.by_service[service_id].add(professional_id)
+        for length in range(len(pincode) + 1):
+            self.by_prefix[pincode[:length]].add(professional_id)
+
+    def remove(self, professional_id):
+        entry = self.professionals.pop(professional_id, None)
+        if entry is None:
+            return
+        for service_id in entry["services"]:
+            self.by_service[service_id].discard(professional_id)
+        for length in range(len(entry["pincode"]) + 1):
+            self.by_prefix[entry["pincode"][:length]].discard(professional_id)
+
+
+class Dispatcher:
+    """Assigns pending service requests to the best available professional.
+
+    Candidates must be approved and offer the requested service. The closest
+    pincode prefix wins, then the lowest number of open requests, then the
+    highest average rating.
+    """
+
+    def __init__(self):
+        self.index = DispatchIndex()
+        self.max_open_requests = 5
+        self.rebuild_interval = 300
+        self.batch_size = 500
+        self.built_at = None
+        self._stale = set()
+        self._lock = threading.RLock()
+        self._latencies = deque(maxlen=10000)
+        self.decisions = 0
+        self.assigned = 0
+        self.unassigned = 0
+        self.batches = 0
+
+    def init_app(self, app):
+        self.max_open_requests = app.config.get('DISPATCH_MAX_OPEN_REQUESTS', 5)
+        self.rebuild_interval = app.config.get('DISPATCH_INDEX_REBUILD_INTERVAL', 300)
+        self.batch_size = app.config.get('DISPATCH_BATCH_SIZE', 500)
+        self.built_at = None
+
+    ### ------------------------------- index maintenance -----------------------------###
+
+    def _load_professionals(self, professional_ids=None):
+        professionals = db.session.query(Professional.id, Professional.pincode, ProfessionalRatingStats.average_rating)\
+            .outerjoin(ProfessionalRatingStats, ProfessionalRatingStats.professional_id == Professional.id)\
+            .filter(Professional.is_approved == True)
+        services = db.session.query(professional_services.c.professional_id, professional_services.c.service_id)
+        loads = db.session.query(ServiceRequest.professional_id, func.count(ServiceRequest.id))\
+            .filter(ServiceRequest.service_status.in_(OPEN_STATUSES))\
+            .group_by(ServiceRequest.professional_id)
+
+        if professional_ids is not None:
+            professionals = professionals.filter(Professional.id.in_(professional_ids))
+            services = services.filter(professional_services.c.professional_id.in_(professional_ids))
+            loads = loads.filter(ServiceRequest.professional_id.in_(professional_ids))
+        else:
+            loads = loads.filter(ServiceRequest.professional_id != None)
+
+        services_by_professional = defaultdict(list)
+        for professional_id, service_id in services:
+            services_by_professional[professional_id].append(service_id)
+        load_by_professional = dict(loads.all())
+
+        return [
+            (professional_id, pincode, services_by_professional[professional_id], rating,
+             load_by_professional.get(professional_id, 0))
+            for professional_id, pincode, rating in professionals
+        ]
+
+    def rebuild(self):
+        # Full rebuild: three queries regardless of the number of professionals
+        index = DispatchIndex()
+        for row in self._load_professionals():
+            index.add(*row)
+        with self._lock:
+            self.index = index
+            self._stale.clear()
+            self.built_at = time.monotonic()
+
+    def mark_stale(self, professional_ids):
+        with self._lock:
+            self._stale.update(professional_ids)
+
+    def _refresh(self):
+        with self._lock:
+            if self.built_at is None or time.monotonic() - self.built_at > self.rebuild_interval:
+                needs_rebuild, stale = True, None
+            else:
+                needs_rebuild, stale = False, list(self._stale)
+                self._stale.clear()
+        if needs_rebuild:
+            self.rebuild()
+            return
+        if stale:
+            # Incremental refresh of just the professionals that changed
+            rows = self._load_professionals(stale)
+            with self._lock:
+                for professional_id in stale:
+                    self.index.remove(professional_id)
+                for row in rows:
+                    self.index.add(*row)
+
+    ### ------------------------------- ranking and assignment -----------------------------###
+
+    def choose(self, service_id, pincode, excluded=frozenset()):
+        """Return the best professional id for a request, or None if nobody is available.
+
+        Professionals in ``excluded``, such as those who rejected the request, are never chosen.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            offering = self.index.by_service.get(service_id, set())
+            choice = None
+            pincode = pincode or ''
+            # Widen the search one pincode digit at a time, from an exact match to anywhere
+            for length in range(len(pincode), -1, -1):
+                candidates = (offering & self.index.by_prefix.get(pincode[:length], set())) - excluded
+                available = [
+                    professional_id for professional_id in candidates
+                    if self.index.professionals[professional_id]["load"] < self.max_open_requests
+                ]
+                if available:
+                    choice = min(available, key=lambda professional_id: (
+                        self.index.professionals[professional_id]["load"],
+                        -self.index.professionals[professional_id]["rating"],
+                        professional_id
+                    ))
+                    self.index.professionals[choice]["load"] += 1
+                    break
+            self._latencies.append(time.perf_counter() - started)
+            self.decisions += 1
+        return choice
+
+    def release(self, professional_id):
+        # Give back the load choose() added for an assignment that did not happen
+        with self._lock:
+            entry = self.index.professionals.get(professional_id)
+            if entry is not None and entry["load"] > 0:
+                entry["load"] -= 1
+
+    def dispatch(self, request_ids=None, limit=None):
+        """Assign pending requests (all, or just ``request_ids``) in one transaction.
+
+        Returns a dict with the assigned (request_id, professional_id) pairs and the
+        ids of requests no professional could take.
+        """
+        self._refresh()
+
+        pending = db.session.query(ServiceRequest.id, ServiceRequest.service_id, Customer.pincode, ServiceRequest.customer_id)\
+            .join(Customer, Customer.id == ServiceRequest.customer_id)\
+            .filter(ServiceRequest.professional_id == None, ServiceRequest.service_status == PENDING_STATUS)
+        if request_ids is not None:
+            pending = pending.filter(ServiceRequest.id.in_(request_ids))
+        pending = pending.order_by(ServiceRequest.date_of_request, ServiceRequest.id)\
+            .limit(limit or self.batch_size)\
+            .all()
+
+        rejected = defaultdict(set)
+        if pending:
+            rejections = db.session.query(service_request_rejections.c.service_request_id,
+                                          service_request_rejections.c.professional_id)\
+                .filter(service_request_rejections.c.service_request_id.in_([row[0] for row in pending]))
+            for request_id, professional_id in rejections:
+                rejected[request_id].add(professional_id)
+
+        assignments = []
+        unassigned = []
+        customers = {}
+        for request_id, service_id, pincode, customer_id in pending:
+            professional_id = self.choose(service_id, pincode, rejected.get(request_id, frozenset()))
+            if professional_id is None:
+                unassigned.append(request_id)
+            else:
+                assignments.append({"request_id": request_id, "professional_id": professional_id})
+                customers[request_id] = customer_id
+
+        if assignments:
+            # The guards skip requests claimed, cancelled or closed since the SELECT; RETURNING says which were
+            table = ServiceRequest.__table__
+            claim = update(table)\
+                .where(table.c.id == bindparam('request_id'))\
+                .where(table.c.professional_id == None, table.c.service_status == PENDING_STATUS)\
+                .values(professional_id=bindparam('professional_id'), service_status=ASSIGNED_STATUS)\
+                .returning(table.c.id)
+            claimed = []
+            for assignment in assignments:
+                if db.session.execute(claim, assignment).scalar() is None:
+                    self.release(assignment["professional_id"])
+                else:
+                    claimed.append(assignment)
+            assignments = claimed
+        db.session.commit()
+
+        # The bulk UPDATE bypasses the session hooks that publish booking events
+        event_broker.publish([
+            booking_event(a["request_id"], customers[a["request_id"]], a["professional_id"], ASSIGNED_STATUS)
+            for a in assignments
+        ])
+
+        with self._lock:
+            self.batches += 1
+            self.assigned += len(assignments)
+            self.unassigned += len(unassigned)
+
+        return {
+            "assigned": [(a["request_id"], a["professional_id"]) for a in assignments],
+            "unassigned": unassigned
+        }
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "professionals_indexed": len(self.index.professionals),
+                "decisions": self.decisions,
+                "assigned": self.assigned,
+                "unassigned": self.unassigned,
+                "batches": self.batches,
+            }
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            value = percentile(latencies, fraction)
+            stats["decision_latency_{}_us".format(name)] = round(value * 1e6, 2) if value is not None else None
+        return stats
+
+
+dispatcher = Dispatcher()
+
+
+### ------------------------------- change tracking -----------------------------###
+
+@event.listens_for(Session, 'after_flush')
+def _collect_dispatch_changes(session, flush_context):
+    changed = session.info.setdefault('dispatch_stale_ids', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Professional):
+            changed.add(obj.id)
+        elif isinstance(obj, (ServiceRequest, CustomerReview)) and obj.professional_id is not None:
+            changed.add(obj.professional_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_dispatch_changes(session):
+    changed = session.info.pop('dispatch_stale_ids', None)
+    if changed:
+        dispatcher.mark_stale(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dispatch_changes(session):
+    session.info.pop('dispatch_stale_ids', None)
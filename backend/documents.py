@@ -0,0 +1,96 @@
+# backend/documents.py
+import hashlib
+import re
+import zlib
+
+CHUNK_SIZE = 1024 * 1024
+
+# Enough text for an admin to recognise a document at a glance
+TEXT_EXCERPT_LENGTH = 2000
+
+# PDFs larger than this are checksummed but not inspected
+PDF_INSPECT_LIMIT = 25 * 1024 * 1024
+
+# Total bytes inflated from one PDF's streams; a few KB of Flate data can expand to gigabytes
+PDF_DECOMPRESSED_LIMIT = 64 * 1024 * 1024
+
+_STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.S)
+_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+_TEXT_RE = re.compile(rb'\(((?:\\.|[^\\)])*)\)\s*(?:Tj|\'|")|\[((?:\\.|[^\\\]])*)\]\s*TJ', re.S)
+_STRING_RE = re.compile(rb'\(((?:\\.|[^\\)])*)\)', re.S)
+_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f', b'(': b'(', b')': b')', b'\\': b'\\'}
+
+
+class DocumentTooLarge(ValueError):
+    """A PDF's compressed streams inflate to more than the configured limit."""
+
+
+def file_checksum(path):
+    # SHA-256 of the file, read in chunks so large uploads are never held in memory
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_pdf(path):
+    with open(path, 'rb') as f:
+        return f.read(5) == b'%PDF-'
+
+
+def _unescape(raw):
+    return re.sub(rb'\\([nrtbf()\\]|[0-7]{1,3})', lambda m: _ESCAPES.get(m.group(1)) or bytes([int(m.group(1), 8) & 0xFF]), raw)
+
+
+def _streams(data, max_decompressed):
+    # Yields (content, decompressed); page dictionaries and page text are usually Flate-compressed
+    remaining = max_decompressed
+    for match in _STREAM_RE.finditer(data):
+        try:
+            # One byte over the budget is enough to know the stream does not fit
+            content = zlib.decompressobj().decompress(match.group(1), remaining + 1)
+        except zlib.error:
+            yield match.group(1), False
+            continue
+        if len(content) > remaining:
+            raise DocumentTooLarge("PDF streams inflate to more than {} bytes.".format(max_decompressed))
+        remaining -= len(content)
+        yield content, True
+
+
+def _stream_text(stream):
+    for single, array in _TEXT_RE.findall(stream):
+        # A TJ array is one run of text split up for kerning
+        raw = single if single else b''.join(_STRING_RE.findall(array))
+        text = _unescape(raw).decode('latin-1').strip()
+        if text:
+            yield text
+
+
+def extract_pdf_info(path, max_decompressed=PDF_DECOMPRESSED_LIMIT):
+    """Return (page count, text excerpt) for a PDF without a PDF library.
+
+    Handles the common case of text drawn with Tj/TJ operators in
+    Flate-compressed content streams; anything else yields no text. Raises
+    DocumentTooLarge when the streams inflate to more than ``max_decompressed`` bytes.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(PDF_INSPECT_LIMIT)
+
+    # Uncompressed page dictionaries are visible in the raw bytes, the rest sit in object streams
+    page_count = len(_PAGE_RE.findall(data))
+    pieces = []
+    length = 0
+    for stream, decompressed in _streams(data, max_decompressed):
+        if not decompressed:
+            continue
+        page_count += len(_PAGE_RE.findall(stream))
+        # Only content streams with text objects; scanning image data is slow and yields noise
+        if length < TEXT_EXCERPT_LENGTH and b'BT' in stream:
+            for text in _stream_text(stream):
+                pieces.append(text)
+                length += len(text) + 1
+
+    excerpt = ' '.join(pieces)[:TEXT_EXCERPT_LENGTH]
+    return page_count or None, excerpt or None
@@ -0,0 +1,343 @@
+# backend/events.py
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from backend.models import ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+
+def booking_event(request_id, customer_id, professional_id, status, previous_professional_id=None):
+    """A booking status change, addressed to its customer, its professionals and the admins."""
+    topics = ['admin', 'customer:{}'.format(customer_id)]
+    for pid in sorted({professional_id, previous_professional_id} - {None}):
+        topics.append('professional:{}'.format(pid))
+    return {
+        "type": "booking",
+        "topics": topics,
+        "data": {"request_id": request_id, "status": status, "professional_id": professional_id}
+    }
+
+
+def event_key(event_id):
+    # Ids are "<milliseconds>-<sequence>", the format of Redis stream entry ids, so they sort the same way
+    try:
+        ms, sequence = event_id.split('-')
+        return int(ms), int(sequence)
+    except (AttributeError, ValueError):
+        return None
+
+
+def format_event(event_id, event_type, data):
+    return 'id: {}\nevent: {}\ndata: {}\n\n'.format(event_id, event_type, json.dumps(data))
+
+
+class Subscription:
+    """One stream connection: the topics it follows and a bounded buffer of undelivered events."""
+
+    def __init__(self, topics, maxsize):
+        self.topics = frozenset(topics)
+        self.maxsize = maxsize
+        self.overflowed = False
+        self.closed = False
+        self._events = deque()
+        self._ready = threading.Condition()
+
+    def put(self, event):
+        with self._ready:
+            if len(self._events) >= self.maxsize:
+                # The client is not keeping up; drop its backlog and make it resync instead
+                self.overflowed = True
+                self._events.clear()
+            elif not self.overflowed:
+                self._events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """Return and clear the buffered events, waiting up to ``timeout`` seconds for one."""
+        with self._ready:
+            if not self._events and not self.overflowed:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def reset(self):
+        with self._ready:
+            self.overflowed = False
+            self._events.clear()
+
+
+### ------------------------------- backends -----------------------------###
+
+class LocalEventBackend:
+    """In-process backend: events reach this process's subscribers only; the last ``history_size`` are kept for replay."""
+
+    def __init__(self, history_size=1000):
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._deliver = None
+        self._last_ms, self._sequence = 0, 0
+        # Replay can only answer for ids at or after this one
+        self._oldest = (int(time.time() * 1000), 0)
+
+    def start(self, deliver):
+        # Publishing delivers to this process's subscribers directly
+        self._deliver = deliver
+
+    def _next_id(self):
+        now = int(time.time() * 1000)
+        if now > self._last_ms:
+            self._last_ms, self._sequence = now, 0
+        else:
+            self._sequence += 1
+        return '{}-{}'.format(self._last_ms, self._sequence)
+
+    def publish(self, events):
+        published = []
+        with self._lock:
+            for event in events:
+                event = dict(event, id=self._next_id())
+                if len(self._history) == self._history.maxlen:
+                    self._oldest = event_key(self._history[0]["id"])
+                self._history.append(event)
+                published.append(event)
+        if self._deliver:
+            for event in published:
+                self._deliver(event)
+
+    def replay(self, after_id):
+        """Events after ``after_id``, or None when some of them are no longer kept."""
+        after = event_key(after_id)
+        with self._lock:
+            if after is None or after < self._oldest:
+                return None
+            return [event for event in self._history if event_key(event["id"]) > after]
+
+    def last_id(self):
+        with self._lock:
+            return self._history[-1]["id"] if self._history else '{}-{}'.format(*self._oldest)
+
+
+class RedisEventBackend:
+    """Shared backend: events go through one Redis stream, read by a listener thread in every app process."""
+
+    def __init__(self, client, history_size=1000, stream='mad2:events:bookings'):
+        self.client = client
+        self.history_size = history_size
+        self.stream = stream
+        self._listener = None
+        self._last_id = '0-0'
+        self._lock = threading.Lock()
+
+    def start(self, deliver):
+        with self._lock:
+            if self._listener is None:
+                self._last_id = self.last_id()
+                self._listener = threading.Thread(target=self._listen, args=(deliver,), name='event-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self, deliver):
+        while True:
+            try:
+                for _, entries in self.client.xread({self.stream: self._last_id}, block=5000, count=500) or ():
+                    for entry_id, fields in entries:
+                        self._last_id = entry_id
+                        deliver(dict(json.loads(fields['event']), id=entry_id))
+            except Exception as e:
+                logger.warning("Event listener lost Redis (%s); retrying.", e)
+                time.sleep(1)
+
+    def publish(self, events):
+        pipe = self.client.pipeline()
+        for event in events:
+            pipe.xadd(self.stream, {'event': json.dumps(event)}, maxlen=self.history_size, approximate=True)
+        pipe.execute()
+
+    def replay(self, after_id):
+        after = event_key(after_id)
+        first = self.client.xrange(self.stream, '-', '+', count=1)
+        if after is None or (first and after < event_key(first[0][0])):
+            return None
+        return [dict(json.loads(fields['event']), id=entry_id)
+                for entry_id, fields in self.client.xrange(self.stream, '({}'.format(after_id), '+')]
+
+    def last_id(self):
+        last = self.client.xrevrange(self.stream, '+', '-', count=1)
+        return last[0][0] if last else '0-0'
+
+
+### ------------------------------- broker -----------------------------###
+
+class EventBroker:
+    """Fans booking events out to the open stream connections whose topics they are addressed to.
+
+    Events are published after the transaction that caused them commits. A
+    client resuming with ``Last-Event-ID`` gets what it missed from the
+    backend's history, or a ``reset`` event telling it to refetch when that
+    history no longer goes back far enough. A connection whose buffer fills
+    up gets a ``reset`` too, rather than holding an unbounded backlog.
+    """
+
+    def __init__(self):
+        self.backend = LocalEventBackend()
+        self.buffer_size = 100
+        self.heartbeat = 15
+        self.max_stream_seconds = 300
+        self.max_connections = 1000
+        self._by_topic = defaultdict(set)
+        self._lock = threading.Lock()
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.resets = 0
+
+    def init_app(self, app, backend=None):
+        self.buffer_size = app.config.get('EVENTS_BUFFER_SIZE', 100)
+        self.heartbeat = app.config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+        self.max_stream_seconds = app.config.get('EVENTS_MAX_STREAM_SECONDS', 300)
+        self.max_connections = app.config.get('EVENTS_MAX_CONNECTIONS', 1000)
+        self.backend = backend or self._backend_from_config(app)
+
+    def _backend_from_config(self, app):
+        history_size = app.config.get('EVENTS_HISTORY_SIZE', 1000)
+        url = app.config.get('EVENTS_STORAGE_URL')
+        if url:
+            try:
+                import redis
+
+                client = redis.Redis.from_url(url, socket_connect_timeout=1, decode_responses=True)
+                client.ping()
+                return RedisEventBackend(client, history_size=history_size)
+            except Exception as e:
+                app.logger.warning("Redis event backend unavailable (%s); streaming events within this process only.", e)
+        return LocalEventBackend(history_size=history_size)
+
+    def publish(self, events):
+        if not events:
+            return
+        try:
+            self.backend.publish(events)
+        except Exception as e:
+            # Streams are a convenience on top of the lists; never fail the request over them
+            logger.warning("Could not publish %d events: %s", len(events), e)
+            return
+        with self._lock:
+            self.published += len(events)
+
+    def _deliver(self, event):
+        with self._lock:
+            subscriptions = set()
+            for topic in event["topics"]:
+                subscriptions |= self._by_topic.get(topic, set())
+            self.delivered += len(subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, topics):
+        """Register a connection following ``topics``; None when this process has no room for another."""
+        # Started on the first subscription, so only processes serving streams run a Redis listener
+        self.backend.start(self._deliver)
+        subscription = Subscription(topics, self.buffer_size)
+        with self._lock:
+            if self.subscribers >= self.max_connections:
+                return None
+            for topic in subscription.topics:
+                self._by_topic[topic].add(subscription)
+            self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            for topic in subscription.topics:
+                subscribers = self._by_topic.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_topic[topic]
+            self.subscribers -= 1
+
+    def stream(self, subscription, last_event_id=None):
+        """Yield the Server-Sent Events text for ``subscription`` until it times out.
+
+        The caller unsubscribes when the response closes, including when the client leaves.
+        """
+        last = None
+        yield 'retry: 3000\n\n'
+        if last_event_id:
+            replayed = self.backend.replay(last_event_id)
+            if replayed is None:
+                yield self._reset()
+            else:
+                for event in replayed:
+                    if subscription.topics.intersection(event["topics"]):
+                        yield format_event(event["id"], event["type"], event["data"])
+                last = event_key(replayed[-1]["id"]) if replayed else event_key(last_event_id)
+
+        deadline = time.monotonic() + self.max_stream_seconds
+        while time.monotonic() < deadline:
+            events = subscription.get(timeout=self.heartbeat)
+            if subscription.overflowed:
+                subscription.reset()
+                yield self._reset()
+                continue
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                # Skip anything the replay already sent
+                if last is not None and event_key(event["id"]) <= last:
+                    continue
+                yield format_event(event["id"], event["type"], event["data"])
+        # Closing makes the browser reconnect with Last-Event-ID, freeing this worker thread in between
+
+    def _reset(self):
+        with self._lock:
+            self.resets += 1
+        return format_event(self.backend.last_id(), 'reset', {})
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "subscribers": self.subscribers,
+                "published": self.published,
+                "delivered": self.delivered,
+                "resets": self.resets
+            }
+
+
+event_broker = EventBroker()
+
+
+### ------------------------------- change tracking -----------------------------###
+
+@event.listens_for(Session, 'after_flush')
+def _collect_booking_events(session, flush_context):
+    events = session.info.setdefault('booking_events', [])
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, ServiceRequest):
+            continue
+        state = inspect(obj)
+        status = state.attrs.service_status.history
+        professional = state.attrs.professional_id.history
+        if obj in session.new or status.has_changes() or professional.has_changes():
+            previous = professional.deleted[0] if professional.deleted else None
+            events.append(booking_event(obj.id, obj.customer_id, obj.professional_id, obj.service_status, previous))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_booking_events(session):
+    event_broker.publish(session.info.pop('booking_events', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_booking_events(session):
+    session.info.pop('booking_events', None)
@@ -0,0 +1,91 @@
+# backend/export.py
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select
+from backend.db import db
+from backend.models import ServiceRequest, Customer, Professional, Service, CustomerReview
+
+EXPORT_BATCH_SIZE = 1000
+
+# Exportable entities: the model, the date column used by from/to filters (if any)
+# and the columns written for each row
+EXPORT_ENTITIES = {
+    "service_requests": (ServiceRequest, ServiceRequest.date_of_request, [
+        ServiceRequest.id, ServiceRequest.service_id, ServiceRequest.customer_id, ServiceRequest.professional_id,
+        ServiceRequest.date_of_request, ServiceRequest.date_of_completion, ServiceRequest.service_status,
+        ServiceRequest.remarks, ServiceRequest.created_at, ServiceRequest.updated_at
+    ]),
+    "customers": (Customer, None, [
+        Customer.id, Customer.user_id, Customer.fullname, Customer.address, Customer.pincode, Customer.is_active
+    ]),
+    "professionals": (Professional, None, [
+        Professional.id, Professional.user_id, Professional.fullname, Professional.available_services,
+        Professional.experience, Professional.documents, Professional.address, Professional.pincode,
+        Professional.is_approved
+    ]),
+    "services": (Service, Service.created_at, [
+        Service.id, Service.name, Service.description, Service.price, Service.time_required,
+        Service.created_at, Service.is_approved
+    ]),
+    "reviews": (CustomerReview, CustomerReview.review_date, [
+        CustomerReview.id, CustomerReview.customer_id, CustomerReview.professional_id,
+        CustomerReview.review_text, CustomerReview.rating, CustomerReview.review_date
+    ]),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def build_export_query(entity, date_from=None, date_to=None):
+    model, date_column, columns = EXPORT_ENTITIES[entity]
+    statement = select(*columns)
+    if date_from or date_to:
+        if date_column is None:
+            raise ValueError("Date filters are not supported for {}.".format(entity))
+        # Date order, so the range is read from the date index without a sort
+        statement = statement.order_by(date_column, model.id)
+        if date_from:
+            statement = statement.where(date_column >= date_from)
+        if date_to:
+            statement = statement.where(date_column < date_to)
+    else:
+        statement = statement.order_by(model.id)
+    return statement, [column.key for column in columns]
+
+
+def _stream_rows(statement):
+    # yield_per streams rows from a server-side cursor instead of buffering the whole result
+    result = db.session.execute(statement, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+    for batch in result.partitions():
+        yield batch
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def generate_ndjson(statement, fields):
+    for batch in _stream_rows(statement):
+        yield ''.join(
+            json.dumps({field: _json_value(value) for field, value in zip(fields, row)}) + '\n'
+            for row in batch
+        )
+
+
+def generate_csv(statement, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in _stream_rows(statement):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,87 @@
+# backend/matching.py
+from sqlalchemy import select
+from backend.db import db
+from backend.models import Professional, Service, professional_services
+
+
+def parse_service_names(values):
+    # Accepts ['plumbing', 'electrical'] as well as the legacy comma-joined 'Plumbing, Electrical'
+    names = []
+    for value in values or []:
+        for name in (value or '').split(','):
+            name = name.strip().lower()
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def services_by_name(names):
+    # Service names are stored lower-cased by AdminAddServiceAPI
+    if not names:
+        return []
+    return Service.query.filter(Service.name.in_(names)).all()
+
+
+def professionals_offering(service_id, pincode=None, approved_only=True):
+    """Query for professionals offering ``service_id``, optionally in one pincode.
+
+    Starts from the (service_id, professional_id) index on professional_service
+    and fetches each matching professional by primary key.
+    """
+    query = Professional.query\
+        .join(professional_services, professional_services.c.professional_id == Professional.id)\
+        .filter(professional_services.c.service_id == service_id)
+    if pincode:
+        query = query.filter(Professional.pincode == pincode)
+    if approved_only:
+        query = query.filter(Professional.is_approved == True)
+    return query
+
+
+def offering_any_service(service_ids):
+    # Correlated EXISTS for use as a filter on a Professional query
+    return select(professional_services.c.professional_id)\
+        .where(professional_services.c.professional_id == Professional.id)\
+        .where(professional_services.c.service_id.in_(service_ids))\
+        .exists()
+
+
+def link_available_services(connection):
+    """Insert the professional_service rows named by the legacy comma-joined available_services column.
+
+    Migration 0006 keeps its own copy of this backfill, so changes here do
+    not alter what it did. Returns (links created, names that matched no service).
+    """
+    services, professionals = Service.__table__, Professional.__table__
+    service_ids = {name.strip().lower(): service_id
+                   for service_id, name in connection.execute(select(services.c.id, services.c.name))}
+    existing = set(connection.execute(
+        select(professional_services.c.professional_id, professional_services.c.service_id)
+    ).all())
+
+    links = []
+    unmatched = set()
+    rows = connection.execute(
+        select(professionals.c.id, professionals.c.available_services)
+        .where(professionals.c.available_services != None)
+        .execution_options(yield_per=1000)
+    )
+    for professional_id, available_services in rows:
+        for name in parse_service_names([available_services]):
+            service_id = service_ids.get(name)
+            if service_id is None:
+                unmatched.add(name)
+            elif (professional_id, service_id) not in existing:
+                existing.add((professional_id, service_id))
+                links.append({"professional_id": professional_id, "service_id": service_id})
+
+    if links:
+        connection.execute(professional_services.insert(), links)
+    return len(links), sorted(unmatched)
+
+
+def migrate_available_services():
+    """Re-run the professional_service backfill, e.g. after adding services that legacy names refer to."""
+    result = link_available_services(db.session.connection())
+    db.session.commit()
+    return result
@@ -0,0 +1,239 @@
+# backend/metrics.py
+import bisect
+import hmac
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('backend.metrics.slow_query')
+
+# Seconds; Prometheus' default histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement):
+    """Collapse a SQL statement to its shape: literals become ?, IN lists (?, ...), whitespace one space."""
+    statement = _STRING_RE.sub('?', statement)
+    statement = _NUMBER_RE.sub('?', statement)
+    statement = _IN_LIST_RE.sub('(?, ...)', statement)
+    return _SPACE_RE.sub(' ', statement).strip()
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for name, value in labels.items())
+
+
+class RequestMetrics:
+    """Per-endpoint request latency, SQL statement counts and database time.
+
+    Requests are timed from before_request to after_request and keyed by URL
+    rule, so label values are bounded by the routes the app registers.
+    Statements are timed with cursor events and charged to the request running
+    on the same thread; one slower than ``SLOW_QUERY_SECONDS`` is logged in
+    normalized form. Recording is a few counter updates under one lock.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.token = None
+        self.buckets = DEFAULT_BUCKETS
+        self.slow_query_seconds = 0.5
+        self._current = threading.local()
+        self._lock = threading.Lock()
+        self._endpoints = {}  # (endpoint, method) -> [bucket counts, seconds, requests, queries, db seconds]
+        self._statuses = {}  # (endpoint, method, status) -> requests
+        self._slow_queries = {}  # endpoint -> slow statements
+        self._collectors = []
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', False)
+        self.token = app.config.get('METRICS_TOKEN')
+        self.buckets = tuple(sorted(app.config.get('METRICS_LATENCY_BUCKETS', DEFAULT_BUCKETS)))
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_SECONDS', 0.5)
+        self.reset()
+        self._collectors = [component_metrics]
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.view)
+        if not self.token:
+            logger.warning("Metrics are served without authentication; set METRICS_TOKEN or bind the app to an internal address.")
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._statuses.clear()
+            self._slow_queries.clear()
+
+    def add_collector(self, collector):
+        """Register a callable returning extra ``(name, type, help, [(labels dict, value)])`` metrics."""
+        self._collectors.append(collector)
+
+    ### ------------------------------- recording -----------------------------###
+
+    def _start_request(self):
+        # [started, statements, database seconds]
+        self._current.request = [time.perf_counter(), 0, 0.0]
+
+    def _finish_request(self, response):
+        self._record(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        # Only still set when after_request never ran, i.e. the view raised
+        if getattr(self._current, 'request', None) is not None:
+            self._record(500)
+
+    def _record(self, status):
+        current = getattr(self._current, 'request', None)
+        if current is None:
+            return
+        self._current.request = None
+        started, statements, db_seconds = current
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        key = (endpoint, request.method)
+        bucket = bisect.bisect_left(self.buckets, elapsed)
+        with self._lock:
+            entry = self._endpoints.get(key)
+            if entry is None:
+                entry = self._endpoints[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0, 0.0]
+            entry[0][bucket] += 1
+            entry[1] += elapsed
+            entry[2] += 1
+            entry[3] += statements
+            entry[4] += db_seconds
+            status_key = (endpoint, request.method, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def query_finished(self, statement, elapsed):
+        current = getattr(self._current, 'request', None)
+        if current is not None:
+            current[1] += 1
+            current[2] += elapsed
+        if elapsed >= self.slow_query_seconds:
+            endpoint = request.url_rule.rule if current is not None and request.url_rule else None
+            slow_query_logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000,
+                                      endpoint or 'background', normalize_statement(statement))
+            with self._lock:
+                self._slow_queries[endpoint or 'background'] = self._slow_queries.get(endpoint or 'background', 0) + 1
+
+    ### ------------------------------- exposition -----------------------------###
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = {key: (list(entry[0]),) + tuple(entry[1:]) for key, entry in self._endpoints.items()}
+            statuses = dict(self._statuses)
+            slow_queries = dict(self._slow_queries)
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), (buckets, seconds, count, _, _) in sorted(endpoints.items()):
+            cumulative = 0
+            for bound, observations in zip(self.buckets + ('+Inf',), buckets):
+                cumulative += observations
+                lines.append('http_request_duration_seconds_bucket{{{}}} {}'.format(
+                    _labels(endpoint=endpoint, method=method, le=bound), cumulative))
+            lines.append('http_request_duration_seconds_sum{{{}}} {}'.format(_labels(endpoint=endpoint, method=method), seconds))
+            lines.append('http_request_duration_seconds_count{{{}}} {}'.format(_labels(endpoint=endpoint, method=method), count))
+
+        lines += ['# HELP http_requests_total Requests by endpoint and status.', '# TYPE http_requests_total counter']
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append('http_requests_total{{{}}} {}'.format(_labels(endpoint=endpoint, method=method, status=status), count))
+
+        lines += ['# HELP http_request_db_queries_total SQL statements run by requests to an endpoint.',
+                  '# TYPE http_request_db_queries_total counter']
+        for (endpoint, method), (_, _, _, queries, _) in sorted(endpoints.items()):
+            lines.append('http_request_db_queries_total{{{}}} {}'.format(_labels(endpoint=endpoint, method=method), queries))
+
+        lines += ['# HELP http_request_db_seconds_total Time requests to an endpoint spent running SQL.',
+                  '# TYPE http_request_db_seconds_total counter']
+        for (endpoint, method), (_, _, _, _, db_seconds) in sorted(endpoints.items()):
+            lines.append('http_request_db_seconds_total{{{}}} {}'.format(_labels(endpoint=endpoint, method=method), db_seconds))
+
+        lines += ['# HELP db_slow_queries_total Statements slower than SLOW_QUERY_SECONDS.',
+                  '# TYPE db_slow_queries_total counter']
+        for endpoint, count in sorted(slow_queries.items()):
+            lines.append('db_slow_queries_total{{{}}} {}'.format(_labels(endpoint=endpoint), count))
+
+        for collector in self._collectors:
+            try:
+                for name, metric_type, help_text, samples in collector():
+                    lines += ['# HELP {} {}'.format(name, help_text), '# TYPE {} {}'.format(name, metric_type)]
+                    for labels, value in samples:
+                        lines.append('{}{{{}}} {}'.format(name, _labels(**labels), value) if labels else '{} {}'.format(name, value))
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", getattr(collector, '__name__', collector), e)
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        if self.token and not hmac.compare_digest(request.headers.get('Authorization', ''), 'Bearer ' + self.token):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain', headers={'WWW-Authenticate': 'Bearer'})
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+def component_metrics():
+    # Counters the cache, streams, dispatcher and connection pools already keep
+    from backend.cache import response_cache
+    from backend.db import db
+    from backend.dispatch import dispatcher
+    from backend.events import event_broker
+
+    cache = response_cache.stats()
+    streams = event_broker.stats()
+    dispatch = dispatcher.stats()
+    pools = [({"bind": bind or "default"}, engine.pool.checkedout())
+             for bind, engine in db.engines.items() if hasattr(engine.pool, 'checkedout')]
+    return [
+        ('response_cache_hits_total', 'counter', 'Response cache hits.', [({}, cache["hits"])]),
+        ('response_cache_misses_total', 'counter', 'Response cache misses.', [({}, cache["misses"])]),
+        ('booking_streams_open', 'gauge', 'Open booking event streams in this process.', [({}, streams["subscribers"])]),
+        ('booking_events_published_total', 'counter', 'Booking events published by this process.', [({}, streams["published"])]),
+        ('dispatch_assigned_total', 'counter', 'Service requests assigned by the dispatcher.', [({}, dispatch["assigned"])]),
+        ('dispatch_unassigned_total', 'counter', 'Service requests no professional could take.', [({}, dispatch["unassigned"])]),
+        ('db_pool_checked_out_connections', 'gauge', 'Pooled database connections in use.', pools),
+    ]
+
+
+metrics = RequestMetrics()
+
+
+### ------------------------------- statement timing -----------------------------###
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if metrics.enabled:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if started:
+        metrics.query_finished(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _abandon_query(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
@@ -1,6 +1,6 @@
 from backend.db import db  # Import db from backend.db
 from flask_security import UserMixin, RoleMixin
-from werkzeug.security import generate_password_hash, check_password_hash 
+from backend.passwords import password_hasher
 import datetime as dt
 import uuid
 
@@ -8,7 +8,27 @@ import uuid
 roles_users = db.Table(
     'roles_users',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id', ondelete='CASCADE')),
-    db.Column('role_id', db.Integer, db.ForeignKey('role.id', ondelete='CASCADE'))
+    db.Column('role_id', db.Integer, db.ForeignKey('role.id', ondelete='CASCADE')),
+    db.Index('ix_roles_users_user_id', 'user_id', 'role_id'),
+    db.Index('ix_roles_users_role_id', 'role_id', 'user_id')
+)
+
+# Association table for many-to-many relationship between Professionals and the Services they offer.
+# The primary key serves lookups by professional; the second index serves lookups by service.
+professional_services = db.Table(
+    'professional_service',
+    db.Column('professional_id', db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('service_id', db.Integer, db.ForeignKey('service.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_professional_service_service_id', 'service_id', 'professional_id')
+)
+
+# Professionals who rejected a service request; the dispatcher does not assign it to them again
+service_request_rejections = db.Table(
+    'service_request_rejection',
+    db.Column('service_request_id', db.Integer, db.ForeignKey('service_request.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('professional_id', db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), primary_key=True),
+    # SQLite looks child rows up by professional when professionals are inserted or deleted
+    db.Index('ix_service_request_rejection_professional_id', 'professional_id')
 )
 
 class Role(db.Model, RoleMixin):
@@ -22,7 +42,7 @@ class User(db.Model, UserMixin):
     __tablename__ = 'user'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password = db.Column(db.String(128), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     fs_uniquifier = db.Column(db.String, unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
     active = db.Column(db.Boolean, default=True)  # Add the active attribute
     roles = db.relationship('Role', secondary=roles_users, back_populates='users')
@@ -30,10 +50,10 @@ class User(db.Model, UserMixin):
     professionals = db.relationship('Professional', backref='user', lazy='dynamic', cascade='all, delete-orphan')
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
 class Customer(db.Model):
     __tablename__ = 'customer'
@@ -42,26 +62,36 @@ class Customer(db.Model):
     address = db.Column(db.String(255), nullable=False)
     pincode = db.Column(db.String(6), nullable=False, index=True)
     is_active = db.Column(db.Boolean, default=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     service_requests = db.relationship('ServiceRequest', backref='customer', lazy='dynamic', cascade='all, delete-orphan')
     customer_reviews = db.relationship('CustomerReview', backref='customer', lazy='dynamic', cascade='all, delete-orphan')
 
 class Professional(db.Model):
     __tablename__ = 'professional'
+    __table_args__ = (
+        db.Index('ix_professional_pincode_approved', 'pincode', 'is_approved'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     fullname = db.Column(db.String(100), nullable=False)
     available_services = db.Column(db.String(100), nullable=True)
     experience = db.Column(db.Integer, nullable=False)
     documents = db.Column(db.String(255), nullable=True)
     address = db.Column(db.String(255), nullable=False)
-    pincode = db.Column(db.String(6), nullable=False, index=True)
+    pincode = db.Column(db.String(6), nullable=False)
     is_approved = db.Column(db.Boolean, default=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     professional_reviews = db.relationship('CustomerReview', backref='professional', lazy='dynamic', cascade='all, delete-orphan')
     service_requests = db.relationship('ServiceRequest', backref='professional', lazy='dynamic', cascade='all, delete-orphan')
+    rating_stats = db.relationship('ProfessionalRatingStats', backref='professional', uselist=False, cascade='all, delete-orphan')
+    services = db.relationship('Service', secondary=professional_services, backref=db.backref('professionals', lazy='dynamic'))
+    document_files = db.relationship('ProfessionalDocument', backref='professional', lazy='dynamic', cascade='all, delete-orphan')
 
 class Service(db.Model):
     __tablename__ = 'service'
+    __table_args__ = (
+        # Names are stored lower-cased; the bulk import upserts on this index
+        db.Index('uq_service_name', 'name', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=False)
@@ -73,10 +103,25 @@ class Service(db.Model):
 
 class ServiceRequest(db.Model):
     __tablename__ = 'service_request'
+    __table_args__ = (
+        # Customer history, newest first
+        db.Index('ix_service_request_customer_date', 'customer_id', 'date_of_request'),
+        # Professional workload and the dispatcher's pending queue (professional_id IS NULL)
+        db.Index('ix_service_request_professional_status', 'professional_id', 'service_status', 'date_of_request'),
+        db.Index('ix_service_request_service_id', 'service_id'),
+        # Date-range exports
+        db.Index('ix_service_request_date', 'date_of_request'),
+        # Job board: open requests only, so listing a service in a pincode is one range scan.
+        # 'requested' is PENDING_STATUS in backend/dispatch.py; queries must use it as a literal to match.
+        db.Index('ix_service_request_open', 'service_id', 'pincode', 'date_of_request',
+                 sqlite_where=db.text("professional_id IS NULL AND service_status = 'requested'"),
+                 postgresql_where=db.text("professional_id IS NULL AND service_status = 'requested'")),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     service_id = db.Column(db.Integer, db.ForeignKey('service.id', ondelete='CASCADE'), nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
     professional_id = db.Column(db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), nullable=True)
+    pincode = db.Column(db.String(6), nullable=True)  # Customer's pincode when booked; where the job is
     date_of_request = db.Column(db.DateTime, default=lambda: dt.datetime.now(dt.timezone.utc))
     date_of_completion = db.Column(db.DateTime, nullable=True)
     service_status = db.Column(db.String(50), nullable=False, default="Pending")
@@ -86,9 +131,53 @@ class ServiceRequest(db.Model):
 
 class CustomerReview(db.Model):
     __tablename__ = 'customer_review'
+    __table_args__ = (
+        # Rating aggregates per professional read only the index
+        db.Index('ix_customer_review_professional_rating', 'professional_id', 'rating'),
+        db.Index('ix_customer_review_customer_id', 'customer_id'),
+        # Date-range exports
+        db.Index('ix_customer_review_date', 'review_date'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
     professional_id = db.Column(db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), nullable=False)
     review_text = db.Column(db.String(255), nullable=True)
     rating = db.Column(db.Integer, nullable=False)
-    review_date = db.Column(db.DateTime, default=lambda: dt.datetime.now(dt.timezone.utc))
\ No newline at end of file
+    review_date = db.Column(db.DateTime, default=lambda: dt.datetime.now(dt.timezone.utc))
+
+# Denormalized per-professional review aggregates, kept in sync by backend/ratings.py
+class ProfessionalRatingStats(db.Model):
+    __tablename__ = 'professional_rating_stats'
+    professional_id = db.Column(db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    average_rating = db.Column(db.Float, nullable=True, index=True)
+    last_review_date = db.Column(db.DateTime, nullable=True)
+
+# Uploaded verification documents; path is the content-addressed blob in backend/storage.py
+class ProfessionalDocument(db.Model):
+    __tablename__ = 'professional_document'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    professional_id = db.Column(db.Integer, db.ForeignKey('professional.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    size = db.Column(db.Integer, nullable=True)
+    checksum = db.Column(db.String(64), nullable=True, index=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    text_excerpt = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    created_at = db.Column(db.DateTime, default=lambda: dt.datetime.now(dt.timezone.utc))
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+# Resumable document upload; the bytes received so far are in the store's partial file
+class DocumentUpload(db.Model):
+    __tablename__ = 'document_upload'
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    size = db.Column(db.Integer, nullable=False)
+    checksum = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: dt.datetime.now(dt.timezone.utc))
+    completed_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,130 @@
+# backend/pagination.py
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from backend.db import db
+from backend.cache import TTLCache
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    # Clamp the requested page size so a single request can never load a whole table
+    if value in (None, ''):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+    return min(limit, maximum)
+
+
+def parse_date(value, end_of_day=False):
+    # Accepts both plain dates (2025-01-29) and full ISO timestamps.
+    # With end_of_day a plain date becomes the start of the next day, for use as an exclusive upper bound.
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def encode_cursor(*values):
+    # Cursor is the sort key of the last row on the page, e.g. "2025-01-29T16:57:09.827187|42"
+    parts = []
+    for value in values:
+        parts.append(value.isoformat() if isinstance(value, datetime) else str(value))
+    return '|'.join(parts)
+
+
+def decode_datetime_cursor(cursor):
+    # Decode a (datetime, id) cursor produced by encode_cursor
+    try:
+        timestamp, row_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+def decode_id_cursor(cursor):
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+def parse_fields(value, available):
+    # fields=id,name selects a subset of the columns an endpoint can return
+    if not value:
+        return list(available)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError("Unknown fields: {}.".format(', '.join(unknown)))
+    return fields
+
+
+def keyset_page(query, key_column, limit, after=None):
+    """Return one page of ``query`` ordered by ``key_column`` and the cursor of the next page.
+
+    The query must select ``key_column`` labelled as ``cursor_key``.
+    """
+    if after:
+        query = query.filter(key_column > decode_id_cursor(after))
+    rows = query.order_by(key_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].cursor_key)
+    return rows, next_cursor
+
+
+def serialize_row(row, fields):
+    data = {}
+    for field in fields:
+        value = getattr(row, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+### ------------------------------- cached row counts -----------------------------###
+
+# Table name -> row count. Counts are adjusted by the rows each commit inserts or
+# deletes, so COUNT(*) only runs on a cold cache or after the TTL expires.
+row_count_cache = TTLCache(maxsize=64, ttl=300)
+
+
+def cached_row_count(model):
+    table = model.__tablename__
+    total = row_count_cache.get(table)
+    if total is None:
+        total = db.session.query(func.count()).select_from(model).scalar()
+        row_count_cache.set(table, total)
+    return total
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_row_count_deltas(session, flush_context):
+    deltas = session.info.setdefault('row_count_deltas', {})
+    for obj in session.new:
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            deltas[table] = deltas.get(table, 0) + 1
+    for obj in session.deleted:
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            deltas[table] = deltas.get(table, 0) - 1
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_row_count_deltas(session):
+    for table, delta in session.info.pop('row_count_deltas', {}).items():
+        if delta:
+            row_count_cache.incr(table, delta)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_row_count_deltas(session):
+    session.info.pop('row_count_deltas', None)
@@ -0,0 +1,143 @@
+# backend/passwords.py
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# scrypt:N:r:p and pbkdf2:<digest>:<iterations> are werkzeug methods; argon2:<time cost>:<memory KiB>:<parallelism> uses argon2-cffi
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_ARGON2_METHOD = 'argon2:3:65536:4'
+_METHOD_RE = re.compile(r'^(scrypt:\d+:\d+:\d+|pbkdf2:\w+:\d+|argon2:\d+:\d+:\d+)$')
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing worker stayed busy for longer than the configured wait."""
+
+
+@lru_cache(maxsize=None)
+def _argon2(method):
+    from argon2 import PasswordHasher
+
+    _, time_cost, memory_cost, parallelism = method.split(':')
+    return PasswordHasher(time_cost=int(time_cost), memory_cost=int(memory_cost), parallelism=int(parallelism))
+
+
+# Module-level so the worker processes can run them
+def hash_password(password, method):
+    if method.startswith('argon2:'):
+        return _argon2(method).hash(password)
+    return generate_password_hash(password, method)
+
+
+def verify_password(stored, password, method):
+    """Return (matches, needs rehash) for ``password`` against the stored hash."""
+    if stored.startswith('$argon2'):
+        from argon2.exceptions import VerificationError, InvalidHashError
+
+        # The hash carries its own parameters; any hasher can verify it
+        hasher = _argon2(method if method.startswith('argon2:') else DEFAULT_ARGON2_METHOD)
+        try:
+            hasher.verify(stored, password)
+        except (VerificationError, InvalidHashError):
+            return False, False
+        return True, not method.startswith('argon2:') or hasher.check_needs_rehash(stored)
+    if not check_password_hash(stored, password):
+        return False, False
+    # Werkzeug hashes start with the method and its parameters
+    return True, stored.split('$', 1)[0] != method
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in a pool of worker processes.
+
+    Each hash is deliberately expensive, so a burst of logins hashed on the
+    request threads takes every CPU the web process has. The pool caps
+    hashing at ``workers`` processes. At most ``workers * queue_factor``
+    calls are in flight; beyond that callers wait up to ``wait_timeout``
+    seconds, then get PasswordHasherBusy. With ``workers = 0``, the default,
+    hashing runs inline on the calling thread.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self.wait_timeout = 5
+        self._slots = None
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        if not _METHOD_RE.match(method):
+            raise ValueError("PASSWORD_HASH_METHOD must look like scrypt:N:r:p, pbkdf2:sha256:iterations "
+                             "or argon2:time_cost:memory_kib:parallelism, not {!r}.".format(method))
+        if method.startswith('argon2:'):
+            try:
+                import argon2  # noqa: F401
+            except ImportError as e:
+                app.logger.warning("argon2 hashing unavailable (%s); using %s.", e, DEFAULT_METHOD)
+                method = DEFAULT_METHOD
+        self.method = method
+
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or 0
+        self.wait_timeout = app.config.get('PASSWORD_HASH_WAIT_TIMEOUT', 5)
+        queue_factor = app.config.get('PASSWORD_HASH_QUEUE_FACTOR', 2)
+        self._slots = threading.BoundedSemaphore(self.workers * queue_factor) if self.workers else None
+        self.shutdown()
+
+    def _get_pool(self):
+        # Started on first use, and again in a forked child, which cannot use its parent's pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHasherBusy("Password hashing is overloaded; try again shortly.")
+        try:
+            pool = self._get_pool()
+            try:
+                return pool.submit(function, *args).result()
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next call
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, stored, password):
+        matches, _ = self._run(verify_password, stored, password, self.method)
+        return matches
+
+    def verify_and_update(self, user, password):
+        """Check ``password`` for ``user``; on success re-hash it if the stored hash uses other settings.
+
+        Returns True when the password matches. The caller commits the new hash.
+        """
+        matches, needs_rehash = self._run(verify_password, user.password, password, self.method)
+        if matches and needs_rehash:
+            user.password = self.hash(password)
+        return matches
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,148 @@
+# backend/ratelimit.py
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+# Keys a limit can be applied to; each returns None when the request has no such key
+KEY_FUNCTIONS = {
+    'ip': lambda: request.remote_addr,
+    'email': lambda: str((request.get_json(silent=True) or {}).get('email') or '').strip().lower() or None,
+}
+
+
+class LocalBucketStore:
+    """Token buckets in process memory, least recently used dropped beyond ``maxsize``."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Take one token; returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """Buckets shared by every app process; the refill and take run atomically in one script."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix='mad2:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate):
+        return float(self._take(keys=[self.prefix + key], args=[capacity, rate]))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class RateLimiter:
+    """Per-endpoint token-bucket limits keyed by client IP and/or submitted email.
+
+    ``RATELIMITS`` maps an endpoint name to ``{key: (attempts, per_seconds)}``;
+    a bucket holds ``attempts`` tokens and refills at ``attempts / per_seconds``
+    tokens a second. Limits run before the view, so a rejected request costs
+    no database query or password hash.
+    """
+
+    def __init__(self):
+        self.store = LocalBucketStore()
+        self.limits = {}
+        self.enabled = True
+
+    def init_app(self, app, store=None):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.limits = {
+            endpoint: [(key, KEY_FUNCTIONS[key], attempts, attempts / per_seconds)
+                       for key, (attempts, per_seconds) in keys.items()]
+            for endpoint, keys in app.config.get('RATELIMITS', {}).items()
+        }
+        self.store = store or self._store_from_config(app)
+
+    def _store_from_config(self, app):
+        url = app.config.get('RATELIMIT_STORAGE_URL')
+        if url:
+            try:
+                import redis
+
+                client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+                client.ping()
+                return RedisBucketStore(client)
+            except Exception as e:
+                app.logger.warning("Redis rate limit store unavailable (%s); limiting per process.", e)
+        return LocalBucketStore(maxsize=app.config.get('RATELIMIT_LOCAL_MAXSIZE', 100000))
+
+    def check(self, endpoint):
+        """Take a token from each of the endpoint's buckets; returns the longest wait in seconds, 0 if allowed."""
+        wait = 0
+        for key, key_function, capacity, rate in self.limits.get(endpoint, ()):
+            value = key_function()
+            if value is None:
+                continue
+            try:
+                wait = max(wait, self.store.take('{}:{}:{}'.format(endpoint, key, value), capacity, rate))
+            except Exception as e:
+                # Fail open: an unreachable store must not lock everyone out
+                logger.warning("Rate limit check failed for %s: %s", endpoint, e)
+        return wait
+
+    def limit(self, endpoint):
+        """Reject requests over ``endpoint``'s limits with 429 and ``Retry-After``."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    wait = self.check(endpoint)
+                    if wait:
+                        return {
+                            "status": "error",
+                            "message": "Too many attempts. Please try again later."
+                        }, 429, {"Retry-After": str(math.ceil(wait))}
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+rate_limiter = RateLimiter()
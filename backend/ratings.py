@@ -0,0 +1,104 @@
+# backend/ratings.py
+from sqlalchemy import event, select, func, case, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.db import db
+from backend.models import CustomerReview, ProfessionalRatingStats
+
+stats = ProfessionalRatingStats.__table__
+reviews = CustomerReview.__table__
+
+
+def _latest_review_date(professional_id):
+    return select(func.max(reviews.c.review_date))\
+        .where(reviews.c.professional_id == professional_id)\
+        .scalar_subquery()
+
+
+def _apply_delta(connection, professional_id, count_delta, sum_delta, review_date=None, refresh_last_review=False):
+    # All right-hand sides read the pre-update (or conflicting) row, so the new average is computed from the new count and sum
+    new_count = stats.c.review_count + count_delta
+    new_sum = stats.c.rating_sum + sum_delta
+    values = {
+        "review_count": new_count,
+        "rating_sum": new_sum,
+        "average_rating": case((new_count > 0, new_sum * 1.0 / new_count), else_=None)
+    }
+    if refresh_last_review:
+        values["last_review_date"] = _latest_review_date(professional_id)
+    elif review_date is not None:
+        values["last_review_date"] = case(
+            (stats.c.last_review_date == None, review_date),
+            (stats.c.last_review_date < review_date, review_date),
+            else_=stats.c.last_review_date
+        )
+
+    if count_delta <= 0:
+        # Removing or re-rating a review; there is nothing to do without a stats row
+        connection.execute(stats.update().where(stats.c.professional_id == professional_id).values(**values))
+        return
+
+    # One upsert, so two concurrent first reviews for a professional cannot both insert
+    insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+    connection.execute(insert(stats).values(
+        professional_id=professional_id,
+        review_count=count_delta,
+        rating_sum=sum_delta,
+        average_rating=sum_delta / count_delta,
+        last_review_date=review_date
+    ).on_conflict_do_update(index_elements=[stats.c.professional_id], set_=values))
+
+
+@event.listens_for(CustomerReview, 'after_insert')
+def _review_inserted(mapper, connection, review):
+    _apply_delta(connection, review.professional_id, 1, review.rating, review_date=review.review_date)
+
+
+@event.listens_for(CustomerReview, 'after_delete')
+def _review_deleted(mapper, connection, review):
+    _apply_delta(connection, review.professional_id, -1, -review.rating, refresh_last_review=True)
+
+
+def _keep_previous_value(review, value, oldvalue, initiator):
+    return value
+
+
+# active_history loads the previous value before it is overwritten, even if the
+# instance was expired by a commit, so after_update can compute the delta
+for _attribute in (CustomerReview.professional_id, CustomerReview.rating, CustomerReview.review_date):
+    event.listen(_attribute, 'set', _keep_previous_value, retval=True, active_history=True)
+
+
+@event.listens_for(CustomerReview, 'after_update')
+def _review_updated(mapper, connection, review):
+    state = inspect(review)
+    professional_history = state.attrs.professional_id.history
+    rating_history = state.attrs.rating.history
+    date_history = state.attrs.review_date.history
+
+    old_professional_id = professional_history.deleted[0] if professional_history.deleted else review.professional_id
+    old_rating = rating_history.deleted[0] if rating_history.deleted else review.rating
+
+    if old_professional_id != review.professional_id:
+        # Review moved to another professional
+        _apply_delta(connection, old_professional_id, -1, -old_rating, refresh_last_review=True)
+        _apply_delta(connection, review.professional_id, 1, review.rating, review_date=review.review_date)
+    elif old_rating != review.rating or date_history.has_changes():
+        _apply_delta(connection, review.professional_id, 0, review.rating - old_rating,
+                     refresh_last_review=date_history.has_changes())
+
+
+def rebuild_rating_stats():
+    # Recompute every professional's aggregates from customer_review in one INSERT ... SELECT
+    db.session.execute(stats.delete())
+    db.session.execute(stats.insert().from_select(
+        ['professional_id', 'review_count', 'rating_sum', 'average_rating', 'last_review_date'],
+        select(
+            reviews.c.professional_id,
+            func.count(reviews.c.id),
+            func.sum(reviews.c.rating),
+            func.avg(reviews.c.rating),
+            func.max(reviews.c.review_date)
+        ).group_by(reviews.c.professional_id)
+    ))
+    db.session.commit()
+    return db.session.query(func.count(ProfessionalRatingStats.professional_id)).scalar()
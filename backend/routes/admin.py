@@ -1,25 +1,29 @@
-from flask import jsonify, current_app
+from flask import jsonify, current_app, Response, stream_with_context, send_file
 from flask_restful import Resource, request
 from sqlalchemy.exc import SQLAlchemyError
-from backend.models import db, User, Customer, Professional, Role, Service, CustomerReview, ServiceRequest, roles_users
+from backend.models import db, User, Customer, Professional, Role, Service, CustomerReview, ServiceRequest, roles_users, ProfessionalRatingStats, ProfessionalDocument
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash
 import os
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy import func, case
+from backend.auth import role_required
+from backend.routing import replica_reads
+from backend.cache import response_cache
+from backend.pagination import parse_fields, parse_limit, parse_date, keyset_page, serialize_row, cached_row_count
+from backend.export import EXPORT_ENTITIES, EXPORT_FORMATS, build_export_query, generate_csv, generate_ndjson
+from backend.dispatch import dispatcher
+from backend.bulk import parse_ids, parse_values, bulk_update, refresh_after_bulk_update
+from backend.service_import import IMPORT_FORMATS, import_services
+from backend.matching import professionals_offering, offering_any_service
+from backend.search import parse_search, parse_bool, apply_text_search, prefix_filter
+import backend.ratings  # Registers the listeners that keep professional_rating_stats up to date
 
 ###----------------------------sevices api---------------------------------###
 
 class AdminAddServiceAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
     def post(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Parse request JSON data
             data = request.get_json()
@@ -40,6 +44,10 @@ class AdminAddServiceAPI(Resource):
 
             return {"message": "Service added successfully."}, 201
 
+        except IntegrityError:
+            db.session.rollback()
+            return {"error": "A service with this name already exists."}, 409
+
         except SQLAlchemyError as e:
             db.session.rollback()
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -49,15 +57,8 @@ class AdminAddServiceAPI(Resource):
         
 
 class AdminUpdateServiceAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
     def put(self, service_id):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Parse request JSON data
             data = request.get_json()
@@ -80,6 +81,10 @@ class AdminUpdateServiceAPI(Resource):
 
             return {"message": "Service updated successfully."}, 200
 
+        except IntegrityError:
+            db.session.rollback()
+            return {"error": "A service with this name already exists."}, 409
+
         except SQLAlchemyError as e:
             db.session.rollback()
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -88,16 +93,38 @@ class AdminUpdateServiceAPI(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
 
+class AdminServiceImportAPI(Resource):
+    @role_required('admin')
+    def post(self):
+        try:
+            # CSV with a header row, or one JSON object per line; the body is read line by line
+            import_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+            if import_format not in IMPORT_FORMATS:
+                return {"error": "Unsupported format. Use one of: {}.".format(', '.join(IMPORT_FORMATS))}, 400
+
+            try:
+                report = import_services(request.stream, import_format)
+            except UnicodeDecodeError:
+                db.session.rollback()
+                return {"error": "The file must be UTF-8 encoded."}, 400
+            except ValueError as e:
+                db.session.rollback()
+                return {"error": str(e)}, 400
+
+            return report, 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            db.session.rollback()
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
 class AdminDeleteServiceAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
     def delete(self, service_id):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Find the service by ID
             service = Service.query.get(service_id)
@@ -117,33 +144,41 @@ class AdminDeleteServiceAPI(Resource):
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
+# Columns AllAdminServiceAPI can return, selectable with ?fields=
+SERVICE_LIST_FIELDS = {
+    "id": Service.id,
+    "name": Service.name,
+    "description": Service.description,
+    "price": Service.price,
+    "time_required": Service.time_required,
+    "created_at": Service.created_at,
+    "is_approved": Service.is_approved,
+}
+
+
 class AllAdminServiceAPI(Resource):
     @jwt_required()
+    @replica_reads
+    @response_cache.cached(tags=['service'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        # if not user or 'admin' or 'customer' not in [role.name for role in user.roles]:
-        #     return {"error": "Unauthorized access."}, 403
-
         try:
-            # Retrieve all services
-            services = Service.query.all()
-            service_list = []
-            for service in services:
-                service_data = {
-                    "id": service.id,
-                    "name": service.name,
-                    "description": service.description,
-                    "price": service.price,
-                    "time_required": service.time_required,
-                    "created_at": service.created_at.isoformat(),  # Convert datetime to string
-                    "is_approved": service.is_approved
-                }
-                service_list.append(service_data)
+            try:
+                fields = parse_fields(request.args.get('fields'), SERVICE_LIST_FIELDS)
+                limit = parse_limit(request.args.get('limit'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
 
-            return {"services": service_list}, 200
+            # Select only the requested columns, one page at a time
+            query = db.session.query(Service.id.label('cursor_key'),
+                                     *[SERVICE_LIST_FIELDS[field].label(field) for field in fields])
+            try:
+                rows, next_cursor = keyset_page(query, Service.id, limit, request.args.get('after'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            service_list = [serialize_row(row, fields) for row in rows]
+
+            return {"services": service_list, "next_cursor": next_cursor, "total": cached_row_count(Service)}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -152,33 +187,30 @@ class AllAdminServiceAPI(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
 
+def service_summary():
+    # Counts and totals for approved/unapproved services in a single scan
+    approved_count, unapproved_count, approved_total_money, unapproved_total_money = db.session.query(
+        func.sum(case((Service.is_approved == True, 1), else_=0)),
+        func.sum(case((Service.is_approved == False, 1), else_=0)),
+        func.sum(case((Service.is_approved == True, Service.price), else_=0)),
+        func.sum(case((Service.is_approved == False, Service.price), else_=0))
+    ).one()
+
+    return {
+        "approved_count": approved_count or 0,
+        "unapproved_count": unapproved_count or 0,
+        "approved_total_money": approved_total_money or 0,
+        "unapproved_total_money": unapproved_total_money or 0
+    }
+
+
 class AdminServiceSummaryAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['service'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Count approved and unapproved services
-            approved_count = db.session.query(func.count(Service.id)).filter_by(is_approved=True).scalar()
-            unapproved_count = db.session.query(func.count(Service.id)).filter_by(is_approved=False).scalar()
-
-            # Calculate total money for approved and unapproved services
-            approved_total_money = db.session.query(func.sum(Service.price)).filter_by(is_approved=True).scalar() or 0
-            unapproved_total_money = db.session.query(func.sum(Service.price)).filter_by(is_approved=False).scalar() or 0
-
-            summary = {
-                "approved_count": approved_count,
-                "unapproved_count": unapproved_count,
-                "approved_total_money": approved_total_money,
-                "unapproved_total_money": unapproved_total_money
-            }
-
-            return {"summary": summary}, 200
+            return {"summary": service_summary()}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -186,28 +218,28 @@ class AdminServiceSummaryAPI(Resource):
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
+SERVICE_SEARCH_FIELDS = {
+    "id": (Service.id, int),
+    "price": (Service.price, float),
+    "is_approved": (Service.is_approved, parse_bool),
+}
+
+
 class AdminServiceSearchAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
     def get(self, search_term):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Retrieve and process the search term
-            search_term = search_term.strip().lower()
+            # Split the search term into text terms and typed filters such as price<=500
+            try:
+                terms, filters = parse_search(search_term.strip().lower(), SERVICE_SEARCH_FIELDS)
+            except ValueError as e:
+                return {"error": str(e)}, 400
 
             # Build the query
-            query = Service.query.filter(
-                (Service.name.ilike(f'%{search_term}%')) |
-                (Service.price.ilike(f'%{search_term}%')) |
-                (Service.description.ilike(f'%{search_term}%')) |
-                (Service.is_approved.ilike(f'%{search_term}%')) |
-                (Service.time_required.ilike(f'%{search_term}%'))
-            )
+            query = Service.query.filter(*filters)
+            query = apply_text_search(query, 'service', Service, terms,
+                                      [Service.name, Service.description, Service.time_required])
 
             services = query.all()
 
@@ -237,63 +269,109 @@ class AdminServiceSearchAPI(Resource):
 ###----------------------------professional api by admin ---------------------------------###
 
 
+# Columns AdminProfessionalDetailsAPI can return, selectable with ?fields=
+PROFESSIONAL_LIST_FIELDS = {
+    "professional_id": Professional.id,
+    "fullname": Professional.fullname,
+    "available_services": Professional.available_services,
+    "experience": Professional.experience,
+    "documents": Professional.documents,
+    "address": Professional.address,
+    "email": User.email,
+    "pincode": Professional.pincode,
+    "is_approved": Professional.is_approved,
+    "average_rating": func.round(ProfessionalRatingStats.average_rating, 2),
+}
+
+
 class AdminProfessionalDetailsAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['professional', 'user', 'customer_review'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Retrieve professionals and their associated users
-            professionals = db.session.query(Professional, User)\
-                .join(User, Professional.user_id == User.id)\
-                .all()
+            try:
+                fields = parse_fields(request.args.get('fields'), PROFESSIONAL_LIST_FIELDS)
+                limit = parse_limit(request.args.get('limit'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Select only the requested columns, joining users and rating stats only when needed
+            query = db.session.query(Professional.id.label('cursor_key'),
+                                     *[PROFESSIONAL_LIST_FIELDS[field].label(field) for field in fields])\
+                .select_from(Professional)
+            if 'email' in fields:
+                query = query.join(User, Professional.user_id == User.id)
+            if 'average_rating' in fields:
+                query = query.outerjoin(ProfessionalRatingStats, ProfessionalRatingStats.professional_id == Professional.id)
+            try:
+                rows, next_cursor = keyset_page(query, Professional.id, limit, request.args.get('after'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            professional_list = [serialize_row(row, fields) for row in rows]
+
+            return {"professionals": professional_list, "next_cursor": next_cursor,
+                    "total": cached_row_count(Professional)}, 200
 
-            # Retrieve average ratings for professionals
-            reviews = db.session.query(CustomerReview.professional_id, 
-                                        db.func.round(db.func.avg(CustomerReview.rating), 2).label('average_rating'))\
-                .group_by(CustomerReview.professional_id).all()
-            
-            avg_ratings = {review.professional_id: review.average_rating for review in reviews}
+        except SQLAlchemyError as e:
+            return {"error": "Database error: {}".format(str(e))}, 500
 
-            professional_list = []
-            for professional, user in professionals:
-                professional_data = {
-                    "professional_id": professional.id,
-                    "fullname": professional.fullname,
-                    "available_services": professional.available_services,
-                    "email": user.email,
-                    "pincode": professional.pincode,
-                    "is_approved": professional.is_approved,
-                    "average_rating": avg_ratings.get(professional.id, None)
-                }
-                professional_list.append(professional_data)
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+        
 
-            return {"professionals": professional_list}, 200
+### ------------------------------- professional documents -----------------------------###
+
+class AdminProfessionalDocumentsAPI(Resource):
+    @role_required('admin')
+    def get(self, professional_id):
+        try:
+            documents = ProfessionalDocument.query.filter_by(professional_id=professional_id)\
+                .order_by(ProfessionalDocument.id).all()
+
+            return {"documents": [{
+                "id": document.id,
+                "filename": document.filename,
+                "content_type": document.content_type,
+                "size": document.size,
+                "checksum": document.checksum,
+                "page_count": document.page_count,
+                "text_excerpt": document.text_excerpt,
+                "status": document.status,
+                "created_at": document.created_at.isoformat() if document.created_at else None
+            } for document in documents]}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
 
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
-        
+
+
+class AdminDocumentDownloadAPI(Resource):
+    @role_required('admin')
+    def get(self, document_id):
+        document = db.session.get(ProfessionalDocument, document_id)
+        if not document or not document.path or not os.path.exists(document.path):
+            return {"error": "Document not found."}, 404
+
+        # Blobs never change, so the checksum is a strong ETag; conditional=True answers Range and If-None-Match
+        return send_file(
+            os.path.abspath(document.path),
+            mimetype=document.content_type or 'application/octet-stream',
+            download_name=document.filename,
+            conditional=True,
+            etag=document.checksum or True,
+            max_age=3600
+        )
+
 
 ### ------------------------------- admin block or unblock professional -----------------------------###
 
 class AdminBlockUnblockProfessionalAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
     def put(self, professional_id):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Parse request JSON data
             data = request.get_json()
@@ -318,40 +396,37 @@ class AdminBlockUnblockProfessionalAPI(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
 
+def professional_summary():
+    # Count total, approved, and pending professionals in a single scan
+    total_professionals, approved_professionals, pending_professionals = db.session.query(
+        func.count(Professional.id),
+        func.sum(case((Professional.is_approved == True, 1), else_=0)),
+        func.sum(case((Professional.is_approved == False, 1), else_=0))
+    ).one()
+
+    # Average ratings are maintained incrementally in professional_rating_stats
+    avg_ratings = (
+        db.session.query(ProfessionalRatingStats.professional_id, ProfessionalRatingStats.average_rating)
+        .filter(ProfessionalRatingStats.review_count > 0)
+        .all()
+    )
+    avg_ratings_dict = {prof_id: round(rating, 2) for prof_id, rating in avg_ratings}
+
+    return {
+        "total_professionals": total_professionals,
+        "approved_professionals": approved_professionals or 0,
+        "pending_professionals": pending_professionals or 0,
+        "avg_ratings": avg_ratings_dict,
+    }
+
+
 class AdminProfessionalSummaryAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['professional', 'customer_review'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Count total, approved, and pending professionals
-            total_professionals = Professional.query.count()
-            approved_professionals = Professional.query.filter_by(is_approved=True).count()
-            pending_professionals = Professional.query.filter_by(is_approved=False).count()
-
-            # Calculate average ratings for professionals
-            avg_ratings = (
-                db.session.query(
-                    CustomerReview.professional_id, func.avg(CustomerReview.rating)
-                )
-                .group_by(CustomerReview.professional_id)
-                .all()
-            )
-            avg_ratings_dict = {prof_id: round(rating, 2) for prof_id, rating in avg_ratings}
-
-            summary = {
-                "total_professionals": total_professionals,
-                "approved_professionals": approved_professionals,
-                "pending_professionals": pending_professionals,
-                "avg_ratings": avg_ratings_dict,
-            }
-
-            return {"summary": summary}, 200
+            return {"summary": professional_summary()}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -360,87 +435,18 @@ class AdminProfessionalSummaryAPI(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
 
 
-class AdminProfessionalSearchAPI(Resource):
-    @jwt_required()
-    def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
-        try:
-            # Retrieve query parameters
-            fullname_query = request.args.get('fullname', '').strip().lower()
-            email_query = request.args.get('email', '').strip().lower()
-            services_query = request.args.get('services', '').strip().lower()
-            experience_query = request.args.get('experience', '').strip().lower()
-            is_approved_query = request.args.get('is_approved', '').strip().lower()
-            avg_rating_query = request.args.get('avg_rating', '').strip().lower()
-
-            # Build the query
-            query = db.session.query(Professional, User).join(User, Professional.user_id == User.id)
-
-            if fullname_query:
-                query = query.filter(User.name.ilike(f'%{fullname_query}%'))
-            if email_query:
-                query = query.filter(User.email.ilike(f'%{email_query}%'))
-            if services_query:
-                query = query.join(Service).filter(Service.name.ilike(f'%{services_query}%'))
-            if experience_query:
-                query = query.filter(Professional.experience.ilike(f'%{experience_query}%'))
-            if is_approved_query:
-                query = query.filter(Professional.is_approved == (is_approved_query.lower() == 'true'))
-            if avg_rating_query:
-                avg_ratings = (
-                    db.session.query(
-                        CustomerReview.professional_id, func.avg(CustomerReview.rating).label('average_rating')
-                    )
-                    .group_by(CustomerReview.professional_id)
-                    .having(func.avg(CustomerReview.rating) >= float(avg_rating_query))
-                    .all()
-                )
-                avg_rating_ids = [rating.professional_id for rating in avg_ratings]
-                query = query.filter(Professional.id.in_(avg_rating_ids))
-
-            professionals = query.all()
-
-            professional_list = []
-            for professional, user in professionals:
-                professional_data = {
-                    "professional_id": professional.id,
-                    "user_id": user.id,
-                    "fullname": user.name,
-                    "email": user.email,
-                    "phone": user.phone,
-                    "address": professional.address,
-                    "pincode": professional.pincode,
-                    "is_approved": professional.is_approved,
-                    "experience": professional.experience,
-                    "average_rating": avg_ratings.get(professional.id, None)
-                }
-                professional_list.append(professional_data)
+PROFESSIONAL_SEARCH_FIELDS = {
+    "experience": (Professional.experience, int),
+    "is_approved": (Professional.is_approved, parse_bool),
+    "pincode": (Professional.pincode, str),
+    "rating": (ProfessionalRatingStats.average_rating, float),
+}
 
-            return {"professionals": professional_list}, 200
-
-        except SQLAlchemyError as e:
-            return {"error": "Database error: {}".format(str(e))}, 500
-
-        except Exception as e:
-            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
-        
 
 class AdminProfessionalSearchAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Retrieve query parameters
             search_term = request.args.get('search_term', '').strip().lower()
@@ -452,45 +458,41 @@ class AdminProfessionalSearchAPI(Resource):
             avg_rating_query = request.args.get('avg_rating', '').strip().lower()
 
             # Build the query
-            query = db.session.query(Professional, User).join(User, Professional.user_id == User.id)
-
-            # General search term
-            if search_term:
-                query = query.filter(
-                    (Professional.fullname.ilike(f'%{search_term}%')) |
-                    (User.email.ilike(f'%{search_term}%')) |
-                    (Professional.address.ilike(f'%{search_term}%')) |
-                    (Professional.pincode.ilike(f'%{search_term}%'))
-                )
-
-            # Specific filters
-            if fullname_query:
-                query = query.filter(Professional.fullname.ilike(f'%{fullname_query}%'))
-            if email_query:
-                query = query.filter(User.email.ilike(f'%{email_query}%'))
+            query = db.session.query(Professional, User, ProfessionalRatingStats.average_rating)\
+                .join(User, Professional.user_id == User.id)\
+                .outerjoin(ProfessionalRatingStats, ProfessionalRatingStats.professional_id == Professional.id)
+
+            # General search term, which may also carry typed filters such as experience>=5
+            try:
+                terms, filters = parse_search(search_term, PROFESSIONAL_SEARCH_FIELDS)
+                if experience_query:
+                    filters.append(Professional.experience >= int(experience_query))
+                if avg_rating_query:
+                    # Range lookup on the indexed average_rating column
+                    filters.append(ProfessionalRatingStats.average_rating >= float(avg_rating_query))
+                if is_approved_query:
+                    filters.append(Professional.is_approved == parse_bool(is_approved_query))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Offered services are matched by name prefix, then through the professional_service index
             if services_query:
-                query = query.join(Service).filter(Service.name.ilike(f'%{services_query}%'))
-            if experience_query:
-                query = query.filter(Professional.experience.ilike(f'%{experience_query}%'))
-            if is_approved_query:
-                query = query.filter(Professional.is_approved == (is_approved_query.lower() == 'true'))
-            if avg_rating_query:
-                avg_ratings = (
-                    db.session.query(
-                        CustomerReview.professional_id, func.avg(CustomerReview.rating).label('average_rating')
-                    )
-                    .group_by(CustomerReview.professional_id)
-                    .having(func.avg(CustomerReview.rating) >= float(avg_rating_query))
-                    .all()
-                )
-                avg_rating_ids = [rating.professional_id for rating in avg_ratings]
-                query = query.filter(Professional.id.in_(avg_rating_ids))
+                service_ids = [service_id for service_id, in db.session.query(Service.id)
+                               .filter(prefix_filter(Service.name, services_query))]
+                query = query.filter(offering_any_service(service_ids))
+
+            # Name and email filters are matched through the full-text index
+            terms += fullname_query.split() + email_query.split()
+
+            query = query.filter(*filters)
+            query = apply_text_search(query, 'professional', Professional, terms,
+                                      [Professional.fullname, Professional.available_services, Professional.address,
+                                       Professional.pincode, User.email])
 
             professionals = query.all()
 
             professional_list = []
-            avg_rating_map = {rating.professional_id: rating.average_rating for rating in avg_ratings} if avg_rating_query else {}
-            for professional, user in professionals:
+            for professional, user, average_rating in professionals:
                 professional_data = {
                     "professional_id": professional.id,
                     "user_id": user.id,
@@ -500,7 +502,7 @@ class AdminProfessionalSearchAPI(Resource):
                     "pincode": professional.pincode,
                     "is_approved": professional.is_approved,
                     "experience": professional.experience,
-                    "average_rating": avg_rating_map.get(professional.id, None)
+                    "average_rating": round(average_rating, 2) if average_rating is not None else None
                 }
                 professional_list.append(professional_data)
 
@@ -513,34 +515,44 @@ class AdminProfessionalSearchAPI(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
 
 
+# Columns AdminCustomerDetailsAPI can return, selectable with ?fields=
+CUSTOMER_LIST_FIELDS = {
+    "customer_id": Customer.id,
+    "user_id": Customer.user_id,
+    "fullname": Customer.fullname,
+    "email": User.email,
+    "address": Customer.address,
+    "pincode": Customer.pincode,
+    "is_active": Customer.is_active,
+}
+
+
 class AdminCustomerDetailsAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['customer', 'user'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Retrieve all customers and their associated users
-            customers = db.session.query(Customer, User).join(User, Customer.user_id == User.id).all()
-
-            customer_list = []
-            for customer, user in customers:
-                customer_data = {
-                    "customer_id": customer.id,
-                    "user_id": user.id,
-                    "fullname": customer.fullname,
-                    "email": user.email,
-                    "address": customer.address,
-                    "pincode": customer.pincode,
-                    "is_active": customer.is_active
-                }
-                customer_list.append(customer_data)
-
-            return {"customers": customer_list}, 200
+            try:
+                fields = parse_fields(request.args.get('fields'), CUSTOMER_LIST_FIELDS)
+                limit = parse_limit(request.args.get('limit'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Select only the requested columns, joining users only when the email is needed
+            query = db.session.query(Customer.id.label('cursor_key'),
+                                     *[CUSTOMER_LIST_FIELDS[field].label(field) for field in fields])\
+                .select_from(Customer)
+            if 'email' in fields:
+                query = query.join(User, Customer.user_id == User.id)
+            try:
+                rows, next_cursor = keyset_page(query, Customer.id, limit, request.args.get('after'))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            customer_list = [serialize_row(row, fields) for row in rows]
+
+            return {"customers": customer_list, "next_cursor": next_cursor, "total": cached_row_count(Customer)}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -548,29 +560,29 @@ class AdminCustomerDetailsAPI(Resource):
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
+
+def customer_summary():
+    # Count total, active, and inactive customers in a single scan
+    total_customers, active_customers, inactive_customers = db.session.query(
+        func.count(Customer.id),
+        func.sum(case((Customer.is_active == True, 1), else_=0)),
+        func.sum(case((Customer.is_active == False, 1), else_=0))
+    ).one()
+
+    return {
+        "total_customers": total_customers,
+        "active_customers": active_customers or 0,
+        "inactive_customers": inactive_customers or 0
+    }
+
+
 class AdminCustomerSummaryAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['customer'])
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
-            # Count total, active, and inactive customers
-            total_customers = Customer.query.count()
-            active_customers = Customer.query.filter_by(is_active=True).count()
-            inactive_customers = Customer.query.filter_by(is_active=False).count()
-
-            summary = {
-                "total_customers": total_customers,
-                "active_customers": active_customers,
-                "inactive_customers": inactive_customers
-            }
-
-            return {"summary": summary}, 200
+            return {"summary": customer_summary()}, 200
 
         except SQLAlchemyError as e:
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -580,15 +592,8 @@ class AdminCustomerSummaryAPI(Resource):
 
 
 class AdminBlockUnblockCustomerAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
     def put(self, customer_id):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Parse request JSON data
             data = request.get_json()
@@ -612,18 +617,19 @@ class AdminBlockUnblockCustomerAPI(Resource):
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
         
+CUSTOMER_SEARCH_FIELDS = {
+    "is_active": (Customer.is_active, parse_bool),
+    "pincode": (Customer.pincode, str),
+}
+
+
 class AdminCustomerSearchAPI(Resource):
-    @jwt_required()
+    @role_required('admin')
+    @replica_reads
     def get(self):
-        current_user = get_jwt_identity()
-        
-        # Check if the user is an admin
-        user = User.query.get(current_user)
-        if not user or 'admin' not in [role.name for role in user.roles]:
-            return {"error": "Unauthorized access."}, 403
-
         try:
             # Retrieve query parameters
+            search_term = request.args.get('search_term', '').strip().lower()
             fullname_query = request.args.get('fullname', '').strip().lower()
             email_query = request.args.get('email', '').strip().lower()
             pincode_query = request.args.get('pincode', '').strip().lower()
@@ -633,16 +639,22 @@ class AdminCustomerSearchAPI(Resource):
             # Build the query
             query = db.session.query(Customer, User).join(User, Customer.user_id == User.id)
 
-            if fullname_query:
-                query = query.filter(Customer.fullname.ilike(f'%{fullname_query}%'))
-            if email_query:
-                query = query.filter(User.email.ilike(f'%{email_query}%'))
+            try:
+                terms, filters = parse_search(search_term, CUSTOMER_SEARCH_FIELDS)
+                if is_active_query:
+                    filters.append(Customer.is_active == parse_bool(is_active_query))
+            except ValueError as e:
+                return {"error": str(e)}, 400
             if pincode_query:
-                query = query.filter(Customer.pincode.ilike(f'%{pincode_query}%'))
-            if is_active_query:
-                query = query.filter(Customer.is_active == (is_active_query.lower() == 'true'))
-            if address_query:
-                query = query.filter(Customer.address.ilike(f'%{address_query}%'))
+                # Pincode prefix as an index range instead of a wildcard match
+                filters.append(prefix_filter(Customer.pincode, pincode_query))
+
+            # Name, email and address filters are matched through the full-text index
+            terms += fullname_query.split() + email_query.split() + address_query.split()
+
+            query = query.filter(*filters)
+            query = apply_text_search(query, 'customer', Customer, terms,
+                                      [Customer.fullname, Customer.address, Customer.pincode, User.email])
 
             customers = query.all()
 
@@ -669,6 +681,7 @@ class AdminCustomerSearchAPI(Resource):
 
 class AdminServiceOneAPI(Resource):
     @jwt_required()
+    @response_cache.cached(tags=lambda service_id: ['service:{}'.format(service_id)])
     def get(self, service_id):
         try:
             service = Service.query.get(service_id)
@@ -689,4 +702,202 @@ class AdminServiceOneAPI(Resource):
 
         except Exception as e:
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
-        
\ No newline at end of file
+
+
+class AdminServiceProfessionalsAPI(Resource):
+    @role_required('admin')
+    def get(self, service_id):
+        try:
+            # Approved professionals offering the service, optionally in one pincode
+            pincode = request.args.get('pincode', '').strip()
+            professionals = professionals_offering(service_id, pincode=pincode or None).all()
+
+            professional_list = []
+            for professional in professionals:
+                professional_list.append({
+                    "professional_id": professional.id,
+                    "fullname": professional.fullname,
+                    "pincode": professional.pincode,
+                    "experience": professional.experience
+                })
+
+            return {"professionals": professional_list}, 200
+
+        except SQLAlchemyError as e:
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+###----------------------------admin dashboard ---------------------------------###
+
+class AdminDashboardAPI(Resource):
+    @role_required('admin')
+    @replica_reads
+    @response_cache.cached(tags=['service', 'customer', 'professional', 'customer_review'])
+    def get(self):
+        try:
+            # All dashboard summaries in one round trip
+            dashboard = {
+                "services": service_summary(),
+                "customers": customer_summary(),
+                "professionals": professional_summary()
+            }
+            return {"dashboard": dashboard}, 200
+
+        except SQLAlchemyError as e:
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+class AdminCacheStatsAPI(Resource):
+    @role_required('admin')
+    def get(self):
+        return {"cache": response_cache.stats()}, 200
+
+
+class AdminTaskStatsAPI(Resource):
+    @role_required('admin')
+    def get(self):
+        from backend.tasks import task_stats
+
+        return {"tasks": task_stats()}, 200
+
+
+###----------------------------bulk updates ---------------------------------###
+
+# Fields bulk requests may filter on and set; only columns of the updated table itself
+PROFESSIONAL_BULK_FILTER_FIELDS = {
+    "experience": (Professional.experience, int),
+    "is_approved": (Professional.is_approved, parse_bool),
+    "pincode": (Professional.pincode, str),
+}
+PROFESSIONAL_BULK_SET_FIELDS = {
+    "is_approved": (Professional.is_approved, parse_bool),
+}
+CUSTOMER_BULK_FILTER_FIELDS = {
+    "is_active": (Customer.is_active, parse_bool),
+    "pincode": (Customer.pincode, str),
+}
+CUSTOMER_BULK_SET_FIELDS = {
+    "is_active": (Customer.is_active, parse_bool),
+}
+
+
+def run_bulk_update(model, data, filter_fields, set_fields):
+    """Handle a bulk request body: {"ids": [...]} and/or {"filter": "..."} plus {"set": {...}}.
+
+    ``filter`` uses the search syntax, e.g. "is_approved:false pincode:5600*".
+    """
+    try:
+        values = parse_values(data.get('set'), set_fields)
+        ids = parse_ids(data['ids']) if data.get('ids') is not None else None
+        filters = []
+        if data.get('filter'):
+            terms, filters = parse_search(data['filter'], filter_fields)
+            if terms:
+                return {"error": "Unknown filter: {}".format(' '.join(terms))}, 400
+        if ids is None and not filters:
+            return {"error": "Provide ids or a filter."}, 400
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    updated, unchanged, missing = bulk_update(model, values, ids=ids, filters=filters)
+    db.session.commit()
+    refresh_after_bulk_update(model, updated)
+
+    results = [{"id": row_id, "status": "updated"} for row_id, _ in updated]
+    results += [{"id": row_id, "status": "unchanged"} for row_id in unchanged]
+    results += [{"id": row_id, "status": "not_found"} for row_id in missing]
+    return {"updated": len(updated), "results": results}, 200
+
+
+class AdminBulkProfessionalAPI(Resource):
+    @role_required('admin')
+    def put(self):
+        try:
+            data = request.get_json(silent=True) or {}
+            return run_bulk_update(Professional, data, PROFESSIONAL_BULK_FILTER_FIELDS, PROFESSIONAL_BULK_SET_FIELDS)
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            db.session.rollback()
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+class AdminBulkCustomerAPI(Resource):
+    @role_required('admin')
+    def put(self):
+        try:
+            data = request.get_json(silent=True) or {}
+            return run_bulk_update(Customer, data, CUSTOMER_BULK_FILTER_FIELDS, CUSTOMER_BULK_SET_FIELDS)
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            db.session.rollback()
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+###----------------------------dispatch ---------------------------------###
+
+class AdminDispatchAPI(Resource):
+    @role_required('admin')
+    def get(self):
+        return {"dispatch": dispatcher.stats()}, 200
+
+    @role_required('admin')
+    def post(self):
+        try:
+            # Assign a batch of pending service requests in one transaction
+            data = request.get_json(silent=True) or {}
+            result = dispatcher.dispatch(limit=data.get('limit'))
+
+            return {
+                "assigned": [{"request_id": request_id, "professional_id": professional_id}
+                             for request_id, professional_id in result["assigned"]],
+                "unassigned": result["unassigned"]
+            }, 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+###----------------------------admin export ---------------------------------###
+
+class AdminExportAPI(Resource):
+    @role_required('admin')
+    def get(self, entity):
+        if entity not in EXPORT_ENTITIES:
+            return {"error": "Unknown export entity. Choose one of: {}.".format(', '.join(EXPORT_ENTITIES))}, 404
+
+        export_format = request.args.get('format', 'ndjson').strip().lower()
+        if export_format not in EXPORT_FORMATS:
+            return {"error": "Unsupported format. Use ndjson or csv."}, 400
+
+        try:
+            statement, fields = build_export_query(
+                entity,
+                parse_date(request.args.get('from')),
+                parse_date(request.args.get('to'), end_of_day=True)
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        # Rows are written as they are fetched, so memory stays flat regardless of table size
+        generate = generate_csv if export_format == 'csv' else generate_ndjson
+        response = Response(stream_with_context(generate(statement, fields)), mimetype=EXPORT_FORMATS[export_format])
+        response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(entity, export_format)
+        return response
@@ -1,13 +1,20 @@
-from flask import jsonify, current_app
+from flask import jsonify, current_app, Response
 from flask_restful import Resource, request
 from sqlalchemy.exc import SQLAlchemyError
-from backend.models import db, User, Customer, Professional, Role, Service
+from backend.models import db, User, Customer, Professional, Role, Service, ProfessionalDocument, DocumentUpload
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash
 import os
+from datetime import datetime, timezone
 from werkzeug.utils import secure_filename
+from backend.matching import parse_service_names, services_by_name
+from backend.storage import document_store, parse_content_range, UploadTooLarge, UploadOffsetMismatch
+from backend.passwords import password_hasher, PasswordHasherBusy
+from backend.ratelimit import rate_limiter
+from backend.auth import role_required, current_identity
+from backend.events import event_broker
 
 class LoginAPI(Resource):
+    @rate_limiter.limit('login')
     def post(self):
         try:
             # Extract email and password from the request JSON
@@ -24,12 +31,14 @@ class LoginAPI(Resource):
                     "message": "Invalid email or password."
                 }, 401  # Unauthorized
 
-            # Check if the password is correct
-            if not user.check_password(password):
+            # Check if the password is correct; hashes made with older settings are replaced
+            if not password_hasher.verify_and_update(user, password):
                 return {
                     "status": "error",
                     "message": "Invalid email or password."
                 }, 401
+            if db.session.is_modified(user):
+                db.session.commit()
 
             # Check if the user is active
             if not user.active:
@@ -86,6 +95,12 @@ class LoginAPI(Resource):
                 "message": "User role is not defined or invalid."
             }, 400  # Bad request
 
+        except PasswordHasherBusy as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }, 503, {"Retry-After": "1"}
+
         except SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -100,6 +115,7 @@ class LoginAPI(Resource):
             }, 500
 
 class RegisterCustomerAPI(Resource):
+    @rate_limiter.limit('register')
     @jwt_required()
     def post(self):
         current_user = get_jwt_identity()
@@ -123,7 +139,7 @@ class RegisterCustomerAPI(Resource):
 
             # Create and save the user
             user = User(email=email, active=True)
-            user.password = generate_password_hash(password)
+            user.password = password_hasher.hash(password)
             role = Role.query.filter_by(name='customer').first()
             if not role:
                 role = Role(name='customer')
@@ -145,6 +161,9 @@ class RegisterCustomerAPI(Resource):
 
             return {"message": "Registration successful."}, 201
 
+        except PasswordHasherBusy as e:
+            return {"error": str(e)}, 503, {"Retry-After": "1"}
+
         except SQLAlchemyError as e:
             db.session.rollback()
             return {"error": "Database error: {}".format(str(e))}, 500
@@ -164,10 +183,15 @@ class RegisterCustomerAPI(Resource):
 
 
 class RegisterProfessionalAPI(Resource):
+    @rate_limiter.limit('register')
     @jwt_required()
     def post(self):
         current_user = get_jwt_identity()
         try:
+            # Reject oversized uploads before the multipart body is parsed
+            if request.content_length and request.content_length > document_store.max_size + 64 * 1024:
+                return {"error": "Documents may be at most {} bytes.".format(document_store.max_size)}, 413
+
             # Retrieve form fields and file
             email = request.form.get('email')
             password = request.form.get('password')
@@ -177,60 +201,226 @@ class RegisterProfessionalAPI(Resource):
             address = request.form.get('address')
             pincode = request.form.get('pincode')
             documents = request.files.get('documents')
+            # Id of a document sent beforehand through /api/uploads, as an alternative to the file field
+            document_upload_id = request.form.get('document_upload_id')
 
             # Validate required fields
             if not email or not password or not fullname or not experience:
-                return jsonify({"error": "Missing required fields."}), 400
+                return {"error": "Missing required fields."}, 400
+
+            upload = None
+            if document_upload_id:
+                upload = DocumentUpload.query.get(document_upload_id)
+                if not upload or upload.user_id != int(current_user) or upload.completed_at is None:
+                    return {"error": "Document upload not found or incomplete."}, 400
 
             # Check for existing user
             existing_user = User.query.filter_by(email=email).first()
             if existing_user:
-                return jsonify({"error": "Email already exists."}), 409
-
-            # Handle file upload (if file is uploaded)
-            if documents:
-                filename = secure_filename(documents.filename)
-                upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                documents.save(upload_path)
-            else:
-                upload_path = None  # You can set a default value if necessary
+                return {"error": "Email already exists."}, 409
 
             # Create new user
             user = User(email=email, active=True)
-            user.password = generate_password_hash(password)
+            user.password = password_hasher.hash(password)
             role = Role.query.filter_by(name='professional').first()
             if not role:
                 role = Role(name='professional')
                 db.session.add(role)
-                db.session.commit()
             user.roles.append(role)
-            db.session.add(user)
-            db.session.commit()
 
             # Create professional profile
+            service_names = parse_service_names(available_services)
             professional = Professional(
                 fullname=fullname,
-                available_services=', '.join(available_services),
+                available_services=', '.join(service_names),
                 experience=int(experience),
                 address=address,
                 pincode=pincode,
-                user_id=user.id,
-                documents_path=upload_path  # Store the file path or other info as needed
+                user=user
             )
+            # Link the offered services through professional_service
+            professional.services = services_by_name(service_names)
             db.session.add(professional)
+
+            # Documents are stored under their SHA-256, so identical files are kept once
+            document = None
+            if upload is not None:
+                document = ProfessionalDocument(
+                    professional=professional,
+                    filename=upload.filename,
+                    path=document_store.blob_path(upload.checksum),
+                    checksum=upload.checksum,
+                    size=upload.size,
+                    content_type=upload.content_type
+                )
+            elif documents and documents.filename:
+                path, checksum, size = document_store.save(documents.stream)
+                document = ProfessionalDocument(
+                    professional=professional,
+                    filename=secure_filename(documents.filename) or 'document',
+                    path=path,
+                    checksum=checksum,
+                    size=size,
+                    content_type=documents.mimetype
+                )
+            if document is not None:
+                professional.documents = document.path
+                db.session.add(document)
+
+            # User, role, profile and document record in one transaction
             db.session.commit()
 
-            # Return a proper JSON response with a 201 status code
-            return jsonify({"message": "Registration successful. Awaiting admin approval."}), 201
+            try:
+                # Celery is imported on the first registration rather than at startup
+                from backend.tasks import enqueue, process_professional_document, notify_admins_of_registration
+
+                if document is not None:
+                    enqueue(process_professional_document, document.id)
+                enqueue(notify_admins_of_registration, professional.id)
+            except Exception as e:
+                # The registration stands; pending documents can be reprocessed with flask process-documents
+                current_app.logger.warning("Could not enqueue registration tasks: %s", e)
+
+            return {"message": "Registration successful. Awaiting admin approval."}, 201
+
+        except UploadTooLarge as e:
+            db.session.rollback()
+            return {"error": str(e)}, 413
+
+        except PasswordHasherBusy as e:
+            db.session.rollback()
+            return {"error": str(e)}, 503, {"Retry-After": "1"}
 
         except SQLAlchemyError as e:
             db.session.rollback()
-            return jsonify({"error": "Database error: {}".format(str(e))}), 500
+            return {"error": "Database error: {}".format(str(e))}, 500
 
         except Exception as e:
-            # Return the error as JSON
-            return jsonify({"error": "An unexpected error occurred: {}".format(str(e))}), 500
+            db.session.rollback()
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
 
     def get(self):
-        return jsonify({"message": "This endpoint supports POST requests to register a professional."}), 200
-    
+        return {"message": "This endpoint supports POST requests to register a professional."}, 200
+
+
+####------------------------------------Document Upload API------------------------------------####
+
+
+def upload_status(upload):
+    received = upload.size if upload.completed_at else document_store.received(upload.id)
+    return {
+        "upload_id": upload.id,
+        "offset": received,
+        "size": upload.size,
+        "complete": upload.completed_at is not None,
+        "checksum": upload.checksum
+    }
+
+
+class DocumentUploadAPI(Resource):
+    @jwt_required()
+    def post(self):
+        current_user = get_jwt_identity()
+        try:
+            # Start a resumable upload; the file is then sent in chunks to /uploads/<upload_id>
+            data = request.get_json()
+            filename = secure_filename(data.get('filename') or '')
+            size = data.get('size')
+
+            if not filename or not isinstance(size, int) or size <= 0:
+                return {"error": "A filename and a positive size are required."}, 400
+            if size > document_store.max_size:
+                return {"error": "Documents may be at most {} bytes.".format(document_store.max_size)}, 413
+
+            upload = DocumentUpload(
+                user_id=int(current_user),
+                filename=filename,
+                size=size,
+                content_type=data.get('content_type')
+            )
+            db.session.add(upload)
+            db.session.commit()
+
+            return upload_status(upload), 201
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+class DocumentUploadChunkAPI(Resource):
+    @jwt_required()
+    def get(self, upload_id):
+        # Where to resume an interrupted upload
+        upload = DocumentUpload.query.get(upload_id)
+        if not upload or upload.user_id != int(get_jwt_identity()):
+            return {"error": "Upload not found."}, 404
+        return upload_status(upload), 200
+
+    @jwt_required()
+    def put(self, upload_id):
+        current_user = get_jwt_identity()
+        try:
+            upload = DocumentUpload.query.get(upload_id)
+            if not upload or upload.user_id != int(current_user):
+                return {"error": "Upload not found."}, 404
+            if upload.completed_at is not None:
+                return upload_status(upload), 200
+
+            try:
+                offset = parse_content_range(request.headers.get('Content-Range'), upload.size)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # The body is streamed to disk in DOCUMENT_CHUNK_SIZE pieces
+            try:
+                received = document_store.append(upload.id, offset, request.stream, upload.size)
+            except UploadOffsetMismatch as e:
+                return {"error": str(e), "offset": e.offset}, 409
+            except UploadTooLarge as e:
+                return {"error": str(e)}, 413
+
+            if received == upload.size:
+                path, checksum = document_store.finish(upload.id)
+                upload.checksum = checksum
+                upload.completed_at = datetime.now(timezone.utc)
+                db.session.commit()
+
+            return upload_status(upload), 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+### ------------------------------- live updates -----------------------------###
+
+class BookingStreamAPI(Resource):
+    # EventSource cannot set headers, so the token may also come as ?jwt=
+    @role_required('admin', 'customer', 'professional', locations=['headers', 'query_string'])
+    def get(self):
+        identity = current_identity()
+        topics = set()
+        if 'admin' in identity.roles:
+            topics.add('admin')
+        if identity.customer_id:
+            topics.add('customer:{}'.format(identity.customer_id))
+        if identity.professional_id:
+            topics.add('professional:{}'.format(identity.professional_id))
+
+        subscription = event_broker.subscribe(topics)
+        if subscription is None:
+            return {"error": "Too many open streams; try again shortly."}, 503, {"Retry-After": "5"}
+
+        # The body is written after the request context ends, so the stream holds no database connection
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        response = Response(event_broker.stream(subscription, last_event_id), mimetype='text/event-stream',
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+        return response
@@ -6,12 +6,17 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from werkzeug.security import generate_password_hash
 import os
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+from backend.auth import role_required, current_identity
+from backend.routing import replica_reads
+from backend.dispatch import dispatcher
+from backend.pagination import parse_limit, parse_date, encode_cursor, decode_datetime_cursor
 
 ## block and unblock customer by admin
 class AdminBlockCustomer(Resource):
-    @jwt_required()
+    @role_required('admin')
     def put(self, customer_id):
         try:
             customer = Customer.query.get(customer_id)
@@ -29,7 +34,7 @@ class AdminBlockCustomer(Resource):
             return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
 
 class AdminUnblockCustomer(Resource):
-    @jwt_required()
+    @role_required('admin')
     def put(self, customer_id):
         try:
             customer = Customer.query.get(customer_id)
@@ -49,34 +54,39 @@ class AdminUnblockCustomer(Resource):
 
 ### full customer api 
 class CustomerBookServiceAPI(Resource):
-    @jwt_required()
+    @role_required('customer')
     def post(self, service_id):
         try:
-            current_user = get_jwt_identity()
-
-            # Check if the user is a customer
-            user = User.query.get(current_user)
-            if not user or not any(role.name == "customer" for role in user.roles):
-                return {"error": "Unauthorized access."}, 403
+            # Get the customer profile resolved by role_required
+            customer_id = current_identity().customer_id
+            if not customer_id:
+                return {"error": "Customer not found."}, 404
 
             # Get the service (returns 404 automatically if not found)
             service = Service.query.get_or_404(service_id)
 
-            # Get the customer
-            customer = Customer.query.filter_by(user_id=user.id).first()
-            if not customer:
-                return {"error": "Customer not found."}, 404
-
             # Create a new service request
             new_request = ServiceRequest(
                 service_id=service.id,
-                customer_id=customer.id,
+                customer_id=customer_id,
+                # Copied in the INSERT itself; the job board lists open requests by pincode
+                pincode=db.session.query(Customer.pincode).filter(Customer.id == customer_id).scalar_subquery(),
                 service_status='requested'
             )
             db.session.add(new_request)
             db.session.commit()
 
-            return {"message": "Service requested successfully."}, 201
+            # Try to assign a professional straight away; anything left unassigned is picked up by the batch dispatcher
+            professional_id = None
+            if current_app.config.get('DISPATCH_ON_BOOKING', True):
+                try:
+                    assigned = dispatcher.dispatch([new_request.id])["assigned"]
+                    professional_id = assigned[0][1] if assigned else None
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    current_app.logger.warning("Dispatch failed for request %s: %s", new_request.id, e)
+
+            return {"message": "Service requested successfully.", "professional_id": professional_id}, 201
 
         except SQLAlchemyError as e:
             db.session.rollback()  # Ensure rollback on any DB error
@@ -89,49 +99,79 @@ class CustomerBookServiceAPI(Resource):
 
 
 class CustomerBookHistoryAPI(Resource):
-    @jwt_required()
+    @role_required('customer')
+    @replica_reads
     def get(self):
         try:
-            current_user = get_jwt_identity()
-            print("user id:", current_user)
-
-            # Check if the user is a customer
-            user = User.query.get(current_user)
-            if not user or not any(role.name == "customer" for role in user.roles):
-                return {"error": "Unauthorized access."}, 403
-
-            # Get the customer
-            customer = Customer.query.filter_by(user_id=user.id).first()
-            if not customer:
+            # Get the customer profile resolved by role_required
+            customer_id = current_identity().customer_id
+            if not customer_id:
                 return {"error": "Customer not found."}, 404
 
-            # Fetch all service bookings for the customer
-            all_bookings = ServiceRequest.query.filter_by(customer_id=customer.id).all()
+            # Retrieve pagination and filter parameters
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                after = request.args.get('after')
+                status = request.args.get('status', '').strip()
+                date_from = parse_date(request.args.get('from'))
+                date_to = parse_date(request.args.get('to'), end_of_day=True)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Load the service, professional and professional's user in the same round trip
+            query = ServiceRequest.query.options(
+                joinedload(ServiceRequest.service),
+                joinedload(ServiceRequest.professional).joinedload(Professional.user)
+            ).filter(ServiceRequest.customer_id == customer_id)
+
+            if status:
+                query = query.filter(ServiceRequest.service_status == status)
+            if date_from:
+                query = query.filter(ServiceRequest.date_of_request >= date_from)
+            if date_to:
+                query = query.filter(ServiceRequest.date_of_request < date_to)
+
+            # Keyset pagination on (date_of_request, id), newest first
+            if after:
+                try:
+                    after_date, after_id = decode_datetime_cursor(after)
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+                query = query.filter(or_(
+                    ServiceRequest.date_of_request < after_date,
+                    and_(ServiceRequest.date_of_request == after_date, ServiceRequest.id < after_id)
+                ))
+
+            page = query.order_by(ServiceRequest.date_of_request.desc(), ServiceRequest.id.desc())\
+                .limit(limit + 1)\
+                .all()
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(page[-1].date_of_request, page[-1].id)
 
             bookings = []
-            for booking in all_bookings:
-                service = Service.query.get(booking.service_id)
-                professional = Professional.query.get(booking.professional_id) if booking.professional_id else None
-                user = professional.user if professional else None
+            for booking in page:
+                service = booking.service
+                professional = booking.professional
+                professional_user = professional.user if professional else None
 
                 # Convert datetime to string if they exist
                 date_of_request = booking.date_of_request.strftime('%Y-%m-%d %H:%M:%S') if booking.date_of_request else None
                 date_of_completion = booking.date_of_completion.strftime('%Y-%m-%d %H:%M:%S') if booking.date_of_completion else None
 
                 bookings.append({
+                    "id": booking.id,
                     "service_name": service.name if service else "Unknown",
                     "service_description": service.description if service else "N/A",
                     "status": booking.service_status,
                     "date_of_request": date_of_request,
                     "date_of_completion": date_of_completion,
+                    "professional_id": booking.professional_id,
                     "professional_name": professional.fullname if professional else "Not Assigned",
-                    "professional_email": user.email if user else "N/A"
+                    "professional_email": professional_user.email if professional_user else "N/A"
                 })
-            return {"bookings": bookings}, 200
+            return {"bookings": bookings, "next_cursor": next_cursor}, 200
         except Exception as e:
             return {"error": f"An unexpected error occurred: {str(e)}"}, 500
-
-
-
-        
-
@@ -0,0 +1,267 @@
+import heapq
+from datetime import datetime, timezone
+from flask_restful import Resource, request
+from sqlalchemy import update, and_, or_, literal_column, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from backend.models import db, Professional, Service, ServiceRequest, Customer, professional_services, service_request_rejections
+from backend.auth import role_required, current_identity
+from backend.routing import replica_reads
+from backend.cache import response_cache
+from backend.events import event_broker, booking_event
+from backend.dispatch import dispatcher, PENDING_STATUS, ASSIGNED_STATUS, ACCEPTED_STATUS, IN_PROGRESS_STATUS, COMPLETED_STATUS, OPEN_STATUSES
+from backend.pagination import parse_limit, encode_cursor, decode_datetime_cursor
+
+# Inlined rather than bound, so the planner can match ix_service_request_open's WHERE clause
+OPEN_REQUEST = literal_column("'{}'".format(PENDING_STATUS))
+
+
+def _format_date(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+def _approved_professional():
+    # (id, pincode) of the signed-in professional, or None if they may not take jobs
+    professional_id = current_identity().professional_id
+    if not professional_id:
+        return None
+    return db.session.query(Professional.id, Professional.pincode)\
+        .filter(Professional.id == professional_id, Professional.is_approved == True)\
+        .first()
+
+
+### ------------------------------- job board -----------------------------###
+
+class ProfessionalJobBoardAPI(Resource):
+    @role_required('professional')
+    @replica_reads
+    def get(self):
+        try:
+            professional = _approved_professional()
+            if not professional:
+                return {"error": "Professional is not approved to take jobs."}, 403
+
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                after = request.args.get('after')
+                after_date, after_id = decode_datetime_cursor(after) if after else (None, None)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            services = dict(db.session.query(Service.id, Service.name)
+                            .join(professional_services, professional_services.c.service_id == Service.id)
+                            .filter(professional_services.c.professional_id == professional.id)
+                            .all())
+
+            # One range scan of the open-request index per service, oldest first, merged here
+            pages = []
+            for service_id in services:
+                query = db.session.query(ServiceRequest.id, ServiceRequest.service_id, ServiceRequest.date_of_request)\
+                    .filter(ServiceRequest.service_id == service_id,
+                            ServiceRequest.pincode == professional.pincode,
+                            ServiceRequest.professional_id == None,
+                            ServiceRequest.service_status == OPEN_REQUEST)
+                if after:
+                    query = query.filter(or_(
+                        ServiceRequest.date_of_request > after_date,
+                        and_(ServiceRequest.date_of_request == after_date, ServiceRequest.id > after_id)
+                    ))
+                pages.append(query.order_by(ServiceRequest.date_of_request, ServiceRequest.id).limit(limit + 1).all())
+
+            page = list(heapq.merge(*pages, key=lambda row: (row.date_of_request, row.id)))[:limit + 1]
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(page[-1].date_of_request, page[-1].id)
+
+            # Customer details are only shown once the job is accepted
+            jobs = [{
+                "id": row.id,
+                "service_id": row.service_id,
+                "service_name": services[row.service_id],
+                "pincode": professional.pincode,
+                "date_of_request": _format_date(row.date_of_request)
+            } for row in page]
+            return {"jobs": jobs, "next_cursor": next_cursor}, 200
+
+        except SQLAlchemyError as e:
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+class ProfessionalRequestsAPI(Resource):
+    @role_required('professional')
+    @replica_reads
+    def get(self):
+        try:
+            professional_id = current_identity().professional_id
+            if not professional_id:
+                return {"error": "Professional not found."}, 404
+
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                after = request.args.get('after')
+                status = request.args.get('status', '').strip()
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            query = ServiceRequest.query.options(
+                joinedload(ServiceRequest.service),
+                joinedload(ServiceRequest.customer).joinedload(Customer.user)
+            ).filter(ServiceRequest.professional_id == professional_id)
+            if status:
+                query = query.filter(ServiceRequest.service_status == status)
+
+            # Keyset pagination on (date_of_request, id), newest first
+            if after:
+                try:
+                    after_date, after_id = decode_datetime_cursor(after)
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+                query = query.filter(or_(
+                    ServiceRequest.date_of_request < after_date,
+                    and_(ServiceRequest.date_of_request == after_date, ServiceRequest.id < after_id)
+                ))
+
+            page = query.order_by(ServiceRequest.date_of_request.desc(), ServiceRequest.id.desc())\
+                .limit(limit + 1)\
+                .all()
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(page[-1].date_of_request, page[-1].id)
+
+            requests = []
+            for service_request in page:
+                service = service_request.service
+                customer = service_request.customer
+                requests.append({
+                    "id": service_request.id,
+                    "service_name": service.name if service else "Unknown",
+                    "status": service_request.service_status,
+                    "date_of_request": _format_date(service_request.date_of_request),
+                    "date_of_completion": _format_date(service_request.date_of_completion),
+                    "customer_name": customer.fullname if customer else "N/A",
+                    "customer_email": customer.user.email if customer and customer.user else "N/A",
+                    "address": customer.address if customer else "N/A",
+                    "pincode": service_request.pincode,
+                    "remarks": service_request.remarks
+                })
+            return {"requests": requests, "next_cursor": next_cursor}, 200
+
+        except SQLAlchemyError as e:
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
+
+
+### ------------------------------- request actions -----------------------------###
+
+class ProfessionalRequestActionAPI(Resource):
+    """Accept, reject, start or complete a service request.
+
+    Each action is one conditional UPDATE, so of two professionals accepting
+    the same open request exactly one changes the row; the other gets 409.
+    The open-request cap is part of the accept UPDATE too, so concurrent
+    accepts by one professional cannot overshoot it.
+    """
+
+    @staticmethod
+    def open_requests(professional_id, request_id):
+        # The professional's open requests other than this one, as a scalar subquery
+        others = ServiceRequest.__table__.alias('others')
+        return db.select(func.count()).select_from(others)\
+            .where(others.c.professional_id == professional_id,
+                   others.c.service_status.in_(OPEN_STATUSES),
+                   others.c.id != request_id)\
+            .scalar_subquery()
+
+    @classmethod
+    def transition(cls, action, professional_id, request_id):
+        # Returns (condition the row must meet, values to set)
+        table = ServiceRequest.__table__
+        mine = table.c.professional_id == professional_id
+        if action == 'accept':
+            # An open request for a service I offer, or one the dispatcher assigned to me
+            offered = table.c.service_id.in_(
+                db.select(professional_services.c.service_id)
+                .where(professional_services.c.professional_id == professional_id)
+            )
+            open_request = and_(table.c.professional_id == None, table.c.service_status == PENDING_STATUS, offered)
+            # The same cap the dispatcher applies when assigning
+            under_cap = cls.open_requests(professional_id, request_id) < dispatcher.max_open_requests
+            return and_(or_(open_request, and_(mine, table.c.service_status == ASSIGNED_STATUS)), under_cap), \
+                {"professional_id": professional_id, "service_status": ACCEPTED_STATUS}
+        if action == 'reject':
+            # Back on the board for others
+            return and_(mine, table.c.service_status == ASSIGNED_STATUS), \
+                {"professional_id": None, "service_status": PENDING_STATUS}
+        if action == 'start':
+            return and_(mine, table.c.service_status == ACCEPTED_STATUS), \
+                {"service_status": IN_PROGRESS_STATUS}
+        if action == 'complete':
+            return and_(mine, table.c.service_status == IN_PROGRESS_STATUS), \
+                {"service_status": COMPLETED_STATUS, "date_of_completion": datetime.now(timezone.utc)}
+        return None, None
+
+    @role_required('professional')
+    def put(self, request_id, action):
+        try:
+            professional = _approved_professional()
+            if not professional:
+                return {"error": "Professional is not approved to take jobs."}, 403
+
+            condition, values = self.transition(action, professional.id, request_id)
+            if condition is None:
+                return {"error": "Unknown action '{}'. Use accept, reject, start or complete.".format(action)}, 400
+
+            table = ServiceRequest.__table__
+            updated = db.session.execute(
+                update(table).where(table.c.id == request_id).where(condition).values(**values).returning(table.c.customer_id)
+            ).first()
+            if updated is None:
+                db.session.rollback()
+                current = db.session.query(ServiceRequest.professional_id, ServiceRequest.service_status)\
+                    .filter(ServiceRequest.id == request_id)\
+                    .first()
+                if current is None:
+                    return {"error": "Service request not found."}, 404
+                if current.professional_id not in (None, professional.id):
+                    return {"error": "Service request has been taken by another professional."}, 409
+                if action == 'accept' and current.service_status in (PENDING_STATUS, ASSIGNED_STATUS):
+                    open_requests = db.session.execute(db.select(self.open_requests(professional.id, request_id))).scalar()
+                    if open_requests >= dispatcher.max_open_requests:
+                        return {"error": "You already have {} open requests.".format(open_requests)}, 409
+                return {"error": "Cannot {} a request that is {}.".format(action, current.service_status)}, 409
+
+            if action == 'reject':
+                # Remembered so the dispatcher does not hand it straight back
+                insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+                db.session.execute(insert(service_request_rejections)
+                                   .values(service_request_id=request_id, professional_id=professional.id)
+                                   .on_conflict_do_nothing())
+            db.session.commit()
+
+            # Core UPDATEs skip the session hooks: refresh this professional's load, drop cached responses, notify streams
+            dispatcher.mark_stale([professional.id])
+            response_cache.invalidate_tags(['service_request', 'service_request:{}'.format(request_id)])
+            event_broker.publish([booking_event(request_id, updated.customer_id, values.get("professional_id", professional.id),
+                                                values["service_status"], previous_professional_id=professional.id)])
+
+            return {"message": "Service request {}.".format({
+                'accept': ACCEPTED_STATUS, 'reject': 'rejected', 'start': 'started', 'complete': COMPLETED_STATUS
+            }[action]), "status": values["service_status"]}, 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {"error": "Database error: {}".format(str(e))}, 500
+
+        except Exception as e:
+            db.session.rollback()
+            return {"error": "An unexpected error occurred: {}".format(str(e))}, 500
@@ -0,0 +1,77 @@
+# backend/routing.py
+from functools import wraps
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from backend.cache import TTLCache
+
+# SQLALCHEMY_BINDS key of the read replica; without it every query uses the primary
+REPLICA_BIND = 'replica'
+
+# User id -> True while that user's reads stay on the primary after a write (read-your-writes)
+primary_pinned = TTLCache(maxsize=100000, ttl=5)
+
+
+def init_app(app):
+    primary_pinned.configure(ttl=app.config.get('READ_YOUR_WRITES_SECONDS', 5))
+
+
+def _request_user_id():
+    identity = g.get('auth_identity')
+    if identity:
+        return identity.user_id
+    try:
+        user_id = get_jwt_identity()
+    except Exception:
+        return None
+    return int(user_id) if user_id else None
+
+
+def replica_reads(fn):
+    """Send the SELECTs of a read-only resource method to the replica.
+
+    Apply below role_required/jwt_required, so identity lookups stay on the
+    primary. Callers who wrote within READ_YOUR_WRITES_SECONDS read from the
+    primary instead.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        user_id = _request_user_id()
+        g.replica_reads = not (user_id and primary_pinned.get(user_id))
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            g.replica_reads = False
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Session that routes SELECTs to the replica inside ``replica_reads`` and everything else to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or (clause is not None and not getattr(clause, 'is_select', False)):
+                # Flushes, DML and raw SQL; later reads in this session must see them
+                self.info['db_wrote'] = True
+            elif clause is not None and self._use_replica():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        return has_request_context() and g.get('replica_reads', False) and not self.info.get('db_wrote')
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_writer_to_primary(session):
+    if session.info.pop('db_wrote', False) and has_request_context():
+        user_id = _request_user_id()
+        if user_id:
+            primary_pinned.set(user_id, True)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_write_marker(session):
+    session.info.pop('db_wrote', None)
@@ -0,0 +1,201 @@
+# backend/search.py
+import re
+from sqlalchemy import event, text, select, literal_column, or_, and_
+from sqlalchemy.exc import OperationalError
+from backend.db import db
+
+# One FTS5 table indexes every searchable entity. The rowid encodes both the entity
+# kind and its primary key (id * 4 + kind code) so triggers can update a single
+# document by rowid instead of scanning the index.
+KIND_CODES = {'service': 1, 'professional': 2, 'customer': 3}
+
+_USER_EMAIL = "ifnull((SELECT email FROM user WHERE id = {row}.user_id), '')"
+
+# Text indexed for each entity, written in terms of a row alias
+_CONTENT = {
+    'service': "{row}.name || ' ' || {row}.description || ' ' || ifnull({row}.time_required, '')",
+    'professional': "{row}.fullname || ' ' || ifnull({row}.available_services, '') || ' ' || {row}.address || ' ' || {row}.pincode || ' ' || " + _USER_EMAIL,
+    'customer': "{row}.fullname || ' ' || {row}.address || ' ' || {row}.pincode || ' ' || " + _USER_EMAIL,
+}
+
+
+def _rowid(kind, row):
+    return f"{row}.id * 4 + {KIND_CODES[kind]}"
+
+
+def _upsert_document(kind, row):
+    return f"INSERT OR REPLACE INTO search_index(rowid, content) VALUES ({_rowid(kind, row)}, {_CONTENT[kind].format(row=row)});"
+
+
+def _search_index_ddl():
+    statements = ["CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(content, prefix='2 3')"]
+    for kind in KIND_CODES:
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{kind}_ai AFTER INSERT ON {kind} BEGIN
+                {_upsert_document(kind, 'new')}
+            END""")
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{kind}_au AFTER UPDATE ON {kind} BEGIN
+                DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old')};
+                {_upsert_document(kind, 'new')}
+            END""")
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{kind}_ad AFTER DELETE ON {kind} BEGIN
+                DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old')};
+            END""")
+
+    # Professionals and customers are also searchable by their account email
+    statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS search_user_email_au AFTER UPDATE OF email ON user BEGIN
+            INSERT OR REPLACE INTO search_index(rowid, content)
+                SELECT {_rowid('professional', 'p')}, {_CONTENT['professional'].format(row='p')} FROM professional p WHERE p.user_id = new.id;
+            INSERT OR REPLACE INTO search_index(rowid, content)
+                SELECT {_rowid('customer', 'c')}, {_CONTENT['customer'].format(row='c')} FROM customer c WHERE c.user_id = new.id;
+        END""")
+    return statements
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_search_index(target, connection, **kw):
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        for statement in _search_index_ddl():
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        # SQLite was built without FTS5; searches fall back to LIKE filters
+        pass
+
+
+def drop_search_index(connection):
+    # Triggers go with their tables
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
+
+
+def drop_search_triggers(connection):
+    # For migrations rebuilding a table the triggers read; create_search_index puts them back
+    if connection.dialect.name != 'sqlite':
+        return
+    names = ['search_{}_{}'.format(kind, action) for kind in KIND_CODES for action in ('ai', 'au', 'ad')]
+    for name in names + ['search_user_email_au']:
+        connection.exec_driver_sql("DROP TRIGGER IF EXISTS {}".format(name))
+
+
+def rebuild_search_index():
+    # Repopulate the whole index, e.g. for a database created before the index existed
+    db.session.execute(text("DELETE FROM search_index"))
+    for kind in KIND_CODES:
+        db.session.execute(text(
+            f"INSERT INTO search_index(rowid, content) SELECT {_rowid(kind, 't')}, {_CONTENT[kind].format(row='t')} FROM {kind} t"
+        ))
+    db.session.commit()
+    return db.session.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+
+_fts_status = {}
+
+
+def fts_enabled():
+    engine = db.engine
+    if engine not in _fts_status:
+        enabled = False
+        if engine.dialect.name == 'sqlite':
+            try:
+                with engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT rowid FROM search_index LIMIT 0")
+                enabled = True
+            except OperationalError:
+                enabled = False
+        _fts_status[engine] = enabled
+    return _fts_status[engine]
+
+
+### ------------------------------- query parsing -----------------------------###
+
+def parse_bool(value):
+    value = value.strip().lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError("Expected true or false, got '{}'.".format(value))
+
+
+_FIELD_FILTER = re.compile(r'^(\w+)(>=|<=|:|=|>|<)(.+)$')
+
+_OPERATORS = {
+    ':': lambda column, value: column == value,
+    '=': lambda column, value: column == value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+}
+
+
+def parse_search(search_term, typed_fields):
+    """Split a search string into free-text terms and typed column filters.
+
+    ``typed_fields`` maps a field name to ``(column, converter)``, so that e.g.
+    ``price>=100 is_approved:true plumb`` becomes the comparisons
+    ``price >= 100.0`` and ``is_approved == True`` plus the text term ``plumb``.
+    A trailing ``*`` on a text field (``pincode:5600*``) matches a prefix.
+    """
+    terms = []
+    filters = []
+    for token in search_term.split():
+        match = _FIELD_FILTER.match(token)
+        if match and match.group(1).lower() in typed_fields:
+            field, operator, raw_value = match.groups()
+            column, converter = typed_fields[field.lower()]
+            if converter is parse_bool and operator not in (':', '='):
+                raise ValueError("Field '{}' only supports equality.".format(field))
+            # pincode:5600* matches a prefix of a text field
+            if converter is str and operator == ':' and raw_value.endswith('*') and len(raw_value) > 1:
+                filters.append(prefix_filter(column, raw_value[:-1]))
+                continue
+            try:
+                value = converter(raw_value)
+            except ValueError:
+                raise ValueError("Invalid value for '{}': '{}'.".format(field, raw_value))
+            filters.append(_OPERATORS[operator](column, value))
+        else:
+            terms.append(token)
+    return terms, filters
+
+
+def _match_expression(terms):
+    # Every term must match (implicit AND); each is a quoted prefix query so user input cannot inject FTS syntax
+    return ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms if term.replace('"', ''))
+
+
+def apply_text_search(query, kind, model, terms, fallback_columns):
+    """Restrict ``query`` to rows of ``model`` matching all ``terms``, best matches first."""
+    terms = [term for term in terms if term.strip()]
+    if not terms:
+        return query
+
+    expression = _match_expression(terms)
+    if expression and fts_enabled():
+        matches = select(
+            literal_column('rowid >> 2').label('ref_id'),
+            literal_column('rank').label('rank')
+        ).select_from(text('search_index'))\
+            .where(text('search_index MATCH :match_expression').bindparams(match_expression=expression))\
+            .where(literal_column('rowid & 3') == KIND_CODES[kind])\
+            .subquery()
+        return query.join(matches, model.id == matches.c.ref_id).order_by(matches.c.rank)
+
+    # Without FTS5, fall back to substring matching
+    for term in terms:
+        query = query.filter(or_(*[column.ilike(f'%{term}%') for column in fallback_columns]))
+    return query
+
+
+def prefix_filter(column, prefix):
+    # Range form of "column LIKE 'prefix%'" which an ordinary b-tree index can serve
+    if not prefix:
+        return None
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
@@ -0,0 +1,31 @@
+# backend/seed.py
+from flask_security import SQLAlchemyUserDatastore
+from backend.db import db
+from backend.models import User, Role
+
+ADMIN_EMAIL = 'admin@gmail.com'
+ADMIN_PASSWORD = 'adminpassword'
+
+
+def seed_data():
+    """Create the roles and the default admin user if they are missing; returns True if the admin was created."""
+    datastore = SQLAlchemyUserDatastore(db, User, Role)
+
+    # Create roles
+    admin_role = datastore.find_or_create_role(name='admin', description='Superuser')
+    datastore.find_or_create_role(name='customer', description='Customer user')
+    datastore.find_or_create_role(name='professional', description='Professional user')
+
+    created = False
+    if not datastore.find_user(email=ADMIN_EMAIL):
+        admin_user = datastore.create_user(
+            email=ADMIN_EMAIL,
+            roles=[admin_role],
+            active=True
+        )
+        admin_user.set_password(ADMIN_PASSWORD)
+        created = True
+
+    # Roles and admin in one commit
+    db.session.commit()
+    return created
@@ -0,0 +1,117 @@
+# backend/service_import.py
+import csv
+import io
+import json
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.db import db
+from backend.models import Service
+from backend.cache import response_cache
+from backend.pagination import row_count_cache
+
+IMPORT_BATCH_SIZE = 500
+
+# Row-level errors beyond this are counted but not listed
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+def read_rows(stream, import_format):
+    """Yield (line number, dict) from a CSV (with header) or NDJSON byte stream, one line at a time."""
+    lines = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def validate_row(row):
+    """Return the insert values for a row or raise ValueError naming the problem."""
+    if row is None:
+        raise ValueError("Not a JSON object.")
+    name = str(row.get('name') or '').strip().lower()
+    description = str(row.get('description') or '').strip()
+    time_required = str(row.get('time_required') or '').strip()
+    if not name or len(name) > 100:
+        raise ValueError("name is required and at most 100 characters.")
+    if not description or len(description) > 255:
+        raise ValueError("description is required and at most 255 characters.")
+    if not time_required or len(time_required) > 50:
+        raise ValueError("time_required is required and at most 50 characters.")
+    try:
+        price = float(row.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError("price must be a number.")
+    if price < 0:
+        raise ValueError("price cannot be negative.")
+    return {"name": name, "description": description, "price": price, "time_required": time_required}
+
+
+def _upsert(batch):
+    # Later rows for the same name win; one statement cannot update a row twice
+    values = list({row["name"]: row for row in batch}.values())
+    existing = set(db.session.execute(
+        select(Service.name).where(Service.name.in_([row["name"] for row in values]))
+    ).scalars())
+
+    insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(Service).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Service.name],
+        set_={
+            "description": statement.excluded.description,
+            "price": statement.excluded.price,
+            "time_required": statement.excluded.time_required,
+        }
+    ).returning(Service.id)
+    ids = db.session.execute(statement).scalars().all()
+    created = len(values) - len(existing)
+    return ids, created, len(existing)
+
+
+def import_services(stream, import_format):
+    """Validate and upsert services from ``stream`` in batches, in one transaction.
+
+    Returns a report with created/updated counts and the rejected rows.
+    """
+    report = {"created": 0, "updated": 0, "rejected": 0, "errors": []}
+    changed_ids = []
+    batch = []
+
+    def flush():
+        ids, created, updated = _upsert(batch)
+        changed_ids.extend(ids)
+        report["created"] += created
+        report["updated"] += updated
+        batch.clear()
+
+    for line_number, row in read_rows(stream, import_format):
+        try:
+            batch.append(validate_row(row))
+        except ValueError as e:
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line_number, "error": str(e)})
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    db.session.commit()
+
+    # Core statements skip the session hooks that keep these caches in step
+    response_cache.invalidate_tags(['service'] + ['service:{}'.format(service_id) for service_id in changed_ids])
+    if report["created"]:
+        row_count_cache.incr(Service.__tablename__, report["created"])
+    return report
@@ -0,0 +1,157 @@
+# backend/storage.py
+import hashlib
+import os
+import tempfile
+import threading
+from backend.documents import file_checksum
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class UploadOffsetMismatch(ValueError):
+    def __init__(self, offset):
+        super().__init__("Upload is at offset {}.".format(offset))
+        self.offset = offset
+
+
+def parse_content_range(header, total_size):
+    """Return the start offset from a ``Content-Range: bytes start-end/total`` header.
+
+    A missing header means the whole file is sent in one request.
+    """
+    if not header:
+        return 0
+    try:
+        unit, _, spec = header.partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, _, end = byte_range.partition('-')
+        start, end = int(start), int(end)
+    except ValueError:
+        raise ValueError("Invalid Content-Range header.")
+    if unit != 'bytes' or start > end or (total != '*' and int(total) != total_size) or end >= total_size:
+        raise ValueError("Content-Range does not match the upload size of {} bytes.".format(total_size))
+    return start
+
+
+class DocumentStore:
+    """Content-addressed file store for uploaded documents.
+
+    Blobs live at ``<root>/ab/cd/<sha256>`` so identical files are stored once.
+    Uploads are copied ``chunk_size`` bytes at a time and hashed on the way,
+    either in one request (``save``) or across several (``append``/``finish``)
+    with the partial file under ``<partial_root>``.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.partial_root = None
+        self.chunk_size = 64 * 1024
+        self.max_size = 10 * 1024 * 1024
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def init_app(self, app):
+        upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+        self.root = os.path.join(upload_folder, 'blobs')
+        self.partial_root = os.path.join(upload_folder, 'partial')
+        self.chunk_size = app.config.get('DOCUMENT_CHUNK_SIZE', 64 * 1024)
+        self.max_size = app.config.get('DOCUMENT_MAX_SIZE', 10 * 1024 * 1024)
+        os.makedirs(self.root, exist_ok=True)
+        os.makedirs(self.partial_root, exist_ok=True)
+
+    def blob_path(self, checksum):
+        return os.path.join(self.root, checksum[:2], checksum[2:4], checksum)
+
+    def _copy(self, stream, f, limit, digest=None):
+        # Never holds more than one chunk of the upload in memory
+        copied = 0
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                return copied
+            copied += len(chunk)
+            if copied > limit:
+                raise UploadTooLarge("Documents may be at most {} bytes.".format(self.max_size))
+            f.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+
+    def _commit(self, temp_path, checksum):
+        path = self.blob_path(checksum)
+        if os.path.exists(path):
+            # Same content already stored
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return path
+
+    def save(self, stream):
+        """Store a whole upload from a file-like object; returns (path, checksum, size)."""
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.partial_root)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                size = self._copy(stream, f, self.max_size, digest)
+            checksum = digest.hexdigest()
+            return self._commit(temp_path, checksum), checksum, size
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    ### ------------------------------- resumable uploads -----------------------------###
+
+    def partial_path(self, upload_id):
+        return os.path.join(self.partial_root, upload_id)
+
+    def received(self, upload_id):
+        # The partial file itself records how far an upload got, so it survives restarts
+        try:
+            return os.path.getsize(self.partial_path(upload_id))
+        except OSError:
+            return 0
+
+    def _lock(self, upload_id):
+        with self._locks_lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def append(self, upload_id, offset, stream, total_size):
+        """Append a chunk starting at ``offset``; returns the new offset.
+
+        Raises UploadOffsetMismatch when ``offset`` is not where the upload
+        stopped, so the client can resume from the offset it reports.
+        """
+        with self._lock(upload_id):
+            received = self.received(upload_id)
+            if offset != received:
+                raise UploadOffsetMismatch(received)
+            with open(self.partial_path(upload_id), 'ab') as f:
+                try:
+                    self._copy(stream, f, total_size - offset)
+                except UploadTooLarge:
+                    # Keep the upload resumable from where this chunk started
+                    f.truncate(offset)
+                    raise UploadTooLarge("Chunk runs past the declared size of {} bytes.".format(total_size))
+            return self.received(upload_id)
+
+    def finish(self, upload_id):
+        """Move a fully received upload into the store; returns (path, checksum)."""
+        with self._lock(upload_id):
+            temp_path = self.partial_path(upload_id)
+            checksum = file_checksum(temp_path)
+            path = self._commit(temp_path, checksum)
+        with self._locks_lock:
+            self._locks.pop(upload_id, None)
+        return path, checksum
+
+    def discard(self, upload_id):
+        with self._locks_lock:
+            self._locks.pop(upload_id, None)
+        if os.path.exists(self.partial_path(upload_id)):
+            os.remove(self.partial_path(upload_id))
+
+
+document_store = DocumentStore()
@@ -0,0 +1,210 @@
+# backend/tasks.py
+import datetime as dt
+import logging
+import threading
+import time
+from collections import deque
+from celery import Celery, Task, shared_task
+from celery.signals import task_prerun, task_postrun
+from flask import current_app
+from backend.db import db
+from backend.models import User, Role, Professional, ProfessionalDocument, roles_users
+from backend.documents import is_pdf, extract_pdf_info, DocumentTooLarge, PDF_DECOMPRESSED_LIMIT
+from backend.dispatch import percentile
+
+logger = logging.getLogger(__name__)
+
+
+def init_app(app):
+    """Create the Celery app for ``app``; every task runs inside an application context.
+
+    With ``task_always_eager`` (local development) tasks run in-process when
+    enqueued, so no broker or worker is needed.
+    """
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery_app = Celery(app.name, task_cls=FlaskTask)
+    celery_app.config_from_object(app.config['CELERY'])
+    celery_app.set_default()
+    app.extensions['celery'] = celery_app
+    task_metrics.reset()
+    return celery_app
+
+
+def get_celery():
+    # Created on first use, so web workers that never enqueue do not import Celery at boot
+    app = current_app._get_current_object()
+    if 'celery' not in app.extensions:
+        init_app(app)
+    return app.extensions['celery']
+
+
+### ------------------------------- queue metrics -----------------------------###
+
+class TaskMetrics:
+    """Counts and latencies of tasks enqueued or run by this process.
+
+    ``wait`` is the time from enqueue to start (queueing delay), ``run`` the
+    execution time. With a separate worker the web process only sees its
+    enqueues; the worker logs each task's timings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.published = 0
+            self.started = 0
+            self.succeeded = 0
+            self.failed = 0
+            self._running = {}
+            self._waits = deque(maxlen=10000)
+            self._runs = deque(maxlen=10000)
+
+    def on_publish(self):
+        with self._lock:
+            self.published += 1
+
+    def on_start(self, task_id, enqueued_at):
+        now = time.time()
+        with self._lock:
+            self.started += 1
+            self._running[task_id] = now
+            if enqueued_at:
+                self._waits.append(now - enqueued_at)
+
+    def on_finish(self, task_id, succeeded):
+        now = time.time()
+        with self._lock:
+            started_at = self._running.pop(task_id, None)
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            if started_at is None:
+                return None
+            self._runs.append(now - started_at)
+        return now - started_at
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            runs = sorted(self._runs)
+            stats = {
+                "published": self.published,
+                "started": self.started,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "running": len(self._running),
+            }
+        for label, values in (("wait", waits), ("run", runs)):
+            for name, fraction in (("p50", 0.5), ("p95", 0.95)):
+                value = percentile(values, fraction)
+                stats["{}_latency_{}_ms".format(label, name)] = round(value * 1000, 2) if value is not None else None
+        return stats
+
+
+task_metrics = TaskMetrics()
+
+
+def _enqueued_at(request):
+    # Custom headers land on the request for worker-run tasks and in request.headers for eager ones
+    value = getattr(request, 'enqueued_at', None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get('enqueued_at')
+    return value
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    task_metrics.on_start(task_id, _enqueued_at(task.request))
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    duration = task_metrics.on_finish(task_id, state == 'SUCCESS')
+    if duration is not None:
+        logger.info("Task %s finished with state %s in %.1f ms", task.name, state, duration * 1000)
+
+
+def enqueue(task, *args):
+    """Send ``task`` to the queue, stamping the enqueue time used for wait latency."""
+    get_celery()
+    task_metrics.on_publish()
+    return task.apply_async(args=args, headers={'enqueued_at': time.time()})
+
+
+def queue_depth(celery_app):
+    # Messages waiting on the default queue; None when eager or the broker cannot say
+    if celery_app.conf.task_always_eager:
+        return 0
+    try:
+        with celery_app.connection_for_read() as connection:
+            queue = celery_app.conf.task_default_queue
+            return connection.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception:
+        return None
+
+
+def task_stats():
+    celery_app = get_celery()
+    stats = task_metrics.stats()
+    stats["eager"] = bool(celery_app.conf.task_always_eager)
+    stats["queue_depth"] = queue_depth(celery_app)
+    return stats
+
+
+### ------------------------------- registration tasks -----------------------------###
+
+@shared_task(ignore_result=True, autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def process_professional_document(document_id):
+    """Extract page count and text from a stored document."""
+    document = db.session.get(ProfessionalDocument, document_id)
+    if document is None or document.status == 'processed':
+        return
+
+    try:
+        # Blobs are content-addressed and immutable, so results are never stale
+        if is_pdf(document.path):
+            document.content_type = 'application/pdf'
+            document.page_count, document.text_excerpt = extract_pdf_info(
+                document.path, current_app.config.get('DOCUMENT_MAX_DECOMPRESSED_SIZE', PDF_DECOMPRESSED_LIMIT))
+        document.status = 'processed'
+        document.processed_at = dt.datetime.now(dt.timezone.utc)
+        db.session.commit()
+
+    except OSError:
+        db.session.rollback()
+        raise
+
+    except DocumentTooLarge as e:
+        db.session.rollback()
+        logger.warning("Document %s not processed: %s", document_id, e)
+        ProfessionalDocument.query.filter_by(id=document_id).update({"status": "failed"})
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        logger.exception("Could not process document %s", document_id)
+        ProfessionalDocument.query.filter_by(id=document_id).update({"status": "failed"})
+        db.session.commit()
+
+
+@shared_task(ignore_result=True)
+def notify_admins_of_registration(professional_id):
+    """Tell admins a professional registered and is waiting for approval."""
+    professional = db.session.get(Professional, professional_id)
+    if professional is None:
+        return
+    admin_emails = [email for email, in db.session.query(User.email)
+                    .join(roles_users, roles_users.c.user_id == User.id)
+                    .join(Role, Role.id == roles_users.c.role_id)
+                    .filter(Role.name == 'admin', User.active == True)]
+    # There is no mail service configured; admins see pending approvals on the dashboard
+    logger.info("Professional %s (%s) registered and awaits approval; notifying %s",
+                professional.id, professional.fullname, ', '.join(admin_emails) or 'no admins')
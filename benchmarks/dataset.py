@@ -0,0 +1,233 @@
+# benchmarks/dataset.py
+"""Fill a database with a synthetic dataset for load tests.
+
+Rows are written with chunked executemany INSERTs, bypassing the ORM.
+Sizes default to ``--scale`` times the production-sized targets in SIZES.
+The database is the one the app is configured for (DATABASE_URL), so
+point it at a scratch file:
+
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 flask --app app init-db
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 flask --app app seed
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python -m benchmarks.dataset --scale 0.01
+
+Every synthetic user's password is BENCH_PASSWORD.
+"""
+import argparse
+import datetime as dt
+import random
+import time
+from sqlalchemy import func, insert, select
+from backend.db import db
+from backend.models import (User, Role, Customer, Professional, Service, ServiceRequest, CustomerReview,
+                            roles_users, professional_services)
+from backend.dispatch import PENDING_STATUS, ASSIGNED_STATUS, ACCEPTED_STATUS, IN_PROGRESS_STATUS, COMPLETED_STATUS
+
+# Full-size targets; --scale 1 generates these
+SIZES = {
+    "services": 2000,
+    "customers": 100000,
+    "professionals": 20000,
+    "requests": 5000000,
+    "reviews": 1000000,
+}
+BENCH_PASSWORD = 'benchpassword'
+CUSTOMER_EMAIL = 'bench-customer-{}@example.com'
+PROFESSIONAL_EMAIL = 'bench-professional-{}@example.com'
+
+# Share of requests in each status; most bookings are long finished
+STATUS_WEIGHTS = (
+    (COMPLETED_STATUS, 70),
+    (PENDING_STATUS, 5),
+    (ASSIGNED_STATUS, 5),
+    (ACCEPTED_STATUS, 10),
+    (IN_PROGRESS_STATUS, 10),
+)
+PINCODES = 500  # Distinct pincodes customers and professionals are spread over
+HISTORY_DAYS = 730
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert(table, rows, chunk_size):
+    # Chunked executemany, one commit per chunk; ``rows`` may be a generator
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert(table), chunk)
+        db.session.commit()
+        total += len(chunk)
+    return total
+
+
+def _role_id(name):
+    role_id = db.session.query(Role.id).filter(Role.name == name).scalar()
+    if role_id is None:
+        raise RuntimeError("Role '{}' is missing; run `flask --app app seed` first.".format(name))
+    return role_id
+
+
+def generate(services, customers, professionals, requests, reviews, seed=0, chunk_size=10000, log=print):
+    """Insert the given numbers of synthetic rows; returns {table: rows inserted}."""
+    from backend.passwords import password_hasher
+    from backend.ratings import rebuild_rating_stats
+
+    rng = random.Random(seed)
+    now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    password = password_hasher.hash(BENCH_PASSWORD)  # One hash shared by every synthetic user
+    pincodes = ['{:06d}'.format(560001 + i) for i in range(PINCODES)]
+    counts = {}
+
+    def timed(name, rows, table):
+        started = time.perf_counter()
+        counts[name] = _insert(table, rows, chunk_size)
+        log('{:<22} {:>10} rows in {:.1f}s'.format(name, counts[name], time.perf_counter() - started))
+
+    # Services
+    first_service = _next_id(Service)
+    service_ids = list(range(first_service, first_service + services))
+    timed('service', ({
+        "id": service_id,
+        "name": 'bench service {}'.format(service_id),
+        "description": 'Synthetic service {}'.format(service_id),
+        "price": rng.randint(100, 5000),
+        "time_required": '{} hours'.format(rng.randint(1, 8)),
+        "created_at": now,
+        "is_approved": True,
+    } for service_id in service_ids), Service.__table__)
+
+    # Users first, then their roles and profiles
+    first_user = _next_id(User)
+    customer_users = range(first_user, first_user + customers)
+    professional_users = range(first_user + customers, first_user + customers + professionals)
+    timed('user', ({
+        "id": user_id,
+        "email": (CUSTOMER_EMAIL.format(user_id) if user_id < professional_users.start else PROFESSIONAL_EMAIL.format(user_id)),
+        "password": password,
+        "fs_uniquifier": 'bench-{}'.format(user_id),
+        "active": True,
+    } for user_id in range(first_user, professional_users.stop)), User.__table__)
+
+    customer_role, professional_role = _role_id('customer'), _role_id('professional')
+    timed('roles_users', (
+        {"user_id": user_id, "role_id": customer_role if user_id < professional_users.start else professional_role}
+        for user_id in range(first_user, professional_users.stop)
+    ), roles_users)
+
+    first_customer = _next_id(Customer)
+    customer_pincodes = [rng.choice(pincodes) for _ in range(customers)]
+    timed('customer', ({
+        "id": first_customer + i,
+        "fullname": 'Bench Customer {}'.format(first_customer + i),
+        "address": '{} Bench Street'.format(i),
+        "pincode": customer_pincodes[i],
+        "is_active": True,
+        "user_id": user_id,
+    } for i, user_id in enumerate(customer_users)), Customer.__table__)
+
+    first_professional = _next_id(Professional)
+    offered = {}  # professional id -> service ids
+    for i in range(professionals):
+        offered[first_professional + i] = rng.sample(service_ids, min(len(service_ids), rng.randint(1, 3)))
+    timed('professional', ({
+        "id": first_professional + i,
+        "fullname": 'Bench Professional {}'.format(first_professional + i),
+        "available_services": '',
+        "experience": rng.randint(0, 30),
+        "address": '{} Bench Road'.format(i),
+        "pincode": rng.choice(pincodes),
+        "is_approved": rng.random() < 0.9,
+        "user_id": user_id,
+    } for i, user_id in enumerate(professional_users)), Professional.__table__)
+    timed('professional_service', (
+        {"professional_id": professional_id, "service_id": service_id}
+        for professional_id, service_ids_offered in offered.items() for service_id in service_ids_offered
+    ), professional_services)
+
+    providers = {}  # service id -> professional ids offering it
+    for professional_id, service_ids_offered in offered.items():
+        for service_id in service_ids_offered:
+            providers.setdefault(service_id, []).append(professional_id)
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+
+    def service_requests():
+        for _ in range(requests):
+            customer_index = rng.randrange(customers)
+            service_id = rng.choice(service_ids)
+            status = rng.choices(statuses, weights)[0]
+            requested_at = now - dt.timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+            professional_id = None
+            if status != PENDING_STATUS and service_id in providers:
+                professional_id = rng.choice(providers[service_id])
+            elif status != PENDING_STATUS:
+                status = PENDING_STATUS
+            yield {
+                "service_id": service_id,
+                "customer_id": first_customer + customer_index,
+                "professional_id": professional_id,
+                "pincode": customer_pincodes[customer_index],
+                "date_of_request": requested_at,
+                "date_of_completion": requested_at + dt.timedelta(days=rng.randint(1, 10)) if status == COMPLETED_STATUS else None,
+                "service_status": status,
+                "created_at": requested_at,
+                "updated_at": requested_at,
+            }
+
+    if customers and services:
+        timed('service_request', service_requests(), ServiceRequest.__table__)
+
+    if customers and professionals:
+        professional_ids = list(offered)
+        timed('customer_review', ({
+            "customer_id": first_customer + rng.randrange(customers),
+            "professional_id": rng.choice(professional_ids),
+            "review_text": 'Synthetic review',
+            "rating": rng.randint(1, 5),
+            "review_date": now - dt.timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400)),
+        } for _ in range(reviews)), CustomerReview.__table__)
+
+    # Bulk inserts skip the ORM hooks that keep the rating aggregates current
+    started = time.perf_counter()
+    rebuild_rating_stats()
+    log('{:<22} {:>10} rows in {:.1f}s'.format('rating stats', '-', time.perf_counter() - started))
+    return counts
+
+
+def row_counts():
+    """Rows per benchmarked table, recorded alongside load test results."""
+    return {model.__tablename__: db.session.execute(select(func.count()).select_from(model)).scalar()
+            for model in (Service, Customer, Professional, ServiceRequest, CustomerReview)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=0.01, help='Fraction of SIZES to generate.')
+    for name in SIZES:
+        parser.add_argument('--' + name, type=int, help='Overrides --scale for this table.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    sizes = {name: getattr(args, name) if getattr(args, name) is not None else int(size * args.scale)
+             for name, size in SIZES.items()}
+
+    # Imported here so DATABASE_URL can be set beforehand
+    from app import app
+
+    with app.app_context():
+        started = time.perf_counter()
+        generate(seed=args.seed, chunk_size=args.chunk_size, **sizes)
+        print('done in {:.1f}s: {}'.format(time.perf_counter() - started, row_counts()))
+
+
+if __name__ == '__main__':
+    main()
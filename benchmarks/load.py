@@ -0,0 +1,509 @@
+# benchmarks/load.py
+"""Drive every API route under concurrent load and report latency, throughput and queries per request.
+
+Runs each scenario in SCENARIOS from ``--threads`` threads, either in-process
+through the Flask test client or over HTTP against a running server
+(``--url``). Ids and tokens are sampled from the configured database, so run
+it against one filled by benchmarks.dataset:
+
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python -m benchmarks.load --requests 500 --output before.json
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python -m benchmarks.load --requests 500 --compare before.json
+
+Queries per request come from the server's /metrics, so they are reported in
+both modes; streamed responses such as exports run theirs after the request
+is recorded and show none. In-process runs turn metrics on; a server needs
+METRICS_ENABLED=1, and METRICS_TOKEN here when it has one. ``--compare`` exits with status 1 when a
+scenario's p95 latency grows by more than ``--tolerance`` or it runs more
+queries per request.
+"""
+import argparse
+import datetime as dt
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import namedtuple
+from urllib.parse import urlencode, urlsplit
+from backend.dispatch import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ``request(ctx, rng)`` returns (path, kwargs) for one call; kwargs may hold json, data, headers.
+# ``rule`` is the route as /metrics labels it. Statuses in ``ok`` are not counted as errors.
+Scenario = namedtuple('Scenario', ['name', 'role', 'method', 'rule', 'request', 'ok'])
+
+
+def _scenario(name, role, method, rule, request, ok=(200,)):
+    return Scenario(name, role, method, '/api' + rule, request, ok)
+
+
+def _unique(prefix):
+    return '{}-{}'.format(prefix, uuid.uuid4().hex[:12])
+
+
+def _upload(ctx, rng):
+    # A fresh resumable upload for each chunk PUT
+    return ctx.prepare('POST', '/api/uploads', 'uploader', json={"filename": "bench.pdf", "size": 1024})["upload_id"]
+
+
+SCENARIOS = [
+    # Public and account routes
+    _scenario('login', None, 'POST', '/login',
+              lambda ctx, rng: ('/api/login', {"json": {"email": rng.choice(ctx.customer_emails), "password": ctx.password}}),
+              ok=(200, 429)),
+    _scenario('register_customer', 'customer', 'POST', '/register/customer',
+              lambda ctx, rng: ('/api/register/customer', {"json": {
+                  "email": _unique('bench-register') + '@example.com', "password": ctx.password,
+                  "fullname": 'Bench Register', "address": '1 Bench Street', "pincode": rng.choice(ctx.pincodes)}}),
+              ok=(201, 429)),
+    _scenario('register_professional', 'customer', 'POST', '/register/professional',
+              lambda ctx, rng: ('/api/register/professional', {"data": {
+                  "email": _unique('bench-register') + '@example.com', "password": ctx.password,
+                  "fullname": 'Bench Register', "experience": '3', "address": '1 Bench Road',
+                  "pincode": rng.choice(ctx.pincodes), "available_services": rng.choice(ctx.service_names)}}),
+              ok=(201, 429)),
+    _scenario('register_customer_info', None, 'GET', '/register/customer',
+              lambda ctx, rng: ('/api/register/customer', {})),
+    _scenario('register_professional_info', None, 'GET', '/register/professional',
+              lambda ctx, rng: ('/api/register/professional', {})),
+    _scenario('upload_start', 'uploader', 'POST', '/uploads',
+              lambda ctx, rng: ('/api/uploads', {"json": {"filename": 'bench.pdf', "size": 1024}}), ok=(201,)),
+    _scenario('upload_status', 'uploader', 'GET', '/uploads/<string:upload_id>',
+              lambda ctx, rng: ('/api/uploads/{}'.format(ctx.upload_id), {})),
+    _scenario('upload_chunk', 'uploader', 'PUT', '/uploads/<string:upload_id>',
+              lambda ctx, rng: ('/api/uploads/{}'.format(_upload(ctx, rng)), {
+                  "data": b'%PDF' + b'x' * 1020,
+                  "headers": {"Content-Range": "bytes 0-1023/1024", "Content-Type": "application/octet-stream"}})),
+    _scenario('booking_stream', 'customer', 'GET', '/stream/bookings',
+              lambda ctx, rng: ('/api/stream/bookings', {"stream": True})),
+
+    # Customer
+    _scenario('book_service', 'customer', 'POST', '/customer/book/service/<int:service_id>',
+              lambda ctx, rng: ('/api/customer/book/service/{}'.format(rng.choice(ctx.service_ids)), {}), ok=(201,)),
+    _scenario('booking_history', 'customer', 'GET', '/customer/book/history',
+              lambda ctx, rng: ('/api/customer/book/history', {})),
+
+    # Professional
+    _scenario('job_board', 'professional', 'GET', '/professional/jobs',
+              lambda ctx, rng: ('/api/professional/jobs', {})),
+    _scenario('professional_requests', 'professional', 'GET', '/professional/requests',
+              lambda ctx, rng: ('/api/professional/requests?status=completed', {})),
+    _scenario('accept_request', 'professional', 'PUT', '/professional/requests/<int:request_id>/<string:action>',
+              lambda ctx, rng: ('/api/professional/requests/{}/accept'.format(rng.choice(ctx.open_request_ids)), {}),
+              ok=(200, 404, 409)),
+
+    # Admin: services
+    _scenario('service_list', 'admin', 'GET', '/admin/service/all',
+              lambda ctx, rng: ('/api/admin/service/all', {})),
+    _scenario('service_one', 'admin', 'GET', '/admin/service/one/<int:service_id>',
+              lambda ctx, rng: ('/api/admin/service/one/{}'.format(rng.choice(ctx.service_ids)), {})),
+    _scenario('service_add', 'admin', 'POST', '/admin/service/add/',
+              lambda ctx, rng: ('/api/admin/service/add/', {"json": {
+                  "name": _unique('bench added'), "description": 'Added by the load test', "price": 500,
+                  "time_required": '2 hours'}}), ok=(200, 201)),
+    _scenario('service_update', 'admin', 'PUT', '/admin/service/update/<int:service_id>',
+              lambda ctx, rng: ('/api/admin/service/update/{}'.format(ctx.scratch_service_id()), {"json": {
+                  "name": _unique('bench updated'), "description": 'Updated by the load test', "price": 600,
+                  "time_required": '3 hours'}})),
+    _scenario('service_delete', 'admin', 'DELETE', '/admin/service/delete/<int:service_id>',
+              lambda ctx, rng: ('/api/admin/service/delete/{}'.format(ctx.scratch_service_id()), {})),
+    _scenario('service_import', 'admin', 'POST', '/admin/service/import',
+              lambda ctx, rng: ('/api/admin/service/import?format=ndjson', {
+                  "data": '\n'.join(json.dumps({"name": 'bench import {}'.format(i), "description": 'Imported',
+                                                "price": 100 + i, "time_required": '1 hour'}) for i in range(20)),
+                  "headers": {"Content-Type": "application/x-ndjson"}})),
+    _scenario('service_summary', 'admin', 'GET', '/admin/service/summary',
+              lambda ctx, rng: ('/api/admin/service/summary', {})),
+    _scenario('service_professionals', 'admin', 'GET', '/admin/service/<int:service_id>/professionals',
+              lambda ctx, rng: ('/api/admin/service/{}/professionals?pincode={}'.format(
+                  rng.choice(ctx.service_ids), rng.choice(ctx.pincodes)[:3]), {})),
+    _scenario('service_search', 'admin', 'GET', '/admin/service/search/<string:search_term>',
+              lambda ctx, rng: ('/api/admin/service/search/bench price<=2500', {})),
+
+    # Admin: professionals
+    _scenario('professional_details', 'admin', 'GET', '/admin/professional/details',
+              lambda ctx, rng: ('/api/admin/professional/details', {})),
+    _scenario('professional_documents', 'admin', 'GET', '/admin/professional/<int:professional_id>/documents',
+              lambda ctx, rng: ('/api/admin/professional/{}/documents'.format(rng.choice(ctx.professional_ids)), {})),
+    _scenario('document_download', 'admin', 'GET', '/admin/documents/<int:document_id>',
+              lambda ctx, rng: ('/api/admin/documents/{}'.format(ctx.document_id), {}), ok=(200, 404)),
+    _scenario('professional_approve', 'admin', 'PUT', '/admin/professional/block_unblock/<int:professional_id>',
+              lambda ctx, rng: ('/api/admin/professional/block_unblock/{}'.format(rng.choice(ctx.professional_ids)),
+                                {"json": {"is_approved": True}})),
+    _scenario('professional_summary', 'admin', 'GET', '/admin/summary/professionals',
+              lambda ctx, rng: ('/api/admin/summary/professionals', {})),
+    _scenario('professional_search', 'admin', 'GET', '/admin/professional/search',
+              lambda ctx, rng: ('/api/admin/professional/search?search_term=pincode:{}'.format(
+                  rng.choice(ctx.pincodes)[:4] + '*'), {})),
+    _scenario('professional_bulk', 'admin', 'PUT', '/admin/professional/bulk',
+              lambda ctx, rng: ('/api/admin/professional/bulk', {"json": {
+                  "ids": rng.sample(ctx.professional_ids, min(10, len(ctx.professional_ids))),
+                  "set": {"is_approved": True}}})),
+
+    # Admin: customers
+    _scenario('customer_details', 'admin', 'GET', '/admin/customer/details',
+              lambda ctx, rng: ('/api/admin/customer/details', {})),
+    _scenario('customer_summary', 'admin', 'GET', '/admin/summary/customers',
+              lambda ctx, rng: ('/api/admin/summary/customers', {})),
+    _scenario('customer_activate', 'admin', 'PUT', '/admin/customer/block_unblock/<int:customer_id>',
+              lambda ctx, rng: ('/api/admin/customer/block_unblock/{}'.format(rng.choice(ctx.spare_customer_ids)),
+                                {"json": {"is_active": True}})),
+    _scenario('customer_search', 'admin', 'GET', '/admin/customer/search',
+              lambda ctx, rng: ('/api/admin/customer/search?search_term=bench', {})),
+    _scenario('customer_bulk', 'admin', 'PUT', '/admin/customer/bulk',
+              lambda ctx, rng: ('/api/admin/customer/bulk', {"json": {
+                  "ids": rng.sample(ctx.spare_customer_ids, min(10, len(ctx.spare_customer_ids))),
+                  "set": {"is_active": True}}})),
+    _scenario('customer_block', 'admin', 'PUT', '/admin/customer/block/<int:customer_id>',
+              lambda ctx, rng: ('/api/admin/customer/block/{}'.format(rng.choice(ctx.spare_customer_ids)), {})),
+    _scenario('customer_unblock', 'admin', 'PUT', '/admin/customer/unblock/<int:customer_id>',
+              lambda ctx, rng: ('/api/admin/customer/unblock/{}'.format(rng.choice(ctx.spare_customer_ids)), {})),
+
+    # Admin: operations
+    _scenario('dashboard', 'admin', 'GET', '/admin/dashboard',
+              lambda ctx, rng: ('/api/admin/dashboard', {})),
+    _scenario('export_requests', 'admin', 'GET', '/admin/export/<string:entity>',
+              lambda ctx, rng: ('/api/admin/export/service_requests?from={}'.format(ctx.yesterday), {})),
+    _scenario('cache_stats', 'admin', 'GET', '/admin/cache/stats',
+              lambda ctx, rng: ('/api/admin/cache/stats', {})),
+    _scenario('task_stats', 'admin', 'GET', '/admin/tasks/stats',
+              lambda ctx, rng: ('/api/admin/tasks/stats', {})),
+    _scenario('dispatch_stats', 'admin', 'GET', '/admin/dispatch',
+              lambda ctx, rng: ('/api/admin/dispatch', {})),
+    _scenario('dispatch_batch', 'admin', 'POST', '/admin/dispatch',
+              lambda ctx, rng: ('/api/admin/dispatch', {"json": {"limit": 50}})),
+]
+
+
+### ------------------------------- clients -----------------------------###
+
+class TestClientDriver:
+    """Sends requests in-process through the Flask test client; one client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, headers=None, json=None, data=None, stream=False):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, headers=headers, json=json, data=data, buffered=not stream)
+        body = b'' if stream else response.get_data()
+        response.close()
+        return response.status_code, body
+
+
+def _dumps(value):
+    return json.dumps(value).encode()
+
+
+class HTTPDriver:
+    """Sends requests to a running server, keeping one connection per thread."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self._local = threading.local()
+
+    def request(self, method, path, headers=None, json=None, data=None, stream=False):
+        headers = dict(headers or {})
+        if json is not None:
+            data = _dumps(json)
+            headers.setdefault('Content-Type', 'application/json')
+        elif isinstance(data, dict):
+            data = urlencode(data)
+            headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or stream:
+            connection = self.connection_class(self.netloc, timeout=60)
+            if not stream:
+                self._local.connection = connection
+        try:
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            # A stream only gets as far as its headers
+            body = b'' if stream else response.read()
+            if stream:
+                connection.close()
+            return response.status, body
+        except (http.client.HTTPException, OSError):
+            self._local.connection = None
+            connection.close()
+            raise
+
+
+### ------------------------------- context -----------------------------###
+
+class LoadContext:
+    """Ids, tokens and scratch rows the scenarios draw from, sampled from the database up front."""
+
+    def __init__(self, app, driver, sample_size=200, scratch_services=5000, ordered=False):
+        from flask_jwt_extended import create_access_token
+        from sqlalchemy import func, insert
+        from backend.db import db
+        from backend.dispatch import PENDING_STATUS
+        from backend.models import User, Customer, Professional, Service, ServiceRequest, ProfessionalDocument
+        from backend.seed import ADMIN_EMAIL
+        from benchmarks.dataset import BENCH_PASSWORD
+
+        self.driver = driver
+        self.password = BENCH_PASSWORD
+        self.yesterday = (dt.date.today() - dt.timedelta(days=1)).isoformat()
+        self._scratch_lock = threading.Lock()
+
+        # ``ordered`` takes the lowest ids rather than random ones, so repeated runs send the same requests
+        def pick(query, column, limit=sample_size):
+            return query.order_by(column if ordered else func.random()).limit(limit)
+
+        def sample(column, *criteria):
+            return [row[0] for row in pick(db.session.query(column).filter(*criteria), column).all()]
+
+        with app.app_context():
+            self.service_ids = sample(Service.id, Service.name.like('bench service%'))
+            self.service_names = [name for (name,) in db.session.query(Service.name).filter(Service.id.in_(self.service_ids))]
+            customers = pick(db.session.query(Customer.id, Customer.user_id, Customer.pincode, User.email)
+                             .join(User, User.id == Customer.user_id)
+                             .filter(User.email.like('bench-customer-%')), Customer.id, sample_size * 2).all()
+            professionals = pick(db.session.query(Professional.id, Professional.user_id)
+                                 .filter(Professional.is_approved == True,
+                                         Professional.fullname.like('Bench Professional%')), Professional.id).all()
+            if not (self.service_ids and customers and professionals):
+                raise RuntimeError("No synthetic data found; run `python -m benchmarks.dataset` first.")
+
+            # Odd ids book and log in; admin routes block and unblock even ids, so runs never lock each other out
+            booking = [row for row in customers if row.id % 2] or customers
+            spare = [row for row in customers if not row.id % 2] or customers
+            self.customer_emails = [row.email for row in booking]
+            self.spare_customer_ids = [row.id for row in spare]
+            self.pincodes = sorted({row.pincode for row in customers})
+            self.professional_ids = [row.id for row in professionals]
+            self.open_request_ids = sample(ServiceRequest.id, ServiceRequest.professional_id == None,
+                                           ServiceRequest.service_status == PENDING_STATUS) or [0]
+            self.document_id = db.session.query(func.max(ProfessionalDocument.id)).scalar() or 0
+
+            admin_id = db.session.query(User.id).filter(User.email == ADMIN_EMAIL).scalar()
+            self.tokens = {
+                "admin": [create_access_token(identity=str(admin_id))],
+                "customer": [create_access_token(identity=str(row.user_id)) for row in booking],
+                "professional": [create_access_token(identity=str(row.user_id)) for row in professionals],
+            }
+            # Uploads are only visible to their owner, so one customer makes them all
+            self.tokens["uploader"] = self.tokens["customer"][:1]
+
+            # Services the update and delete scenarios may change or remove
+            first = (db.session.query(func.max(Service.id)).scalar() or 0) + 1
+            self._scratch_services = list(range(first, first + scratch_services))
+            db.session.execute(insert(Service.__table__), [
+                {"id": service_id, "name": 'bench scratch {}'.format(service_id), "description": 'Scratch',
+                 "price": 1, "time_required": '1 hour', "is_approved": True}
+                for service_id in self._scratch_services
+            ])
+            db.session.commit()
+
+        self.upload_id = self.prepare('POST', '/api/uploads', 'uploader',
+                                      json={"filename": "bench.pdf", "size": 1024})["upload_id"]
+
+    def headers(self, role, rng):
+        return {"Authorization": "Bearer " + rng.choice(self.tokens[role])} if role else {}
+
+    def prepare(self, method, path, role, **kwargs):
+        """An untimed request a scenario needs before its own; returns the JSON body."""
+        status, body = self.driver.request(method, path, headers=self.headers(role, random), **kwargs)
+        if status >= 400:
+            raise RuntimeError("{} {} failed with {}: {}".format(method, path, status, body[:200]))
+        return json.loads(body)
+
+    def scratch_service_id(self):
+        with self._scratch_lock:
+            if not self._scratch_services:
+                raise RuntimeError("Out of scratch services; run fewer update/delete requests.")
+            return self._scratch_services.pop()
+
+
+### ------------------------------- running -----------------------------###
+
+_QUERIES_RE = re.compile(r'^http_request_(db_queries_total|duration_seconds_count)\{endpoint="([^"]*)",method="([^"]*)"\} (\S+)$')
+
+
+def scrape_queries(driver):
+    """{(rule, method): (requests, queries)} from the server's /metrics."""
+    token = os.environ.get('METRICS_TOKEN')
+    status, body = driver.request('GET', '/metrics', headers={'Authorization': 'Bearer ' + token} if token else None)
+    if status != 200:
+        return {}
+    totals = {}
+    for line in body.decode().splitlines():
+        match = _QUERIES_RE.match(line)
+        if match:
+            metric, rule, method, value = match.groups()
+            requests, queries = totals.get((rule, method), (0, 0))
+            if metric == 'duration_seconds_count':
+                requests = float(value)
+            else:
+                queries = float(value)
+            totals[(rule, method)] = (requests, queries)
+    return totals
+
+
+def run_scenario(scenario, ctx, driver, threads, requests, seed):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            try:
+                path, kwargs = scenario.request(ctx, rng)
+                headers = dict(kwargs.pop('headers', {}), **ctx.headers(scenario.role, rng))
+                started = time.perf_counter()
+                status, _ = driver.request(scenario.method, path, headers=headers, **kwargs)
+                elapsed = time.perf_counter() - started
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            with lock:
+                latencies.append(elapsed)
+                if status not in scenario.ok:
+                    errors.append(status)
+
+    before = scrape_queries(driver)
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    after = scrape_queries(driver)
+
+    key = (scenario.rule, scenario.method)
+    served = after.get(key, (0, 0))[0] - before.get(key, (0, 0))[0]
+    queries = after.get(key, (0, 0))[1] - before.get(key, (0, 0))[1]
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted({str(error) for error in errors}),
+        "throughput": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": _ms(percentile(latencies, 0.5)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "queries_per_request": round(queries / served, 2) if served else None,
+    }
+
+
+def _ms(value):
+    return round(value * 1000, 3) if value is not None else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print per-scenario changes against ``baseline``; returns the names of regressed scenarios."""
+    regressions = []
+    print('\n{:<28} {:>12} {:>12} {:>10} {:>14}'.format('vs ' + str(baseline.get("commit")), 'p95 ms', 'was', 'change', 'queries/req'))
+    for name, result in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous or not previous["p95_ms"] or not result["p95_ms"]:
+            continue
+        change = result["p95_ms"] / previous["p95_ms"] - 1
+        queries, was_queries = result["queries_per_request"], previous["queries_per_request"]
+        # Cached endpoints average a fraction of a query; only a whole extra query counts
+        regressed = change > tolerance or (queries is not None and was_queries is not None and queries - was_queries >= 0.5)
+        if regressed:
+            regressions.append(name)
+        print('{:<28} {:>12} {:>12} {:>+9.0%} {:>14}{}'.format(
+            name, result["p95_ms"], previous["p95_ms"], change,
+            '{} (was {})'.format(queries, was_queries) if queries != was_queries else str(queries),
+            '  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:5001; default is in-process.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+    parser.add_argument('--only', help='Regular expression selecting scenarios by name.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth before --compare fails.')
+    args = parser.parse_args()
+
+    # Imported here so DATABASE_URL can be set beforehand; the in-process app needs /metrics for query counts
+    if not args.url:
+        os.environ.setdefault('METRICS_ENABLED', '1')
+    from app import app
+    from backend.db import db
+    from backend.ratelimit import rate_limiter
+    from benchmarks.dataset import row_counts
+
+    if args.url:
+        driver = HTTPDriver(args.url)
+    else:
+        # Every worker thread shares one client address, which the login limits would soon reject
+        rate_limiter.enabled = False
+        driver = TestClientDriver(app)
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.only or re.search(args.only, scenario.name)]
+    ctx = LoadContext(app, driver)
+    with app.app_context():
+        counts = row_counts()
+        db.session.remove()
+
+    results = {
+        "commit": git_commit(),
+        "started_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec='seconds'),
+        "mode": args.url or 'test-client',
+        "threads": args.threads,
+        "requests": args.requests,
+        "rows": counts,
+        "scenarios": {},
+    }
+    print('{} rows, {} threads, {} requests per scenario'.format(counts, args.threads, args.requests))
+    print('{:<28} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9} {:>12}'.format(
+        'scenario', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries/req'))
+    for index, scenario in enumerate(scenarios):
+        result = results["scenarios"][scenario.name] = run_scenario(scenario, ctx, driver, args.threads, args.requests,
+                                                                    args.seed + index)
+        print('{:<28} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9} {:>12}{}'.format(
+            scenario.name, result["requests"], result["errors"], result["throughput"], result["p50_ms"],
+            result["p95_ms"], result["p99_ms"], result["queries_per_request"],
+            '  ({})'.format(', '.join(result["error_statuses"])) if result["errors"] else ''))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('results written to {}'.format(args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print('regressed: {}'.format(', '.join(regressions)))
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
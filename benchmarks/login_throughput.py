@@ -0,0 +1,103 @@
+# benchmarks/login_throughput.py
+"""Login throughput with password hashing on the request threads versus in worker processes.
+
+Client threads post logins through the test client against a scratch database
+while one more thread keeps requesting the service list, to show whether
+other requests stall behind hashing:
+
+    python -m benchmarks.login_throughput --threads 8 --seconds 10 --workers 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from backend.dispatch import percentile
+from backend.passwords import password_hasher
+from backend.ratelimit import rate_limiter
+from backend.seed import ADMIN_EMAIL, ADMIN_PASSWORD
+
+
+def login_worker(app, deadline, latencies, errors):
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = client.post('/api/login', json={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(response.status_code)
+
+
+def list_worker(app, deadline, token, latencies):
+    # A cheap request competing with the logins for CPU
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + token}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        client.get('/api/admin/service/all', headers=headers)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def run_profile(app, workers, threads, seconds):
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    password_hasher.init_app(app)
+    client = app.test_client()
+    # Warm up the pool and fetch a token for the list requests
+    token = client.post('/api/login', json={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD}).get_json()['access_token']
+
+    login_latencies, list_latencies, errors = [], [], []
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=login_worker, args=(app, deadline, login_latencies, errors)) for _ in range(threads)]
+    pool.append(threading.Thread(target=list_worker, args=(app, deadline, token, list_latencies)))
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    password_hasher.shutdown()
+
+    login_latencies.sort()
+    list_latencies.sort()
+    return (workers, len(login_latencies) / seconds, len(errors),
+            percentile(login_latencies, 0.5), percentile(login_latencies, 0.95), percentile(list_latencies, 0.95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        # Imported here because the hashing processes re-import this module, and
+        # LocalDevelopmentConfig reads DATABASE_URL when app is first imported
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'login.sqlite3')
+        from app import app
+        from backend.db import upgrade_database
+        from backend.seed import seed_data
+
+        # Every login comes from one address and account
+        app.config['RATELIMIT_ENABLED'] = False
+        rate_limiter.init_app(app)
+        with app.app_context():
+            upgrade_database()
+            seed_data()
+        rows = [run_profile(app, 0, args.threads, args.seconds),
+                run_profile(app, args.workers, args.threads, args.seconds)]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def ms(value):
+        return '{:.1f}'.format(value * 1000) if value is not None else '-'
+
+    print('{:<8} {:>9} {:>7} {:>13} {:>13} {:>15}'.format('workers', 'logins/s', 'errors', 'login p50 ms', 'login p95 ms', 'list p95 ms'))
+    for workers, throughput, errors, p50, p95, list_p95 in rows:
+        print('{:<8} {:>9.1f} {:>7} {:>13} {:>13} {:>15}'.format(workers or 'inline', throughput, errors, ms(p50), ms(p95), ms(list_p95)))
+
+
+if __name__ == '__main__':
+    main()
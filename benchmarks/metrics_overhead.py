@@ -0,0 +1,59 @@
+# benchmarks/metrics_overhead.py
+"""Per-request and per-statement cost of the request and SQL instrumentation.
+
+Sends requests through the test client to a view that runs a few trivial
+statements on an in-memory SQLite database, with metrics off and on:
+
+    python -m benchmarks.metrics_overhead --requests 20000 --statements 5
+"""
+import argparse
+import time
+from flask import Flask
+from sqlalchemy import create_engine, text
+from backend.metrics import metrics
+
+
+def build_app(enabled, engine, statements):
+    app = Flask(__name__)
+    app.config['METRICS_ENABLED'] = enabled
+
+    @app.route('/api/thing/<int:thing_id>')
+    def thing(thing_id):
+        with engine.connect() as connection:
+            for _ in range(statements):
+                connection.execute(text('SELECT :id'), {"id": thing_id}).scalar()
+        return {"id": thing_id}
+
+    metrics.init_app(app)
+    return app
+
+
+def per_request(app, requests):
+    client = app.test_client()
+    started = time.perf_counter()
+    for i in range(requests):
+        client.get('/api/thing/{}'.format(i % 100))
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--statements', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine('sqlite://')
+    # Alternate so drift in machine load affects both sides alike
+    off, on = [], []
+    for _ in range(5):
+        off.append(per_request(build_app(False, engine, args.statements), args.requests // 5))
+        on.append(per_request(build_app(True, engine, args.statements), args.requests // 5))
+
+    baseline, instrumented = min(off), min(on)
+    print('request, metrics off: {:.1f} us'.format(baseline * 1e6))
+    print('request, metrics on:  {:.1f} us'.format(instrumented * 1e6))
+    print('overhead:             {:.1f} us per request with {} statements'.format((instrumented - baseline) * 1e6, args.statements))
+
+
+if __name__ == '__main__':
+    main()
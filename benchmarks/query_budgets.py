@@ -0,0 +1,323 @@
+# benchmarks/query_budgets.py
+"""pytest plugin holding every API route to a SQL statement and latency budget.
+
+Budgets live in query_budgets.json beside this module, one per scenario in
+benchmarks.load.SCENARIOS, and are collected as test items when that file is
+passed to pytest:
+
+    python -m pytest -p benchmarks.query_budgets benchmarks/query_budgets.json
+
+Each item sends its scenario's request ``--budget-runs`` times through the
+test client, against a fixed-size synthetic dataset (FIXTURE_SIZES) in a
+temporary SQLite database. The response and identity caches are cleared
+before every run, so the statement count is the worst case. An item fails
+when any run executes more than ``queries`` statements or the median run
+takes longer than ``ms``. The failure lists the statements grouped by shape,
+so an N+1 loop shows up as one statement repeated N times. An item also fails
+when ``EXPLAIN QUERY PLAN`` of any statement it ran shows a full scan of one of
+BIG_TABLES.
+
+``--write-budgets`` rewrites the file from measured values. The
+``query_budget`` fixture applies the same check to a block of code in other
+tests.
+"""
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.metrics import normalize_statement
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_budgets.json')
+
+# Small enough to build in a few seconds, large enough that a per-row query shows
+FIXTURE_SIZES = {
+    "services": 20,
+    "customers": 200,
+    "professionals": 40,
+    "requests": 2000,
+    "reviews": 500,
+}
+LATENCY_HEADROOM = 5  # --write-budgets sets ``ms`` to this multiple of the measured median...
+MIN_LATENCY_MS = 50  # ...and never below this, so budgets survive slower machines
+
+# Tables that grow with traffic; a statement that reads every row of one does not scale
+BIG_TABLES = ('service_request', 'customer_review')
+# A full table scan looks like "SCAN service_request"; "SCAN t USING [COVERING] INDEX ..." is fine
+_FULL_SCAN_RE = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+class StatementRecorder:
+    """Records the SQL statements, and their parameters, executed on this thread while active."""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(Engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+            # One parameter set is enough to explain an executemany
+            self.parameters.append(parameters[0] if executemany and parameters else parameters)
+
+
+def statement_report(statements):
+    """The statements grouped by shape, most repeated first."""
+    counts = Counter(normalize_statement(statement) for statement in statements)
+    return '\n'.join('  {:>3}x {}'.format(count, statement) for statement, count in counts.most_common())
+
+
+def check_budget(label, statements, elapsed_ms, queries=None, ms=None):
+    problems = []
+    if queries is not None and len(statements) > queries:
+        problems.append('{} SQL statements, budget {}'.format(len(statements), queries))
+    if ms is not None and elapsed_ms > ms:
+        problems.append('{:.1f} ms, budget {} ms'.format(elapsed_ms, ms))
+    if problems:
+        raise BudgetExceeded('{} over budget: {}\nstatements:\n{}'.format(
+            label, '; '.join(problems), statement_report(statements)))
+
+
+def full_scans(connection, statements, parameters):
+    """{statement: plan} for the statements whose SQLite query plan scans a whole table in BIG_TABLES."""
+    scans = {}
+    for statement, params in zip(statements, parameters):
+        if statement in scans or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            continue
+        plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, params)]
+        if any(match and match.group(1) in BIG_TABLES for match in map(_FULL_SCAN_RE.match, plan)):
+            scans[statement] = plan
+    return scans
+
+
+def check_plans(label, connection, statements, parameters):
+    scans = full_scans(connection, statements, parameters)
+    if scans:
+        raise BudgetExceeded('{} scans a whole table:\n{}'.format(label, '\n'.join(
+            '  {}\n    {}'.format('; '.join(plan), statement) for statement, plan in scans.items())))
+
+
+@contextmanager
+def within_budget(queries=None, ms=None, label='block'):
+    """Fail when the enclosed code runs more than ``queries`` statements or takes more than ``ms``."""
+    with StatementRecorder() as recorder:
+        started = time.perf_counter()
+        yield recorder
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    check_budget(label, recorder.statements, elapsed_ms, queries, ms)
+
+
+### ------------------------------- fixture dataset -----------------------------###
+
+class BudgetEnvironment:
+    """A throwaway app and database filled with FIXTURE_SIZES rows, shared by the whole session."""
+
+    def __init__(self):
+        from app import create_app, CONFIGS
+        from backend.db import db, upgrade_database
+        from backend.seed import seed_data
+        from benchmarks.dataset import generate
+        from benchmarks.load import LoadContext, TestClientDriver
+
+        self.directory = tempfile.mkdtemp(prefix='query-budgets-')
+
+        class BudgetConfig(CONFIGS['development']):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.directory, 'budgets.sqlite3')
+            UPLOAD_FOLDER = os.path.join(self.directory, 'uploads')
+            PASSWORD_HASH_WORKERS = 0
+            RATELIMIT_ENABLED = False
+            DISPATCH_INDEX_REBUILD_INTERVAL = 3600
+            CACHE_TYPE = None  # In-process response cache
+            EVENTS_STORAGE_URL = None
+
+        self.app = create_app(BudgetConfig)
+        with self.app.app_context():
+            upgrade_database()
+            seed_data()
+            generate(seed=0, log=lambda line: None, **FIXTURE_SIZES)
+            db.session.remove()
+        self.driver = TestClientDriver(self.app)
+        self.context = LoadContext(self.app, self.driver, sample_size=50, scratch_services=200, ordered=True)
+
+    def cold_start(self):
+        # Clear what a warm process would answer from memory, so each run is the worst case
+        from backend.auth import identity_cache
+        from backend.cache import response_cache
+        from backend.db import db
+        from backend.dispatch import dispatcher
+
+        identity_cache.clear()
+        response_cache.backend.clear()
+        with self.app.app_context():
+            dispatcher.rebuild()
+            db.session.remove()
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def budget_environment(config):
+    environment = getattr(config, '_budget_environment', None)
+    if environment is None:
+        environment = config._budget_environment = BudgetEnvironment()
+        config.add_cleanup(environment.close)
+    return environment
+
+
+### ------------------------------- collection -----------------------------###
+
+def pytest_addoption(parser):
+    group = parser.getgroup('query budgets')
+    group.addoption('--budget-runs', type=int, default=5, help='Requests per scenario; the median is checked against ms.')
+    group.addoption('--write-budgets', action='store_true', help='Rewrite query_budgets.json from measured values.')
+
+
+def pytest_configure(config):
+    config._budget_measurements = {}
+
+
+def pytest_collect_file(parent, file_path):
+    if file_path.name == os.path.basename(BUDGETS_FILE):
+        return BudgetFile.from_parent(parent, path=file_path)
+
+
+class BudgetFile(pytest.File):
+
+    def collect(self):
+        from benchmarks.load import SCENARIOS
+
+        with open(self.path) as f:
+            budgets = json.load(f)
+        yield CoverageItem.from_parent(self, name='coverage', budgets=budgets)
+        for scenario in SCENARIOS:
+            yield BudgetItem.from_parent(self, name=scenario.name, scenario=scenario, budget=budgets.get(scenario.name))
+
+
+class CoverageItem(pytest.Item):
+    """Every API route has a scenario, and every scenario a budget."""
+
+    def __init__(self, *, budgets, **kwargs):
+        super().__init__(**kwargs)
+        self.budgets = budgets
+
+    def runtest(self):
+        from benchmarks.load import SCENARIOS
+
+        app = budget_environment(self.config).app
+        covered = {(scenario.rule, scenario.method) for scenario in SCENARIOS}
+        routes = {(rule.rule, method) for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')
+                  for method in rule.methods - {'HEAD', 'OPTIONS'}}
+        problems = ['no scenario for {} {}'.format(method, rule) for rule, method in sorted(routes - covered)]
+        if not self.config.getoption('write_budgets'):
+            names = {scenario.name for scenario in SCENARIOS}
+            problems += ['no budget for {}'.format(name) for name in sorted(names - set(self.budgets))]
+            problems += ['budget for unknown scenario {}'.format(name) for name in sorted(set(self.budgets) - names)]
+        if problems:
+            raise BudgetExceeded('\n'.join(problems))
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, BudgetExceeded):
+            return str(excinfo.value)
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, None, 'query budgets: coverage'
+
+
+class BudgetItem(pytest.Item):
+
+    def __init__(self, *, scenario, budget, **kwargs):
+        super().__init__(**kwargs)
+        self.scenario = scenario
+        self.budget = budget
+
+    def runtest(self):
+        environment = budget_environment(self.config)
+        ctx, scenario = environment.context, self.scenario
+        rng = random.Random(scenario.name)
+        runs = []
+        for _ in range(max(1, self.config.getoption('budget_runs'))):
+            environment.cold_start()
+            path, kwargs = scenario.request(ctx, rng)
+            headers = dict(kwargs.pop('headers', {}), **ctx.headers(scenario.role, rng))
+            with StatementRecorder() as recorder:
+                started = time.perf_counter()
+                status, body = environment.driver.request(scenario.method, path, headers=headers, **kwargs)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            if status not in scenario.ok:
+                raise BudgetExceeded('{} {} returned {}: {}'.format(scenario.method, path, status, body[:200]))
+            runs.append((recorder, elapsed_ms))
+
+        median_ms = statistics.median(elapsed_ms for _, elapsed_ms in runs)
+        worst = max(runs, key=lambda run: len(run[0].statements))[0]
+        with environment.app.app_context():
+            from backend.db import db
+
+            with db.engine.connect() as connection:
+                check_plans(scenario.name, connection, worst.statements, worst.parameters)
+        if self.config.getoption('write_budgets'):
+            self.config._budget_measurements[scenario.name] = {
+                "method": scenario.method,
+                "rule": scenario.rule,
+                "queries": len(worst.statements),
+                "ms": max(MIN_LATENCY_MS, int(median_ms * LATENCY_HEADROOM) + 1),
+            }
+            return
+        if self.budget is None:
+            raise BudgetExceeded('No budget for {}; run with --write-budgets to record one.'.format(scenario.name))
+        # Statements are judged on the worst run, latency on the median
+        check_budget(scenario.name, worst.statements, median_ms, queries=self.budget["queries"], ms=self.budget["ms"])
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, BudgetExceeded):
+            return str(excinfo.value)
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, None, 'query budget: {} {}'.format(self.scenario.method, self.scenario.rule)
+
+
+def pytest_sessionfinish(session):
+    measurements = session.config._budget_measurements
+    if not measurements:
+        return
+    from benchmarks.load import SCENARIOS
+
+    budgets = {}
+    if os.path.exists(BUDGETS_FILE):
+        with open(BUDGETS_FILE) as f:
+            budgets = json.load(f)
+    budgets.update(measurements)
+    ordered = {scenario.name: budgets[scenario.name] for scenario in SCENARIOS if scenario.name in budgets}
+    with open(BUDGETS_FILE, 'w') as f:
+        json.dump(ordered, f, indent=2)
+        f.write('\n')
+
+
+@pytest.fixture
+def query_budget():
+    """``with query_budget(queries=3, ms=100): ...`` in any test."""
+    return within_budget
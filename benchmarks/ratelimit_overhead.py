@@ -0,0 +1,58 @@
+# benchmarks/ratelimit_overhead.py
+"""Per-request cost of the login rate limiter on the happy path (request allowed).
+
+Calls a no-op view with and without ``rate_limiter.limit('login')`` inside a
+login request context, with limits high enough that nothing is rejected:
+
+    python -m benchmarks.ratelimit_overhead --iterations 200000
+"""
+import argparse
+import time
+from flask import Flask
+from backend.ratelimit import rate_limiter
+
+
+def view():
+    return {}, 200
+
+
+def per_call(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--keys', type=int, default=10000, help='Distinct IPs, so lookups hit a populated store.')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['RATELIMITS'] = {"login": {"ip": (10 ** 9, 1), "email": (10 ** 9, 1)}}
+    rate_limiter.init_app(app)
+    limited = rate_limiter.limit('login')(view)
+
+    contexts = [app.test_request_context('/api/login', method='POST', json={'email': 'user{}@example.com'.format(i)},
+                                         environ_base={'REMOTE_ADDR': '10.0.{}.{}'.format(i // 256, i % 256)})
+                for i in range(args.keys)]
+    # The view parses the JSON body anyway; parse it up front so only the limiter is timed
+    for context in contexts:
+        with context:
+            limited()
+
+    baseline, with_limit = [], []
+    for context in contexts[:100]:
+        with context:
+            baseline.append(per_call(view, args.iterations // 100))
+            with_limit.append(per_call(limited, args.iterations // 100))
+
+    overhead = (sum(with_limit) - sum(baseline)) / len(baseline)
+    print('view alone:        {:.2f} us'.format(sum(baseline) / len(baseline) * 1e6))
+    print('view with limiter: {:.2f} us'.format(sum(with_limit) / len(with_limit) * 1e6))
+    print('limiter overhead:  {:.2f} us per request ({} buckets in store)'.format(overhead * 1e6, len(rate_limiter.store)))
+
+
+if __name__ == '__main__':
+    main()
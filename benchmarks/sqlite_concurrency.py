@@ -0,0 +1,121 @@
+# benchmarks/sqlite_concurrency.py
+"""Mixed read/write load against SQLite with and without Config.SQLITE_PRAGMAS.
+
+Readers run the booking-history query and writers run the booking insert
+concurrently on a scratch database, once with SQLite defaults and once with
+the tuned pragmas:
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.exc import OperationalError
+from app import Config
+from backend.db import db, apply_sqlite_pragmas
+from backend.dispatch import percentile
+from backend.models import User, Customer, Service, ServiceRequest
+
+SEED_REQUESTS = 20000
+
+
+def build_engine(path, pragmas):
+    engine = create_engine('sqlite:///' + path, **Config.SQLALCHEMY_ENGINE_OPTIONS)
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__).values(id=1, email='bench@example.com', password='x', fs_uniquifier='bench'))
+        connection.execute(insert(Customer.__table__).values(id=1, user_id=1, fullname='Bench', address='a', pincode='560001'))
+        connection.execute(insert(Service.__table__).values(id=1, name='bench', description='d', price=1, time_required='1h'))
+        connection.execute(insert(ServiceRequest.__table__), [
+            {"service_id": 1, "customer_id": 1, "service_status": 'completed'} for _ in range(SEED_REQUESTS)
+        ])
+
+
+def read_once(connection):
+    # CustomerBookHistoryAPI's first page
+    table = ServiceRequest.__table__
+    connection.execute(
+        select(table).where(table.c.customer_id == 1).order_by(table.c.date_of_request.desc(), table.c.id.desc()).limit(50)
+    ).all()
+
+
+def write_once(connection):
+    # CustomerBookServiceAPI: look up the service, insert the request, commit
+    connection.execute(text("SELECT id FROM service WHERE id = 1")).scalar()
+    connection.execute(insert(ServiceRequest.__table__).values(service_id=1, customer_id=1, service_status='requested'))
+
+
+def worker(engine, operation, deadline, results):
+    latencies = []
+    errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                operation(connection)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            # 'database is locked' once busy handling gives up
+            errors += 1
+    results.append((latencies, errors))
+
+
+def run_profile(name, pragmas, readers, writers, seconds):
+    directory = tempfile.mkdtemp()
+    try:
+        engine = build_engine(os.path.join(directory, 'bench.sqlite3'), pragmas)
+        seed(engine)
+
+        read_results, write_results = [], []
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=worker, args=(engine, read_once, deadline, read_results)) for _ in range(readers)]
+        threads += [threading.Thread(target=worker, args=(engine, write_once, deadline, write_results)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    rows = []
+    for kind, results in (("read", read_results), ("write", write_results)):
+        latencies = sorted(latency for latency_list, _ in results for latency in latency_list)
+        errors = sum(error_count for _, error_count in results)
+        rows.append((name, kind, len(latencies) / seconds, errors,
+                     percentile(latencies, 0.5), percentile(latencies, 0.95), percentile(latencies, 0.99)))
+    return rows
+
+
+def print_rows(rows):
+    def ms(value):
+        return '{:.2f}'.format(value * 1000) if value is not None else '-'
+
+    print('{:<9} {:<6} {:>10} {:>7} {:>9} {:>9} {:>9}'.format('profile', 'op', 'ops/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, kind, throughput, errors, p50, p95, p99 in rows:
+        print('{:<9} {:<6} {:>10.1f} {:>7} {:>9} {:>9} {:>9}'.format(name, kind, throughput, errors, ms(p50), ms(p95), ms(p99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    rows = run_profile('default', {}, args.readers, args.writers, args.seconds)
+    rows += run_profile('tuned', Config.SQLITE_PRAGMAS, args.readers, args.writers, args.seconds)
+    print_rows(rows)
+
+
+if __name__ == '__main__':
+    main()
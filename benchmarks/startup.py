@@ -0,0 +1,83 @@
+# benchmarks/startup.py
+"""Application import time and first-request latency in fresh interpreters.
+
+Each run starts a new Python process, as a web or Celery worker does, imports
+``app`` and sends the first requests through the test client against a scratch
+database prepared with ``flask init-db`` and ``flask seed``:
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from backend.dispatch import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process; prints one JSON line of timings
+PROBE = """
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connections = []
+event.listen(Pool, 'connect', lambda *args: connections.append(time.perf_counter()))
+import app
+imported = time.perf_counter()
+boot_connections = len(connections)
+client = app.app.test_client()
+response = client.post('/api/login', json={'email': 'admin@gmail.com', 'password': 'adminpassword'})
+assert response.status_code == 200, response.get_data(as_text=True)
+logged_in = time.perf_counter()
+headers = {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+response = client.get('/api/admin/service/all', headers=headers)
+assert response.status_code == 200, response.get_data(as_text=True)
+listed = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'first_request': logged_in - imported,
+    'second_request': listed - logged_in,
+    'boot_connections': boot_connections,
+}))
+"""
+
+
+def run_flask(env, *args):
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app'] + list(args),
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def run_probe(env):
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(directory, 'startup.sqlite3'))
+        run_flask(env, 'init-db')
+        run_flask(env, 'seed')
+        samples = [run_probe(env) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print('{:<15} {:>9} {:>9} {:>9}'.format('phase', 'p50 ms', 'p95 ms', 'max ms'))
+    for phase in ('import', 'first_request', 'second_request'):
+        values = sorted(sample[phase] for sample in samples)
+        print('{:<15} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            phase, percentile(values, 0.5) * 1000, percentile(values, 0.95) * 1000, values[-1] * 1000))
+    print('database connections opened while importing: {}'.format(max(sample['boot_connections'] for sample in samples)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+# Entry point for the Celery worker: celery -A celery_worker:celery_app worker --loglevel=info
+from app import app
+from backend import tasks
+
+celery_app = tasks.init_app(app)
@@ -0,0 +1,9 @@
+import axios from 'axios';
+
+// List endpoints return one page at a time. Fetch the page after `after` (the first page when null);
+// pass the returned nextCursor back in to load more, and stop when it is null.
+export async function fetchPage(url, key, after = null, config = {}) {
+  const params = { ...(config.params || {}), ...(after ? { after } : {}) };
+  const response = await axios.get(url, { ...config, params });
+  return { items: response.data[key] || [], nextCursor: response.data.next_cursor || null };
+}
@@ -0,0 +1,39 @@
+import axios from 'axios';
+
+const API = 'http://127.0.0.1:5001/api';
+const CHUNK_SIZE = 1024 * 1024;
+const MAX_RETRIES = 3;
+
+// Send a file to /api/uploads in chunks, resuming from the server's offset after a failure.
+// Resolves to the upload id to submit with the registration form.
+export async function uploadInChunks(file, token) {
+  const headers = { Authorization: `Bearer ${token}` };
+  const { data: upload } = await axios.post(`${API}/uploads`, {
+    filename: file.name,
+    size: file.size,
+    content_type: file.type,
+  }, { headers });
+
+  let offset = upload.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    const end = Math.min(offset + CHUNK_SIZE, file.size);
+    try {
+      const { data } = await axios.put(`${API}/uploads/${upload.upload_id}`, file.slice(offset, end), {
+        headers: {
+          ...headers,
+          'Content-Type': 'application/octet-stream',
+          'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+        },
+      });
+      offset = data.offset;
+      retries = 0;
+    } catch (error) {
+      if (++retries > MAX_RETRIES) throw error;
+      // Ask the server how much it has and continue from there
+      const { data } = await axios.get(`${API}/uploads/${upload.upload_id}`, { headers });
+      offset = data.offset;
+    }
+  }
+  return upload.upload_id;
+}
@@ -0,0 +1,40 @@
+"""hot query indexes
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:06:42.665460
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_query_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_customer_user_id', 'customer', ['user_id']),
+    ('ix_professional_user_id', 'professional', ['user_id']),
+    ('ix_roles_users_user_id', 'roles_users', ['user_id', 'role_id']),
+    ('ix_roles_users_role_id', 'roles_users', ['role_id', 'user_id']),
+    ('ix_service_request_customer_date', 'service_request', ['customer_id', 'date_of_request']),
+    ('ix_service_request_professional_status', 'service_request', ['professional_id', 'service_status', 'date_of_request']),
+    ('ix_service_request_service_id', 'service_request', ['service_id']),
+    ('ix_customer_review_professional_rating', 'customer_review', ['professional_id', 'rating']),
+    ('ix_customer_review_customer_id', 'customer_review', ['customer_id']),
+)
+
+
+def upgrade():
+    # IF NOT EXISTS so databases created with db.create_all() after these indexes were added can be upgraded too
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,39 @@
+"""widen user.password
+
+Revision ID: 0003_widen_user_password
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 09:30:12.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from backend.search import create_search_index, drop_search_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_widen_user_password'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt hashes are 162 characters. SQLite rebuilds "user" to change the column,
+    # which the search triggers reading it would break, so they are dropped around it.
+    drop_search_triggers(op.get_bind())
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+    create_search_index(None, op.get_bind())
+
+
+def downgrade():
+    drop_search_triggers(op.get_bind())
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=False)
+    create_search_index(None, op.get_bind())
@@ -0,0 +1,35 @@
+"""service request pincode and open-request index
+
+Revision ID: 0004_service_request_open_queue
+Revises: 0003_widen_user_password
+Create Date: 2026-10-18 09:52:40.106352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_service_request_open_queue'
+down_revision = '0003_widen_user_password'
+branch_labels = None
+depends_on = None
+
+OPEN_CONDITION = "professional_id IS NULL AND service_status = 'requested'"
+
+
+def upgrade():
+    # A plain ADD COLUMN; batch mode would rebuild the table for nothing
+    op.add_column('service_request', sa.Column('pincode', sa.String(length=6), nullable=True))
+    op.execute(
+        "UPDATE service_request SET pincode = "
+        "(SELECT customer.pincode FROM customer WHERE customer.id = service_request.customer_id)"
+    )
+    op.create_index('ix_service_request_open', 'service_request', ['service_id', 'pincode', 'date_of_request'],
+                    unique=False, sqlite_where=sa.text(OPEN_CONDITION), postgresql_where=sa.text(OPEN_CONDITION))
+
+
+def downgrade():
+    op.drop_index('ix_service_request_open', table_name='service_request')
+    with op.batch_alter_table('service_request', schema=None) as batch_op:
+        batch_op.drop_column('pincode')
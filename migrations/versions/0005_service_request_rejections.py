@@ -0,0 +1,37 @@
+"""service request rejections
+
+Revision ID: 0005_service_request_rejections
+Revises: 0004_service_request_open_queue
+Create Date: 2026-10-18 14:05:21.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_service_request_rejections'
+down_revision = '0004_service_request_open_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # upgrade_database() runs create_all() on pre-migration databases before stamping them at
+    # the baseline, so the table may already be there
+    if 'service_request_rejection' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('service_request_rejection',
+    sa.Column('service_request_id', sa.Integer(), nullable=False),
+    sa.Column('professional_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['professional_id'], ['professional.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['service_request_id'], ['service_request.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('service_request_id', 'professional_id')
+    )
+    op.create_index('ix_service_request_rejection_professional_id', 'service_request_rejection', ['professional_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_service_request_rejection_professional_id', table_name='service_request_rejection')
+    op.drop_table('service_request_rejection')
@@ -0,0 +1,61 @@
+"""backfill professional_service from available_services
+
+Revision ID: 0006_backfill_professional_services
+Revises: 0005_service_request_rejections
+Create Date: 2026-10-18 14:40:03.518275
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_backfill_professional_services'
+down_revision = '0005_service_request_rejections'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# The tables as they are at this revision, independent of backend.models
+service = sa.table('service', sa.column('id', sa.Integer), sa.column('name', sa.String))
+professional = sa.table('professional', sa.column('id', sa.Integer), sa.column('available_services', sa.String))
+professional_service = sa.table('professional_service',
+                                sa.column('professional_id', sa.Integer), sa.column('service_id', sa.Integer))
+
+
+def upgrade():
+    # The job board and the dispatcher only see professionals through professional_service
+    connection = op.get_bind()
+    service_ids = {name.strip().lower(): service_id
+                   for service_id, name in connection.execute(sa.select(service.c.id, service.c.name))}
+    existing = set(connection.execute(
+        sa.select(professional_service.c.professional_id, professional_service.c.service_id)
+    ).all())
+
+    # available_services is a comma-joined list of service names, e.g. 'Plumbing, Electrical'
+    links = []
+    unmatched = set()
+    rows = connection.execute(sa.select(professional.c.id, professional.c.available_services)
+                              .where(professional.c.available_services != None)).all()
+    for professional_id, available_services in rows:
+        for name in {name.strip().lower() for name in available_services.split(',')} - {''}:
+            service_id = service_ids.get(name)
+            if service_id is None:
+                unmatched.add(name)
+            elif (professional_id, service_id) not in existing:
+                existing.add((professional_id, service_id))
+                links.append({"professional_id": professional_id, "service_id": service_id})
+
+    if links:
+        op.bulk_insert(professional_service, links)
+    logger.info("Linked %d professional services.", len(links))
+    if unmatched:
+        logger.warning("No service found for: %s; link them with `flask migrate-professional-services` "
+                       "once the services exist.", ', '.join(sorted(unmatched)))
+
+
+def downgrade():
+    # The links stay; they are what available_services already said
+    pass
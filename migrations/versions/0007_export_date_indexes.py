@@ -0,0 +1,33 @@
+"""export date indexes
+
+Revision ID: 0007_export_date_indexes
+Revises: 0006_backfill_professional_services
+Create Date: 2026-10-18 16:41:08.512907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_export_date_indexes'
+down_revision = '0006_backfill_professional_services'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_service_request_date', 'service_request', ['date_of_request']),
+    ('ix_customer_review_date', 'customer_review', ['review_date']),
+)
+
+
+def upgrade():
+    # IF NOT EXISTS: upgrade_database() creates model indexes on pre-migration databases before stamping them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
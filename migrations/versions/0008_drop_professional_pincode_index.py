@@ -0,0 +1,26 @@
+"""drop ix_professional_pincode
+
+Revision ID: 0008_drop_professional_pincode_index
+Revises: 0007_export_date_indexes
+Create Date: 2026-10-18 18:12:44.208351
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_drop_professional_pincode_index'
+down_revision = '0007_export_date_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left on databases created by db.create_all() before ix_professional_pincode_approved replaced it
+    op.drop_index('ix_professional_pincode', table_name='professional', if_exists=True)
+
+
+def downgrade():
+    # Fresh databases never had it, so there is nothing to put back
+    pass
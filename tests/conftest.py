@@ -0,0 +1,58 @@
+# tests/conftest.py
+import os
+import shutil
+import pytest
+
+BASELINE_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'database.sqlite3')
+
+
+def make_app(directory, database_uri, **config):
+    from app import create_app, CONFIGS
+
+    class TestConfig(CONFIGS['development']):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = database_uri
+        UPLOAD_FOLDER = os.path.join(directory, 'uploads')
+        PASSWORD_HASH_WORKERS = 0
+        RATELIMIT_ENABLED = False
+        CACHE_TYPE = None  # In-process response cache
+        EVENTS_STORAGE_URL = None
+
+    for name, value in config.items():
+        setattr(TestConfig, name, value)
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def baseline_database(tmp_path):
+    """A copy of instance/database.sqlite3: rows written by the app before migrations existed."""
+    path = tmp_path / 'baseline.sqlite3'
+    shutil.copyfile(BASELINE_DATABASE, path)
+    return path
+
+
+@pytest.fixture
+def baseline_app(tmp_path, baseline_database):
+    """An app on the baseline copy; call upgrade_database() in a test to migrate it."""
+    app = make_app(str(tmp_path), 'sqlite:///{}'.format(baseline_database))
+    yield app
+    from backend.db import db
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def admin_headers(baseline_app):
+    from flask_jwt_extended import create_access_token
+    from backend.models import User, Role, roles_users
+    from backend.db import db
+
+    with baseline_app.app_context():
+        admin_id = db.session.query(User.id)\
+            .join(roles_users, roles_users.c.user_id == User.id)\
+            .join(Role, Role.id == roles_users.c.role_id)\
+            .filter(Role.name == 'admin')\
+            .scalar()
+        return {"Authorization": "Bearer " + create_access_token(identity=str(admin_id))}
@@ -0,0 +1,61 @@
+# tests/test_documents.py
+import zlib
+import pytest
+from backend.documents import extract_pdf_info, DocumentTooLarge, PDF_DECOMPRESSED_LIMIT
+
+
+def write_pdf(path, content_streams):
+    # A minimal PDF body: one page and Flate-compressed content streams
+    parts = [b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n']
+    for number, stream in enumerate(content_streams, start=2):
+        parts.append(b'%d 0 obj << /Filter /FlateDecode >>\nstream\n%s\nendstream\nendobj\n' % (number, stream))
+    path.write_bytes(b''.join(parts) + b'%%EOF\n')
+    return str(path)
+
+
+def compressed_zeros(size, chunk=1024 * 1024):
+    # Compressed a chunk at a time, so the test never holds the inflated bytes either
+    compressor = zlib.compressobj(9)
+    pieces = [compressor.compress(bytes(chunk)) for _ in range(size // chunk)]
+    return b''.join(pieces) + compressor.flush()
+
+
+def test_extracts_text(tmp_path):
+    path = write_pdf(tmp_path / 'doc.pdf', [zlib.compress(b'BT (Plumbing licence) Tj ET')])
+    assert extract_pdf_info(path) == (1, 'Plumbing licence')
+
+
+def test_decompression_bomb_is_refused(tmp_path):
+    bomb = compressed_zeros(PDF_DECOMPRESSED_LIMIT + 1024 * 1024)
+    assert len(bomb) < PDF_DECOMPRESSED_LIMIT // 500
+    with pytest.raises(DocumentTooLarge):
+        extract_pdf_info(write_pdf(tmp_path / 'bomb.pdf', [bomb]))
+
+
+def test_limit_is_per_document(tmp_path):
+    # Streams that each fit but add up to more than the limit
+    stream = compressed_zeros(4 * 1024 * 1024)
+    path = write_pdf(tmp_path / 'many.pdf', [stream] * 3)
+    assert extract_pdf_info(path, max_decompressed=12 * 1024 * 1024)[0] == 1
+    with pytest.raises(DocumentTooLarge):
+        extract_pdf_info(path, max_decompressed=12 * 1024 * 1024 - 1)
+
+
+def test_bomb_marks_document_failed(baseline_app, tmp_path):
+    from backend.db import db, upgrade_database
+    from backend.models import ProfessionalDocument
+    from backend.tasks import process_professional_document
+
+    baseline_app.config['DOCUMENT_MAX_DECOMPRESSED_SIZE'] = 1024 * 1024
+    path = write_pdf(tmp_path / 'bomb.pdf', [compressed_zeros(2 * 1024 * 1024)])
+    with baseline_app.app_context():
+        upgrade_database()
+        document = ProfessionalDocument(professional_id=1, filename='bomb.pdf', path=path)
+        db.session.add(document)
+        db.session.commit()
+
+        process_professional_document(document.id)
+        db.session.expire_all()
+        document = db.session.get(ProfessionalDocument, document.id)
+        assert document.status == 'failed'
+        assert document.page_count is None
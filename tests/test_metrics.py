@@ -0,0 +1,23 @@
+# tests/test_metrics.py
+from tests.conftest import make_app
+
+
+def metrics_client(tmp_path, baseline_database, **config):
+    return make_app(str(tmp_path), 'sqlite:///{}'.format(baseline_database), **config).test_client()
+
+
+def test_metrics_are_off_by_default(tmp_path, baseline_database):
+    assert metrics_client(tmp_path, baseline_database).get('/metrics').status_code == 404
+
+
+def test_metrics_token_is_required(tmp_path, baseline_database):
+    client = metrics_client(tmp_path, baseline_database, METRICS_ENABLED=True, METRICS_TOKEN='scraper-secret')
+
+    refused = client.get('/metrics')
+    assert refused.status_code == 401
+    assert refused.headers['WWW-Authenticate'] == 'Bearer'
+    assert client.get('/metrics', headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    scraped = client.get('/metrics', headers={"Authorization": "Bearer scraper-secret"})
+    assert scraped.status_code == 200
+    assert scraped.mimetype == 'text/plain'
@@ -0,0 +1,79 @@
+# tests/test_upgrade.py
+import sqlite3
+import pytest
+from sqlalchemy import inspect
+from backend.db import db, upgrade_database
+
+
+def execute(path, statement, rows=()):
+    connection = sqlite3.connect(path)
+    with connection:
+        if rows:
+            connection.executemany(statement, rows)
+        else:
+            connection.execute(statement)
+    connection.close()
+
+
+def upgrade(app):
+    with app.app_context():
+        upgrade_database()
+        db.session.remove()
+
+
+def test_upgraded_database_is_searchable(baseline_app, admin_headers):
+    upgrade(baseline_app)
+    client = baseline_app.test_client()
+
+    customers = client.get('/api/admin/customer/details', headers=admin_headers).get_json()["customers"]
+    johns = {customer["customer_id"] for customer in customers if 'John' in customer["fullname"]}
+    assert johns
+
+    found = client.get('/api/admin/customer/search', query_string={"search_term": "John"}, headers=admin_headers)
+    assert found.status_code == 200
+    assert {customer["customer_id"] for customer in found.get_json()["customers"]} == johns
+
+    services = client.get('/api/admin/service/search/car', headers=admin_headers).get_json()
+    assert [service["name"] for service in services["services"]] == ['car']
+
+
+def test_upgraded_database_has_rating_stats(baseline_app, baseline_database, admin_headers):
+    # Reviews written before professional_rating_stats existed
+    execute(baseline_database,
+            "INSERT INTO customer_review (customer_id, professional_id, rating, review_date) VALUES (?, ?, ?, '2025-01-30 10:00:00')",
+            [(1, 1, 4), (2, 1, 1), (3, 2, 5)])
+    upgrade(baseline_app)
+
+    summary = baseline_app.test_client().get('/api/admin/summary/professionals', headers=admin_headers).get_json()
+    assert summary["summary"]["avg_ratings"] == {"1": 2.5, "2": 5.0}
+
+
+def test_upgrade_lower_cases_service_names(baseline_app, baseline_database):
+    execute(baseline_database, "UPDATE service SET name = ' Car ' WHERE name = 'car'")
+    upgrade(baseline_app)
+
+    with baseline_app.app_context():
+        names = db.session.execute(db.text("SELECT name FROM service ORDER BY name")).scalars().all()
+        indexes = {index["name"]: index["unique"] for index in inspect(db.engine).get_indexes('service')}
+    assert names == ['auto', 'bus', 'car']
+    assert indexes['uq_service_name']
+
+
+def test_upgrade_refuses_service_names_differing_in_case(baseline_app, baseline_database):
+    execute(baseline_database, "INSERT INTO service (name, description, price, time_required, is_approved) "
+                               "VALUES ('Car', 'room', 500.0, '6', 1)")
+    with pytest.raises(ValueError, match="'car'"):
+        upgrade(baseline_app)
+
+    # Nothing was changed; the database can be upgraded once the names are fixed
+    with baseline_app.app_context():
+        assert 'alembic_version' not in inspect(db.engine).get_table_names()
+        assert sorted(db.session.execute(db.text("SELECT name FROM service")).scalars()) == ['Car', 'auto', 'bus', 'car']
+
+
+
+def test_upgraded_database_matches_the_models(baseline_app):
+    # What `flask db check` compares: an upgraded database must not drift from a fresh one
+    upgrade(baseline_app)
+    result = baseline_app.test_cli_runner().invoke(args=['db', 'check'])
+    assert result.exit_code == 0, result.output